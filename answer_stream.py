@@ -0,0 +1,119 @@
+"""
+Answer Stream Module
+Cleans up generated answers, either at once or incrementally while streaming
+"""
+import threading
+from typing import Iterable
+
+import torch
+from transformers import StoppingCriteria
+
+
+# The model starts a new turn of the prompt format after these
+STOP_PHRASES = ("Answer:", "Question:", "Context:", "\n\nQuestion")
+
+# Formatting characters stripped from the start of an answer
+LEADING_MARKUP = '*#-'
+
+
+def clean_answer(text: str, stop_phrases: Iterable[str] = STOP_PHRASES) -> str:
+    """
+    Strip formatting artifacts and cut a decoded answer at the first stop phrase
+
+    Args:
+        text: Decoded answer
+        stop_phrases: Phrases that end the answer
+
+    Returns:
+        Cleaned answer
+    """
+    answer = text.strip().lstrip(LEADING_MARKUP).strip()
+    for stop in stop_phrases:
+        if stop in answer:
+            answer = answer.split(stop)[0].strip()
+    return answer
+
+
+class StopPhraseTrimmer:
+    """
+    Applies clean_answer() to text arriving in pieces
+
+    Text that could still turn into a stop phrase, and trailing whitespace,
+    is held back until the following text shows whether it belongs to the
+    answer, so nothing is ever emitted that clean_answer() would remove.
+    """
+
+    def __init__(self, stop_phrases: Iterable[str] = STOP_PHRASES):
+        """
+        Initialize the trimmer
+
+        Args:
+            stop_phrases: Phrases that end the answer
+        """
+        self.stop_phrases = tuple(stop_phrases)
+        self.hold = max(len(stop) for stop in self.stop_phrases) - 1
+        self.buffer = ""
+        self.started = False
+        self.stopped = False
+
+    def feed(self, text: str) -> str:
+        """
+        Add decoded text
+
+        Args:
+            text: Next piece of the decoded answer
+
+        Returns:
+            Text that can be shown now (possibly empty); check stopped afterwards
+        """
+        if self.stopped:
+            return ""
+
+        self.buffer += text
+        if not self.started:
+            # Wait for the first character that survives the leading strip
+            stripped = self.buffer.lstrip().lstrip(LEADING_MARKUP).lstrip()
+            if not stripped:
+                return ""
+            self.buffer = stripped
+            self.started = True
+
+        positions = [self.buffer.find(stop) for stop in self.stop_phrases]
+        positions = [position for position in positions if position >= 0]
+        if positions:
+            self.stopped = True
+            emitted, self.buffer = self.buffer[:min(positions)].rstrip(), ""
+            return emitted
+
+        # Keep a possible stop phrase prefix and trailing whitespace
+        end = max(0, len(self.buffer) - self.hold)
+        while end > 0 and self.buffer[end - 1].isspace():
+            end -= 1
+        emitted, self.buffer = self.buffer[:end], self.buffer[end:]
+        return emitted
+
+    def finish(self) -> str:
+        """
+        Flush the held text once generation has ended
+
+        Returns:
+            Remaining answer text
+        """
+        if self.stopped:
+            emitted = ""
+        elif self.started:
+            emitted = self.buffer.rstrip()
+        else:
+            emitted = clean_answer(self.buffer, self.stop_phrases)
+        self.buffer = ""
+        return emitted
+
+
+class StopOnEvent(StoppingCriteria):
+    """Stops generate() once an event is set, e.g. when the stream is abandoned"""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
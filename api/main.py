@@ -2,16 +2,19 @@
 FastAPI Service for Offline RAG Pipeline
 Production-ready REST API for document Q&A
 """
+import json
 import os
 import sys
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 from fastapi import FastAPI, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 import uvicorn
 
@@ -20,13 +23,19 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from rag_pipeline import RAGPipeline
 from api.schemas import (
+    BatchRetrieveRequest,
+    BatchRetrieveResponse,
     QueryRequest,
     QueryResponse,
     HealthResponse,
     IndexRequest,
     IndexResponse,
-    MetricsResponse
+    MetricsResponse,
+    SyncRequest,
+    SyncResponse
 )
+from source_manifest import expand_sources
+from source_watcher import SourceWatcher
 
 
 # Initialize FastAPI app
@@ -60,17 +69,68 @@ class AppState:
         self.total_errors: int = 0
         self.response_times: list = []
         self.start_time: float = time.time()
+        self.watcher: Optional[SourceWatcher] = None
+        # Serializes index updates; queries never take it
+        self.ingest_lock = threading.Lock()
 
 
 state = AppState()
 
 
+def pipeline_options() -> dict:
+    """RAGPipeline keyword arguments configured through environment variables"""
+    query_cache_ttl = os.getenv("QUERY_CACHE_TTL")
+    return {
+        "embedding_cache_dir": os.getenv("EMBEDDING_CACHE_DIR"),
+        "query_cache_size": int(os.getenv("QUERY_CACHE_SIZE", "1024")),
+        "query_cache_ttl": float(query_cache_ttl) if query_cache_ttl else None,
+        "warm_up_embeddings": os.getenv("WARM_UP_EMBEDDINGS", "0") == "1",
+        "embedding_backend": os.getenv("EMBEDDING_BACKEND", "torch"),
+        "generation_batch_size": int(os.getenv("GENERATION_BATCH_SIZE", "1")),
+        "prefix_cache_mb": float(os.getenv("PREFIX_CACHE_MB", "0")),
+        "draft_model_path": os.getenv("DRAFT_MODEL_PATH"),
+        "num_draft_tokens": int(os.getenv("NUM_DRAFT_TOKENS", "5")),
+        "cpu_precision": os.getenv("CPU_PRECISION", "fp32"),
+        "validate_cpu_precision": os.getenv("VALIDATE_CPU_PRECISION", "1") == "1"
+    }
+
+
+def dedup_threshold() -> Optional[float]:
+    """Near-duplicate threshold for documents indexed at startup or by the watcher"""
+    threshold = os.getenv("DEDUP_THRESHOLD")
+    return float(threshold) if threshold else None
+
+
+def start_watcher(document_paths: list, index_path: str):
+    """Sync the index in the background whenever the watched documents change"""
+    def sync():
+        with state.ingest_lock:
+            stats = state.rag_pipeline.sync_documents(
+                document_paths, index_path=index_path, dedup_threshold=dedup_threshold()
+            )
+            state.document_indexed = state.rag_pipeline.vector_store is not None
+            state.index_size = state.rag_pipeline.vector_store.num_chunks if state.rag_pipeline.vector_store else 0
+        print(f"Watched documents synced: {stats}. Index size: {state.index_size}")
+
+    state.watcher = SourceWatcher(
+        document_paths,
+        sync,
+        debounce_seconds=float(os.getenv("WATCH_DEBOUNCE_SECONDS", "2.0")),
+        poll_interval=float(os.getenv("WATCH_POLL_INTERVAL", "5.0"))
+    )
+    state.watcher.start()
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the RAG pipeline on startup"""
     # Get model path from environment variable
     model_path = os.getenv("GEMMA_MODEL_PATH")
     document_paths_str = os.getenv("DOCUMENT_PATH", "radar-calibration-doc.md")
+    index_path = os.getenv("INDEX_PATH")
+    watch_documents = os.getenv("WATCH_DOCUMENTS", "0") == "1"
+    # Changes made while the service was down are picked up before watching starts
+    sync_on_startup = os.getenv("SYNC_DOCUMENTS", "0") == "1" or watch_documents
 
     # Parse multiple document paths (pipe-delimited)
     document_paths = document_paths_str.split("|") if document_paths_str else []
@@ -79,19 +139,46 @@ async def startup_event():
         print("WARNING: GEMMA_MODEL_PATH not set. Model will need to be loaded via /initialize endpoint")
         return
 
+    if watch_documents and not index_path:
+        print("WARNING: WATCH_DOCUMENTS needs INDEX_PATH to keep track of indexed files, not watching")
+        watch_documents = False
+
     try:
         print(f"Initializing RAG Pipeline with model: {model_path}")
-        state.rag_pipeline = RAGPipeline(model_path=model_path)
+        state.rag_pipeline = RAGPipeline(model_path=model_path, **pipeline_options())
         state.model_path = model_path
 
+        # Map a previously saved index instead of re-indexing on every start
+        if index_path and os.path.exists(os.path.join(index_path, "index.faiss")):
+            print(f"Loading saved index from {index_path}")
+            state.index_size = state.rag_pipeline.load_index(index_path, mmap=True)
+            state.document_indexed = True
+            print(f"Index loaded successfully. Index size: {state.index_size}")
+            if not sync_on_startup:
+                return
+
+        # Only re-index documents that changed since the saved index was built
+        if sync_on_startup and index_path:
+            stats = state.rag_pipeline.sync_documents(
+                document_paths, index_path=index_path, dedup_threshold=dedup_threshold()
+            )
+            state.document_indexed = state.rag_pipeline.vector_store is not None
+            state.index_size = state.rag_pipeline.vector_store.num_chunks if state.rag_pipeline.vector_store else 0
+            print(f"Documents synced: {stats}. Index size: {state.index_size}")
+            if watch_documents:
+                start_watcher(document_paths, index_path)
+            return
+
         # Auto-index documents if they exist
-        existing_docs = [doc for doc in document_paths if os.path.exists(doc)]
+        existing_docs = [doc for doc in expand_sources(document_paths) if os.path.exists(doc)]
         if existing_docs:
             print(f"Auto-indexing {len(existing_docs)} document(s)")
-            state.rag_pipeline.index_documents(existing_docs)
+            state.rag_pipeline.index_documents(existing_docs, dedup_threshold=dedup_threshold())
             state.document_indexed = True
-            state.index_size = len(state.rag_pipeline.vector_store.chunks) if state.rag_pipeline.vector_store else 0
+            state.index_size = state.rag_pipeline.vector_store.num_chunks if state.rag_pipeline.vector_store else 0
             print(f"Documents indexed successfully. Index size: {state.index_size}")
+            if index_path:
+                state.rag_pipeline.save_index(index_path)
         else:
             print(f"No valid documents found in: {document_paths}")
 
@@ -100,6 +187,16 @@ async def startup_event():
         print("Service will start but RAG pipeline needs manual initialization")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop watching documents and finish queued generation"""
+    if state.watcher is not None:
+        state.watcher.stop()
+        state.watcher = None
+    if state.rag_pipeline is not None and state.rag_pipeline.scheduler is not None:
+        state.rag_pipeline.scheduler.close()
+
+
 @app.get("/", tags=["General"])
 async def root():
     """Root endpoint with API information"""
@@ -151,7 +248,7 @@ async def initialize_model(model_path: str):
     """Manually initialize the RAG pipeline with a specific model path"""
     try:
         print(f"Initializing RAG Pipeline with model: {model_path}")
-        state.rag_pipeline = RAGPipeline(model_path=model_path)
+        state.rag_pipeline = RAGPipeline(model_path=model_path, **pipeline_options())
         state.model_path = model_path
 
         return {
@@ -176,6 +273,12 @@ async def index_document(request: IndexRequest):
             detail="RAG pipeline not initialized. Call /initialize first or set GEMMA_MODEL_PATH environment variable."
         )
 
+    if not state.ingest_lock.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another index update is running, try again later"
+        )
+
     try:
         # Check if all documents exist
         missing_docs = [doc for doc in request.document_paths if not os.path.exists(doc)]
@@ -185,21 +288,32 @@ async def index_document(request: IndexRequest):
                 detail=f"Documents not found: {', '.join(missing_docs)}"
             )
 
-        # Index the documents
+        # Index the documents off the event loop so queries keep being served
         print(f"Indexing {len(request.document_paths)} document(s)")
-        state.rag_pipeline.index_documents(
+        chunks_created = await run_in_threadpool(
+            state.rag_pipeline.index_documents,
             document_paths=request.document_paths,
             chunk_size=request.chunk_size,
-            chunk_overlap=request.chunk_overlap
+            chunk_overlap=request.chunk_overlap,
+            mode=request.mode,
+            index_type=request.index_type,
+            nprobe=request.nprobe,
+            ef_search=request.ef_search,
+            rerank=request.rerank,
+            num_workers=request.num_workers,
+            num_loaders=request.num_loaders,
+            stream_batch_size=request.stream_batch_size,
+            chunk_by_tokens=request.chunk_by_tokens,
+            dedup_threshold=request.dedup_threshold
         )
 
         state.document_indexed = True
-        state.index_size = len(state.rag_pipeline.vector_store.chunks)
+        state.index_size = state.rag_pipeline.vector_store.num_chunks
 
         return IndexResponse(
             status="success",
             document_paths=request.document_paths,
-            chunks_created=state.index_size,
+            chunks_created=chunks_created,
             index_size=state.index_size
         )
 
@@ -211,6 +325,62 @@ async def index_document(request: IndexRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to index document: {str(e)}"
         )
+    finally:
+        state.ingest_lock.release()
+
+
+@app.post("/index/sync", response_model=SyncResponse, tags=["Management"])
+async def sync_documents(request: SyncRequest):
+    """Incrementally index files, directories or glob patterns, skipping unchanged files"""
+    if not state.rag_pipeline:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="RAG pipeline not initialized. Call /initialize first or set GEMMA_MODEL_PATH environment variable."
+        )
+
+    index_path = os.getenv("INDEX_PATH")
+    if not index_path and not request.manifest_path:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Set INDEX_PATH or pass manifest_path to keep track of indexed files"
+        )
+
+    if not state.ingest_lock.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another index update is running, try again later"
+        )
+
+    try:
+        # Sync off the event loop so queries keep being served
+        stats = await run_in_threadpool(
+            state.rag_pipeline.sync_documents,
+            request.sources,
+            index_path=index_path,
+            manifest_path=request.manifest_path,
+            chunk_size=request.chunk_size,
+            chunk_overlap=request.chunk_overlap,
+            index_type=request.index_type,
+            num_workers=request.num_workers,
+            num_loaders=request.num_loaders,
+            stream_batch_size=request.stream_batch_size,
+            chunk_by_tokens=request.chunk_by_tokens,
+            dedup_threshold=request.dedup_threshold
+        )
+
+        state.document_indexed = state.rag_pipeline.vector_store is not None
+        state.index_size = state.rag_pipeline.vector_store.num_chunks if state.rag_pipeline.vector_store else 0
+
+        return SyncResponse(status="success", index_size=state.index_size, **stats)
+
+    except Exception as e:
+        state.total_errors += 1
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to sync documents: {str(e)}"
+        )
+    finally:
+        state.ingest_lock.release()
 
 
 @app.post("/query", response_model=QueryResponse, tags=["RAG"])
@@ -239,8 +409,9 @@ async def query_rag(request: QueryRequest):
     start_time = time.time()
 
     try:
-        # Execute RAG query
-        result = state.rag_pipeline.query(
+        # Execute RAG query off the event loop so concurrent queries can be batched together
+        result = await run_in_threadpool(
+            state.rag_pipeline.query,
             question=request.question,
             top_k=request.top_k,
             max_new_tokens=request.max_tokens,
@@ -279,6 +450,127 @@ async def query_rag(request: QueryRequest):
         )
 
 
+def server_sent_event(event: str, data: dict) -> str:
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/query/stream", tags=["RAG"])
+async def query_rag_stream(request: QueryRequest):
+    """
+    Query the RAG system and stream the answer as server-sent events
+
+    Each piece of the answer is sent as a `token` event as soon as it is
+    generated. A final `done` event carries the full answer and metadata,
+    or an `error` event if generation fails part-way.
+    """
+    if not state.rag_pipeline:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="RAG pipeline not initialized. Call /initialize first or set GEMMA_MODEL_PATH environment variable."
+        )
+
+    if not state.document_indexed:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No document indexed. Call /index endpoint first."
+        )
+
+    start_time = time.time()
+    pipeline = state.rag_pipeline
+
+    # A plain generator is iterated in the threadpool, so generation never blocks the event loop
+    def events():
+        try:
+            for event in pipeline.query_stream(
+                question=request.question,
+                top_k=request.top_k,
+                max_new_tokens=request.max_tokens,
+                temperature=request.temperature,
+                show_context=request.include_context
+            ):
+                if event["event"] == "token":
+                    yield server_sent_event("token", {"text": event["text"]})
+                    continue
+
+                response_time_ms = (time.time() - start_time) * 1000
+                state.response_times.append(response_time_ms)
+                state.total_queries += 1
+                if len(state.response_times) > 100:
+                    state.response_times = state.response_times[-100:]
+
+                yield server_sent_event("done", {
+                    "question": event["question"],
+                    "answer": event["answer"],
+                    "context": event.get("context"),
+                    "metadata": {
+                        "top_k": request.top_k,
+                        "max_tokens": request.max_tokens,
+                        "temperature": request.temperature,
+                        "response_time_ms": round(response_time_ms, 2),
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+                })
+
+        except Exception as e:
+            # Headers are already sent, so the failure is reported in the stream
+            state.total_errors += 1
+            yield server_sent_event("error", {"detail": f"Query failed: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/retrieve/batch", response_model=BatchRetrieveResponse, tags=["RAG"])
+async def retrieve_batch(request: BatchRetrieveRequest):
+    """
+    Retrieve context chunks for many queries with one batched search
+
+    Queries are embedded together and searched with a single index lookup;
+    no answer is generated.
+    """
+    if not state.rag_pipeline:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="RAG pipeline not initialized. Call /initialize first or set GEMMA_MODEL_PATH environment variable."
+        )
+
+    if not state.document_indexed:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No document indexed. Call /index endpoint first."
+        )
+
+    start_time = time.time()
+
+    try:
+        # Batch encoding and search run off the event loop like queries
+        results = await run_in_threadpool(
+            state.rag_pipeline.retrieve_context_batch, request.queries, top_k=request.top_k
+        )
+        response_time_ms = (time.time() - start_time) * 1000
+
+        return BatchRetrieveResponse(
+            results=results,
+            metadata={
+                "num_queries": len(request.queries),
+                "top_k": request.top_k,
+                "response_time_ms": round(response_time_ms, 2),
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        )
+
+    except Exception as e:
+        state.total_errors += 1
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Retrieval failed: {str(e)}"
+        )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler for unhandled errors"""
@@ -48,6 +48,35 @@ class QueryResponse(BaseModel):
         }
 
 
+class BatchRetrieveRequest(BaseModel):
+    """Request model for batched context retrieval"""
+    queries: List[str] = Field(..., description="Queries to retrieve context for", min_length=1, max_length=1000)
+    top_k: int = Field(3, description="Number of context chunks to retrieve per query", ge=1, le=100)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "queries": ["What is radar calibration?", "How often should calibration be performed?"],
+                "top_k": 3
+            }
+        }
+
+
+class ContextChunk(BaseModel):
+    """A retrieved context chunk"""
+    id: Optional[int] = Field(None, description="Chunk id within its source document")
+    text: str = Field(..., description="Chunk text")
+    source: Optional[str] = Field(None, description="Source document path")
+    char_start: Optional[int] = Field(None, description="Start offset in the source document")
+    char_end: Optional[int] = Field(None, description="End offset in the source document")
+
+
+class BatchRetrieveResponse(BaseModel):
+    """Response model for batched context retrieval"""
+    results: List[List[ContextChunk]] = Field(..., description="Retrieved chunks for each query, in query order")
+    metadata: dict = Field(..., description="Additional metadata about the retrieval")
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str = Field(..., description="Service status")
@@ -71,13 +100,37 @@ class IndexRequest(BaseModel):
     document_paths: List[str] = Field(..., description="Path(s) to document(s) to index", min_length=1)
     chunk_size: int = Field(500, description="Chunk size for splitting", ge=100, le=2000)
     chunk_overlap: int = Field(50, description="Overlap between chunks", ge=0, le=500)
+    mode: str = Field(
+        "rebuild",
+        description="'rebuild' resets the index, 'append' adds the documents, 'update' replaces chunks per document",
+        pattern="^(rebuild|append|update)$"
+    )
+    index_type: str = Field(
+        "flat",
+        description="FAISS index type used when rebuilding: 'flat', 'ivf', 'hnsw', 'sq8' or 'ivfpq'",
+        pattern="^(flat|ivf|hnsw|sq8|ivfpq)$"
+    )
+    nprobe: Optional[int] = Field(None, description="IVF lists visited per query", ge=1, le=65536)
+    ef_search: Optional[int] = Field(None, description="HNSW search queue size", ge=1, le=4096)
+    rerank: bool = Field(False, description="Re-rank compressed index results with full-precision vectors")
+    num_workers: int = Field(1, description="Embedding worker processes", ge=1, le=256)
+    num_loaders: int = Field(1, description="Document loading worker processes", ge=1, le=256)
+    chunk_by_tokens: bool = Field(False, description="Measure chunk_size and chunk_overlap in model tokens")
+    dedup_threshold: Optional[float] = Field(
+        None, description="Record chunks this similar (MinHash estimate) to an indexed chunk as its aliases", gt=0, le=1
+    )
+    stream_batch_size: Optional[int] = Field(
+        None, description="Embed chunks in batches of this size while documents are still loading", ge=1, le=1_000_000
+    )
 
     class Config:
         json_schema_extra = {
             "example": {
                 "document_paths": ["radar-calibration-doc.md"],
                 "chunk_size": 500,
-                "chunk_overlap": 50
+                "chunk_overlap": 50,
+                "mode": "rebuild",
+                "index_type": "flat"
             }
         }
 
@@ -100,6 +153,63 @@ class IndexResponse(BaseModel):
         }
 
 
+class SyncRequest(BaseModel):
+    """Request to incrementally index files, directories or glob patterns"""
+    sources: List[str] = Field(..., description="Files, directories or glob patterns to index", min_length=1)
+    manifest_path: Optional[str] = Field(
+        None, description="Manifest file (defaults to manifest.json in the INDEX_PATH directory)"
+    )
+    chunk_size: int = Field(500, description="Chunk size for splitting", ge=100, le=2000)
+    chunk_overlap: int = Field(50, description="Overlap between chunks", ge=0, le=500)
+    index_type: str = Field(
+        "flat",
+        description="FAISS index type used when the index is built from scratch",
+        pattern="^(flat|ivf|hnsw|sq8|ivfpq)$"
+    )
+    num_workers: int = Field(1, description="Embedding worker processes", ge=1, le=256)
+    num_loaders: int = Field(1, description="Document loading worker processes", ge=1, le=256)
+    chunk_by_tokens: bool = Field(False, description="Measure chunk_size and chunk_overlap in model tokens")
+    dedup_threshold: Optional[float] = Field(
+        None, description="Record chunks this similar (MinHash estimate) to an indexed chunk as its aliases", gt=0, le=1
+    )
+    stream_batch_size: Optional[int] = Field(
+        None, description="Embed chunks in batches of this size while documents are still loading", ge=1, le=1_000_000
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "sources": ["docs/", "manuals/**/*.md"],
+                "chunk_size": 500,
+                "chunk_overlap": 50
+            }
+        }
+
+
+class SyncResponse(BaseModel):
+    """Response from an incremental indexing run"""
+    status: str = Field(..., description="Sync status")
+    added: int = Field(..., description="Files indexed for the first time")
+    changed: int = Field(..., description="Files re-indexed because their content changed")
+    deleted: int = Field(..., description="Files whose chunks were removed")
+    unchanged: int = Field(..., description="Files skipped because they did not change")
+    chunks_created: int = Field(..., description="Number of chunks created from added and changed files")
+    index_size: int = Field(..., description="Total size of index")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "success",
+                "added": 3,
+                "changed": 1,
+                "deleted": 0,
+                "unchanged": 412,
+                "chunks_created": 96,
+                "index_size": 13250
+            }
+        }
+
+
 class MetricsResponse(BaseModel):
     """Prometheus-style metrics response"""
     total_queries: int = Field(..., description="Total number of queries processed")
@@ -18,7 +18,16 @@ from rag_pipeline import RAGPipeline
 class PerformanceBenchmark:
     """Benchmark RAG pipeline performance"""
 
-    def __init__(self, model_path: str, use_cpu: bool = False, quantize: bool = False):
+    def __init__(
+        self,
+        model_path: str,
+        use_cpu: bool = False,
+        quantize: bool = False,
+        embedding_backend: str = "torch",
+        draft_model_path: str = None,
+        num_draft_tokens: int = 5,
+        cpu_precision: str = "fp32"
+    ):
         """Initialize benchmark"""
         print("=" * 60)
         print("RAG Pipeline Performance Benchmark")
@@ -27,6 +36,8 @@ class PerformanceBenchmark:
         self.model_path = model_path
         self.use_cpu = use_cpu
         self.quantize = quantize
+        self.embedding_backend = embedding_backend
+        self.draft_model_path = draft_model_path
 
         # Initialize pipeline
         print(f"\nInitializing RAG pipeline...")
@@ -34,7 +45,11 @@ class PerformanceBenchmark:
         self.pipeline = RAGPipeline(
             model_path=model_path,
             use_cpu=use_cpu,
-            quantize_4bit=quantize
+            quantize_4bit=quantize,
+            embedding_backend=embedding_backend,
+            draft_model_path=draft_model_path,
+            num_draft_tokens=num_draft_tokens,
+            cpu_precision=cpu_precision
         )
         self.init_time = time.time() - start_init
 
@@ -125,6 +140,8 @@ class PerformanceBenchmark:
                 "model": self.model_path,
                 "device": "CPU" if self.use_cpu else "GPU",
                 "quantization": "4-bit" if self.quantize else "None",
+                "draft_model": self.draft_model_path,
+                "cpu_precision": self.pipeline.cpu_precision,
                 "init_time_seconds": round(self.init_time, 2),
                 "index_time_seconds": round(self.index_time, 2)
             },
@@ -156,6 +173,28 @@ class PerformanceBenchmark:
 
         return report
 
+    def compare_speculative(self, queries: List[str], results: Dict[str, Any]) -> Dict[str, Any]:
+        """Rerun the queries without the draft model and compare against the speculative run"""
+        print(f"\nRerunning queries without the draft model...")
+        decoder, self.pipeline.speculative_decoder = self.pipeline.speculative_decoder, None
+        try:
+            baseline = self.run_query_benchmark(queries)
+        finally:
+            self.pipeline.speculative_decoder = decoder
+
+        stats = decoder.stats
+        speculative_tps = sum(results["tokens_generated"]) / sum(results["query_times"])
+        baseline_tps = sum(baseline["tokens_generated"]) / sum(baseline["query_times"])
+        return {
+            "draft_tokens": stats["draft_tokens"],
+            "accepted_tokens": stats["accepted_tokens"],
+            "acceptance_rate": round(decoder.acceptance_rate() or 0.0, 3),
+            "tokens_per_verify_step": round(stats["generated_tokens"] / max(1, stats["verify_steps"]), 2),
+            "tokens_per_second": round(speculative_tps, 1),
+            "baseline_tokens_per_second": round(baseline_tps, 1),
+            "speedup": round(speculative_tps / baseline_tps, 2)
+        }
+
     def print_report(self, report: Dict[str, Any]):
         """Print formatted report"""
         print("\n" + "=" * 60)
@@ -166,6 +205,9 @@ class PerformanceBenchmark:
         print(f"  Model: {report['configuration']['model']}")
         print(f"  Device: {report['configuration']['device']}")
         print(f"  Quantization: {report['configuration']['quantization']}")
+        print(f"  CPU Precision: {report['configuration']['cpu_precision']}")
+        if report['configuration']['draft_model']:
+            print(f"  Draft Model: {report['configuration']['draft_model']}")
         print(f"  Init Time: {report['configuration']['init_time_seconds']}s")
         print(f"  Index Time: {report['configuration']['index_time_seconds']}s")
 
@@ -215,6 +257,26 @@ class PerformanceBenchmark:
         # Print report
         self.print_report(report)
 
+        # Lower CPU precision compared against fp32 at startup
+        if self.pipeline.precision_report is not None:
+            report["cpu_precision"] = self.pipeline.precision_report
+
+        # Compare speculative decoding against plain decoding
+        if self.pipeline.speculative_decoder is not None:
+            speculative = self.compare_speculative(queries, results)
+            report["speculative_decoding"] = speculative
+            print(f"\nSpeculative decoding: {speculative['acceptance_rate']:.1%} of draft tokens accepted, "
+                  f"{speculative['tokens_per_verify_step']} tokens per main model pass, "
+                  f"{speculative['tokens_per_second']} vs {speculative['baseline_tokens_per_second']} tokens/s "
+                  f"({speculative['speedup']:.2f}x)")
+
+        # Check quantized embeddings against the PyTorch backend
+        if self.embedding_backend != "torch":
+            parity = self.pipeline.vector_store.embedding_parity(queries)
+            report["embedding_parity"] = parity
+            print(f"\nEmbedding parity ({parity['backend']} vs {parity['reference_backend']}): "
+                  f"mean cosine {parity['mean_cosine']:.4f}, max drift {parity['max_drift']:.4f}")
+
         # Save to file if specified
         if output_file:
             with open(output_file, 'w') as f:
@@ -234,6 +296,14 @@ def main():
                         help="Force CPU mode")
     parser.add_argument("--quantize", action="store_true",
                         help="Use 4-bit quantization")
+    parser.add_argument("--embedding-backend", type=str, default="torch", choices=["torch", "onnx-int8"],
+                        help="Embedding backend (onnx-int8 also reports cosine drift against torch)")
+    parser.add_argument("--cpu-precision", type=str, default="fp32", choices=["fp32", "bf16", "int8"],
+                        help="Model precision on CPU (bf16/int8 are validated against fp32 at startup)")
+    parser.add_argument("--draft-model-path", type=str, default=None,
+                        help="Draft model for speculative decoding (also reports acceptance rate and speedup)")
+    parser.add_argument("--num-draft-tokens", type=int, default=5,
+                        help="Tokens the draft model proposes per step to start with")
     parser.add_argument("--output", type=str, default=None,
                         help="Output file for results (JSON)")
     parser.add_argument("--num-queries", type=int, default=10,
@@ -259,7 +329,11 @@ def main():
     benchmark = PerformanceBenchmark(
         model_path=args.model_path,
         use_cpu=args.cpu,
-        quantize=args.quantize
+        quantize=args.quantize,
+        embedding_backend=args.embedding_backend,
+        draft_model_path=args.draft_model_path,
+        num_draft_tokens=args.num_draft_tokens,
+        cpu_precision=args.cpu_precision
     )
 
     benchmark.run(
@@ -0,0 +1,152 @@
+"""
+Continuous Batching Benchmark Script
+Sends concurrent generation requests to one model, one generate() at a time
+versus through the continuous batching scheduler, and reports throughput and latency
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from typing import Any, Dict, List
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+from generation_scheduler import GenerationScheduler
+
+
+QUESTIONS = [
+    "What is radar calibration?",
+    "How often should calibration be performed?",
+    "Which reference targets are used?",
+    "What equipment is required?",
+    "How is range accuracy verified?",
+    "What are common sources of error?",
+]
+
+
+def build_prompts(tokenizer, document: str, num_requests: int, context_chars: int) -> List[torch.Tensor]:
+    """Prompts in the pipeline's format, each with a different slice of the document as context"""
+    prompts = []
+    for i in range(num_requests):
+        start = (i * context_chars // 2) % max(1, len(document) - context_chars)
+        prompt = f"""Use the following context to answer the question accurately and concisely.
+
+Context:
+{document[start:start + context_chars]}
+
+Question: {QUESTIONS[i % len(QUESTIONS)]}
+
+Answer:"""
+        prompts.append(tokenizer(prompt, return_tensors="pt")['input_ids'])
+    return prompts
+
+
+def run(prompts: List[torch.Tensor], generate, concurrency: int) -> Dict[str, Any]:
+    """Send the prompts from `concurrency` client threads and time each request"""
+    latencies, tokens = [], []
+    pending = list(enumerate(prompts))
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                _, input_ids = pending.pop(0)
+            start = time.perf_counter()
+            num_tokens = generate(input_ids)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                tokens.append(num_tokens)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(prompts),
+        'tokens': sum(tokens),
+        'seconds': elapsed,
+        'tokens_per_second': sum(tokens) / elapsed,
+        'p50_latency': statistics.median(latencies),
+        'p95_latency': latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark continuous batching of concurrent generation requests")
+    parser.add_argument("--model-path", type=str, required=True, help="Path to a local causal LM")
+    parser.add_argument("--document", type=str, default="radar-calibration-doc.md", help="Document used as prompt context")
+    parser.add_argument("--requests", type=int, default=32, help="Number of requests")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--batch-size", type=int, default=8, help="Scheduler batch size")
+    parser.add_argument("--context-chars", type=int, default=1500, help="Characters of context per prompt")
+    parser.add_argument("--max-new-tokens", type=int, default=128, help="Maximum tokens per answer")
+    parser.add_argument("--temperature", type=float, default=0.7, help="Sampling temperature")
+    parser.add_argument("--output", type=str, default=None, help="Save results to a JSON file")
+    args = parser.parse_args()
+
+    print(f"Loading model from: {args.model_path}")
+    tokenizer = AutoTokenizer.from_pretrained(args.model_path)
+    model = AutoModelForCausalLM.from_pretrained(args.model_path, dtype=torch.float32)
+    model.eval()
+
+    with open(args.document, 'r', encoding='utf-8') as f:
+        document = f.read()
+    prompts = build_prompts(tokenizer, document, args.requests, args.context_chars)
+
+    # Same parameters as RAGPipeline.generate_response()
+    kwargs = {
+        'max_new_tokens': args.max_new_tokens,
+        'temperature': args.temperature,
+        'do_sample': True,
+        'top_p': 0.9,
+        'top_k': 50,
+        'repetition_penalty': 1.1,
+        'pad_token_id': tokenizer.eos_token_id,
+        'eos_token_id': tokenizer.eos_token_id
+    }
+
+    # Without the scheduler, requests queue for the model one at a time
+    model_lock = threading.Lock()
+
+    def sequential(input_ids):
+        with model_lock, torch.no_grad():
+            outputs = model.generate(input_ids, attention_mask=torch.ones_like(input_ids), **kwargs)
+        return outputs.shape[1] - input_ids.shape[1]
+
+    scheduler = GenerationScheduler(model, "cpu", max_batch_size=args.batch_size)
+
+    def batched(input_ids):
+        return len(scheduler.generate(input_ids, **kwargs))
+
+    print(f"Sending {args.requests} requests from {args.concurrency} clients\n")
+    results = {}
+    for name, generate in (("sequential", sequential), (f"batched ({args.batch_size})", batched)):
+        results[name] = run(prompts, generate, args.concurrency)
+    scheduler.close()
+
+    print(f"{'':<16}{'tokens':>10}{'tokens/s':>12}{'p50 s':>10}{'p95 s':>10}")
+    for name, result in results.items():
+        print(f"{name:<16}{result['tokens']:>10}{result['tokens_per_second']:>12.1f}"
+              f"{result['p50_latency']:>10.2f}{result['p95_latency']:>10.2f}")
+
+    baseline, batched_result = results.values()
+    speedup = batched_result['tokens_per_second'] / baseline['tokens_per_second']
+    print(f"\nAggregate throughput: {speedup:.2f}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results, 'speedup': speedup}, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Chunking Benchmark Script
+Compares the span-based chunker with the previous string-concatenating one
+on a large synthetic markdown file
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from document_loader import DocumentLoader
+
+
+def legacy_chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[Dict[str, Any]]:
+    """Previous chunk_text: splits the whole text and concatenates paragraph strings"""
+    chunks = []
+    start = 0
+    chunk_id = 0
+    current_chunk = ""
+
+    for para in text.split('\n\n'):
+        if len(current_chunk) + len(para) > chunk_size and current_chunk:
+            chunks.append({
+                'id': chunk_id,
+                'text': current_chunk.strip(),
+                'char_start': start,
+                'char_end': start + len(current_chunk)
+            })
+            overlap_start = max(0, len(current_chunk) - chunk_overlap)
+            current_chunk = current_chunk[overlap_start:] + "\n\n" + para
+            start += overlap_start
+            chunk_id += 1
+        else:
+            if current_chunk:
+                current_chunk += "\n\n" + para
+            else:
+                current_chunk = para
+
+    if current_chunk:
+        chunks.append({
+            'id': chunk_id,
+            'text': current_chunk.strip(),
+            'char_start': start,
+            'char_end': start + len(current_chunk)
+        })
+
+    return chunks
+
+
+def write_synthetic_markdown(path: str, size_mb: float, seed: int = 0):
+    """Write a markdown file of headings, paragraphs and lists of about size_mb megabytes"""
+    rng = random.Random(seed)
+    words = ("radar calibration antenna signal phase noise target range doppler gain "
+             "beam procedure measurement offset reference temperature drift sweep").split()
+
+    # A pool of varied sections, written repeatedly until the size is reached
+    sections = []
+    for section in range(200):
+        parts = [f"## Section {section}"]
+        for _ in range(rng.randint(2, 6)):
+            sentence_count = rng.randint(1, 8)
+            parts.append(" ".join(
+                " ".join(rng.choice(words) for _ in range(rng.randint(5, 20))).capitalize() + "."
+                for _ in range(sentence_count)
+            ))
+        parts.append("\n".join(f"- {rng.choice(words)} {rng.choice(words)}" for _ in range(rng.randint(2, 5))))
+        sections.append("\n\n".join(parts) + "\n\n")
+
+    target = int(size_mb * 1024 * 1024)
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < target:
+            section = sections[rng.randrange(len(sections))]
+            f.write(section)
+            written += len(section)
+
+
+def measure(name: str, run: Callable[[], int], size_bytes: int) -> Dict[str, Any]:
+    """Time one chunker run and report its throughput"""
+    start = time.perf_counter()
+    num_chunks = run()
+    elapsed = time.perf_counter() - start
+    result = {
+        'name': name,
+        'chunks': num_chunks,
+        'seconds': elapsed,
+        'mb_per_second': size_bytes / 1024 / 1024 / elapsed,
+        'chunks_per_second': num_chunks / elapsed
+    }
+    print(f"  {name:<28} {elapsed:8.2f}s {result['mb_per_second']:8.1f} MB/s "
+          f"{result['chunks_per_second']:10.0f} chunks/s")
+    return result
+
+
+def measure_allocations(name: str, run: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    Measure the peak memory a chunker run allocates and the memory blocks it still
+    holds when it returns (including its result), using tracemalloc
+    """
+    tracemalloc.start()
+    ignore_tracemalloc = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    before = tracemalloc.take_snapshot().filter_traces(ignore_tracemalloc)
+    output = run()
+    after = tracemalloc.take_snapshot().filter_traces(ignore_tracemalloc)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del output
+
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    result = {'name': name, 'peak_bytes': peak, 'allocated_blocks': blocks}
+    print(f"  {name:<28} peak {peak / 1024 / 1024:8.1f} MB allocated, {blocks:10d} blocks held")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document chunking")
+    parser.add_argument("--size-mb", type=float, default=500,
+                        help="Size of the synthetic markdown file in MB")
+    parser.add_argument("--document", type=str, default=None,
+                        help="Benchmark an existing document instead of a synthetic one")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Chunk size in characters")
+    parser.add_argument("--chunk-overlap", type=int, default=50, help="Chunk overlap in characters")
+    parser.add_argument("--trace-mb", type=float, default=20,
+                        help="Size of the sample traced for allocations (tracing is slow)")
+    parser.add_argument("--output", type=str, default=None, help="Save results to a JSON file")
+    args = parser.parse_args()
+
+    loader = DocumentLoader(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = args.document
+        if path is None:
+            path = os.path.join(workdir, "synthetic.md")
+            print(f"Writing {args.size_mb:.0f} MB synthetic markdown file...")
+            write_synthetic_markdown(path, args.size_mb)
+
+        size_bytes = os.path.getsize(path)
+        print(f"\nThroughput on {size_bytes / 1024 / 1024:.0f} MB "
+              f"(chunk_size={args.chunk_size}, chunk_overlap={args.chunk_overlap}):")
+        text = loader.load_document(path)
+        throughput = [
+            measure("legacy chunk_text", lambda: len(legacy_chunk_text(text, args.chunk_size, args.chunk_overlap)),
+                    size_bytes),
+            measure("span chunk_text", lambda: len(loader.chunk_text(text)), size_bytes),
+            measure("span iter_chunks (streamed)", lambda: sum(1 for _ in loader.iter_chunks(path)), size_bytes)
+        ]
+        # Release the text while the closures above still refer to the name
+        text = None
+
+        sample = loader.load_document(path)[:int(args.trace_mb * 1024 * 1024)]
+        sample_path = os.path.join(workdir, "sample.md")
+        with open(sample_path, 'w', encoding='utf-8') as f:
+            f.write(sample)
+
+        print(f"\nPeak allocations on a {args.trace_mb:.0f} MB sample:")
+        allocations = [
+            measure_allocations("legacy chunk_text",
+                                lambda: legacy_chunk_text(sample, args.chunk_size, args.chunk_overlap)),
+            measure_allocations("span chunk_text", lambda: loader.chunk_text(sample)),
+            # Chunks are dropped as they are counted, as a streaming consumer would
+            measure_allocations("span iter_chunks (streamed)",
+                                lambda: sum(1 for _ in loader.iter_chunks(sample_path)))
+        ]
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'size_bytes': size_bytes,
+                'chunk_size': args.chunk_size,
+                'chunk_overlap': args.chunk_overlap,
+                'throughput': throughput,
+                'allocations': allocations
+            }, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
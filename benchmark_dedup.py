@@ -0,0 +1,105 @@
+"""
+Deduplication Benchmark Script
+Builds the same corpus with and without near-duplicate elimination and
+reports how much the index and chunk storage shrink
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmark_chunking import write_synthetic_markdown
+from document_loader import DocumentLoader
+from vector_store import VectorStore
+
+
+def build(
+    chunks: List[Dict[str, Any]],
+    index_type: str,
+    dedup_threshold: Optional[float],
+    workdir: str
+) -> Dict[str, Any]:
+    """Build an index over the chunks and report the footprint of the saved index once loaded"""
+    store = VectorStore(index_type=index_type, dedup_threshold=dedup_threshold)
+    start = time.perf_counter()
+    store.build_index(chunks)
+    elapsed = time.perf_counter() - start
+
+    # A serving process loads the saved index, where MinHash signatures stay on disk
+    path = os.path.join(workdir, f"index-{dedup_threshold}")
+    store.save(path)
+    store = VectorStore()
+    store.load(path)
+    footprint = store.memory_footprint()
+    return {
+        'dedup_threshold': dedup_threshold,
+        'input_chunks': len(chunks),
+        'indexed_chunks': store.num_chunks,
+        'aliased_chunks': footprint['aliased_chunks'],
+        'index_bytes': footprint['index_bytes'],
+        'chunk_bytes': footprint['chunk_bytes'],
+        'alias_bytes': footprint['dedup_bytes'],
+        'total_bytes': footprint['index_bytes'] + footprint['chunk_bytes'] + footprint['dedup_bytes'],
+        'build_seconds': elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate chunk elimination")
+    parser.add_argument("--documents", type=str, nargs='+', default=None,
+                        help="Documents to index (default: synthetic documents sharing boilerplate)")
+    parser.add_argument("--num-documents", type=int, default=20, help="Number of synthetic documents")
+    parser.add_argument("--size-mb", type=float, default=0.5, help="Size of each synthetic document in MB")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Chunk size in characters")
+    parser.add_argument("--chunk-overlap", type=int, default=50, help="Chunk overlap in characters")
+    parser.add_argument("--index-type", type=str, default="flat", help="FAISS index type")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Deduplication threshold")
+    parser.add_argument("--output", type=str, default=None, help="Save results to a JSON file")
+    args = parser.parse_args()
+
+    loader = DocumentLoader(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = args.documents
+        if paths is None:
+            # Documents drawn from the same pool of sections share most of their text
+            paths = []
+            for i in range(args.num_documents):
+                path = os.path.join(workdir, f"doc{i}.md")
+                write_synthetic_markdown(path, args.size_mb, seed=i)
+                paths.append(path)
+
+        chunks = []
+        for path in paths:
+            for chunk in loader.iter_chunks(path):
+                chunk['source'] = path
+                chunks.append(chunk)
+
+        print(f"Indexing {len(chunks)} chunks from {len(paths)} document(s)\n")
+        baseline = build(chunks, args.index_type, None, workdir)
+        deduplicated = build(chunks, args.index_type, args.threshold, workdir)
+
+    print(f"\n{'':<18}{'chunks':>10}{'index MB':>12}{'chunks MB':>12}{'aliases MB':>12}{'total MB':>12}{'build s':>10}")
+    for name, result in (("baseline", baseline), (f"dedup {args.threshold}", deduplicated)):
+        print(f"{name:<18}{result['indexed_chunks']:>10}{result['index_bytes'] / 1e6:>12.2f}"
+              f"{result['chunk_bytes'] / 1e6:>12.2f}{result['alias_bytes'] / 1e6:>12.2f}"
+              f"{result['total_bytes'] / 1e6:>12.2f}{result['build_seconds']:>10.1f}")
+
+    shrink = {
+        'chunks': 1 - deduplicated['indexed_chunks'] / baseline['indexed_chunks'],
+        'index_bytes': 1 - deduplicated['index_bytes'] / baseline['index_bytes'],
+        'total_bytes': 1 - deduplicated['total_bytes'] / baseline['total_bytes']
+    }
+    print(f"\nIndex shrank by {shrink['index_bytes']:.1%} ({shrink['chunks']:.1%} fewer vectors), "
+          f"index plus chunk storage by {shrink['total_bytes']:.1%}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'baseline': baseline, 'deduplicated': deduplicated, 'shrink': shrink}, f, indent=2)
+        print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
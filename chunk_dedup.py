@@ -0,0 +1,343 @@
+"""
+Chunk Deduplication Module
+MinHash signatures and LSH banding to find near-duplicate chunks
+"""
+import json
+import os
+import re
+import sys
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+DEDUP_FILE = "dedup.json"
+SIGNATURES_FILE = "minhash.npy"
+
+# Defaults: 16 bands of 4 rows put the LSH candidate threshold near a Jaccard
+# similarity of 0.5; candidates are then checked against the real threshold
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_SHINGLE_SIZE = 5
+
+# Texts whose shingles are hashed together in one array operation
+SIGNATURE_BATCH_SIZE = 1024
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def shingle_hashes(text: str, shingle_size: int = DEFAULT_SHINGLE_SIZE) -> np.ndarray:
+    """
+    32-bit hashes of the overlapping word n-grams of a text
+
+    Words are lowercased, so formatting and case differences do not count.
+    A text shorter than shingle_size words is a single shingle.
+
+    Args:
+        text: Text to shingle
+        shingle_size: Words per shingle
+
+    Returns:
+        uint64 array of shingle hashes below 2**32
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    word_hashes = np.array([zlib.crc32(word.encode('utf-8')) for word in words] or [0], dtype=np.uint64)
+
+    # Polynomial rolling combination of shingle_size consecutive word hashes
+    count = max(1, len(word_hashes) - shingle_size + 1)
+    combined = np.zeros(count, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for offset in range(min(shingle_size, len(word_hashes))):
+            combined = combined * np.uint64(1000003) + word_hashes[offset:offset + count]
+    return combined >> np.uint64(32) ^ (combined & np.uint64(0xFFFFFFFF))
+
+
+class ChunkDeduplicator:
+    """
+    MinHash/LSH index of chunk signatures, with the aliases of each kept chunk
+
+    Signature rows line up with chunk ids of the vector store. Only chunks
+    that can absorb duplicates are registered in the LSH buckets; a chunk
+    found to be a near-duplicate of a registered one is not indexed but
+    recorded as an alias (its fields without the text) of that chunk.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: int = DEFAULT_BANDS,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        seed: int = 1
+    ):
+        """
+        Initialize an empty deduplicator
+
+        Args:
+            threshold: Estimated Jaccard similarity of shingles above which chunks are duplicates
+            num_perm: Number of MinHash permutations (signature length)
+            bands: Number of LSH bands; must divide num_perm
+            shingle_size: Words per shingle
+            seed: Seed of the MinHash permutations
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("Deduplication threshold must be in (0, 1]")
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+
+        # Multiply-shift hash functions: the high 32 bits of (a * hash + b) mod 2**64
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(0, 1 << 62, size=num_perm, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.randint(0, 1 << 62, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._band_weights = self._a[:self.rows]
+
+        self.clear()
+
+    def clear(self):
+        """Forget all signatures and aliases"""
+        self.count = 0
+        self.signatures = np.zeros((0, self.num_perm), dtype=np.uint32)
+        self.registered = np.zeros(0, dtype=bool)
+        self.aliases: Dict[int, List[Dict[str, Any]]] = {}
+        self._buckets = None
+
+    @property
+    def num_aliases(self) -> int:
+        """Number of chunks stored as aliases instead of being indexed"""
+        return sum(len(aliases) for aliases in self.aliases.values())
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the signatures and alias records (mapped signatures excluded)"""
+        alias_bytes = sum(
+            sys.getsizeof(alias) + sum(sys.getsizeof(value) for value in alias.values())
+            for aliases in self.aliases.values() for alias in aliases
+        )
+        signature_bytes = 0 if isinstance(self.signatures, np.memmap) else self.count * (self.num_perm * 4 + 1)
+        return signature_bytes + alias_bytes
+
+    def compute(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        MinHash signatures of texts
+
+        Args:
+            texts: Texts to sign
+
+        Returns:
+            uint32 array of shape (len(texts), num_perm)
+        """
+        signatures = np.zeros((len(texts), self.num_perm), dtype=np.uint32)
+        for start in range(0, len(texts), SIGNATURE_BATCH_SIZE):
+            shingles = [shingle_hashes(text, self.shingle_size) for text in texts[start:start + SIGNATURE_BATCH_SIZE]]
+            offsets = np.cumsum([0] + [len(s) for s in shingles[:-1]])
+            with np.errstate(over='ignore'):
+                permuted = ((np.concatenate(shingles)[:, None] * self._a + self._b) >> np.uint64(32)).astype(np.uint32)
+            signatures[start:start + len(shingles)] = np.minimum.reduceat(permuted, offsets, axis=0)
+        return signatures
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        """Hash of each band of a signature"""
+        with np.errstate(over='ignore'):
+            keys = (signature.reshape(self.bands, self.rows).astype(np.uint64) * self._band_weights).sum(axis=1)
+        return keys.tolist()
+
+    def _build_buckets(self):
+        """Rebuild the LSH buckets from the registered signatures"""
+        self._buckets = [{} for _ in range(self.bands)]
+        for chunk_id in np.flatnonzero(self.registered[:self.count]).tolist():
+            self._insert(chunk_id)
+
+    def _insert(self, chunk_id: int):
+        for buckets, key in zip(self._buckets, self._band_keys(self.signatures[chunk_id])):
+            buckets.setdefault(key, []).append(chunk_id)
+
+    def append(self, signatures: np.ndarray, register: Optional[np.ndarray] = None):
+        """
+        Add signature rows for the next chunk ids
+
+        Args:
+            signatures: Signatures of the new chunks, in id order
+            register: Whether each chunk may absorb later duplicates (default: all)
+        """
+        end = self.count + len(signatures)
+        if end > len(self.signatures) or isinstance(self.signatures, np.memmap):
+            capacity = max(1024, len(self.signatures))
+            while capacity < end:
+                capacity *= 2
+            grown = np.zeros((capacity, self.num_perm), dtype=np.uint32)
+            grown[:self.count] = self.signatures[:self.count]
+            self.signatures = grown
+            registered = np.zeros(capacity, dtype=bool)
+            registered[:self.count] = self.registered[:self.count]
+            self.registered = registered
+
+        self.signatures[self.count:end] = signatures
+        self.registered[self.count:end] = True if register is None else register
+        start, self.count = self.count, end
+
+        if self._buckets is not None:
+            for chunk_id in range(start, end):
+                if self.registered[chunk_id]:
+                    self._insert(chunk_id)
+
+    def match(self, signature: np.ndarray) -> Optional[int]:
+        """
+        Most similar registered chunk at or above the threshold
+
+        Args:
+            signature: Signature of a new chunk
+
+        Returns:
+            Chunk id of the duplicate, or None if the chunk is new
+        """
+        if self._buckets is None:
+            self._build_buckets()
+
+        candidates = set()
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(key, ()))
+        if not candidates:
+            return None
+
+        candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarity = (self.signatures[candidates] == signature).mean(axis=1)
+        best = int(np.argmax(similarity))
+        return int(candidates[best]) if similarity[best] >= self.threshold else None
+
+    def add_alias(self, chunk_id: int, chunk: Dict[str, Any]):
+        """
+        Record a duplicate of a chunk
+
+        Args:
+            chunk_id: Kept chunk the duplicate resolves to
+            chunk: Duplicate chunk; everything but its text is kept
+        """
+        self.aliases.setdefault(chunk_id, []).append({key: value for key, value in chunk.items() if key != 'text'})
+
+    def unregister(self, chunk_ids: Iterable[int]):
+        """
+        Stop matching new chunks against chunks that are being removed
+
+        Args:
+            chunk_ids: Chunk ids
+        """
+        for chunk_id in chunk_ids:
+            if chunk_id < self.count and self.registered[chunk_id]:
+                self.registered[chunk_id] = False
+                if self._buckets is not None:
+                    for buckets, key in zip(self._buckets, self._band_keys(self.signatures[chunk_id])):
+                        bucket = buckets[key]
+                        bucket.remove(chunk_id)
+                        if not bucket:
+                            del buckets[key]
+
+    def drop_aliases(self, sources: Iterable[str]) -> int:
+        """
+        Forget aliases that came from source documents
+
+        Args:
+            sources: Source document paths
+
+        Returns:
+            Number of aliases dropped
+        """
+        sources = set(sources)
+        dropped = 0
+        for chunk_id in list(self.aliases):
+            kept = [alias for alias in self.aliases[chunk_id] if alias.get('source') not in sources]
+            dropped += len(self.aliases[chunk_id]) - len(kept)
+            if kept:
+                self.aliases[chunk_id] = kept
+            else:
+                del self.aliases[chunk_id]
+        return dropped
+
+    def truncate(self, count: int):
+        """
+        Drop signature rows (and their aliases) from chunk id count onwards
+
+        Args:
+            count: Number of rows to keep
+        """
+        if count >= self.count:
+            return
+        self.unregister(range(count, self.count))
+        self.count = count
+        self.aliases = {chunk_id: aliases for chunk_id, aliases in self.aliases.items() if chunk_id < count}
+
+    def compact(self, live: np.ndarray):
+        """
+        Keep the rows of live chunks, renumbered like the vector store
+
+        Args:
+            live: Ids of the chunks kept, in order
+        """
+        remap = {int(old): new for new, old in enumerate(live.tolist())}
+        self.signatures = np.array(self.signatures[live])
+        self.registered = self.registered[live]
+        self.count = len(live)
+        self.aliases = {remap[chunk_id]: aliases for chunk_id, aliases in self.aliases.items() if chunk_id in remap}
+        self._buckets = None
+
+    def save(self, path: str):
+        """
+        Write the signatures and aliases next to a saved index
+
+        Args:
+            path: Index directory
+        """
+        signatures_file = os.path.join(path, SIGNATURES_FILE)
+        with open(signatures_file + ".tmp", 'wb') as f:
+            np.save(f, self.signatures[:self.count])
+        os.replace(signatures_file + ".tmp", signatures_file)
+
+        dedup_file = os.path.join(path, DEDUP_FILE)
+        with open(dedup_file + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({
+                'threshold': self.threshold,
+                'num_perm': self.num_perm,
+                'bands': self.bands,
+                'shingle_size': self.shingle_size,
+                'seed': self.seed,
+                'unregistered': np.flatnonzero(~self.registered[:self.count]).tolist(),
+                'aliases': {str(chunk_id): aliases for chunk_id, aliases in self.aliases.items()}
+            }, f, ensure_ascii=False)
+        os.replace(dedup_file + ".tmp", dedup_file)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['ChunkDeduplicator']:
+        """
+        Load signatures and aliases saved with an index
+
+        Signatures are only read when new chunks are deduplicated, so they
+        are memory-mapped and copied into memory on the first change.
+
+        Args:
+            path: Index directory
+
+        Returns:
+            Loaded ChunkDeduplicator, or None if the index was not deduplicated
+        """
+        dedup_file = os.path.join(path, DEDUP_FILE)
+        if not os.path.exists(dedup_file):
+            return None
+
+        with open(dedup_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        dedup = cls(data['threshold'], data['num_perm'], data['bands'], data['shingle_size'], data['seed'])
+
+        dedup.signatures = np.load(os.path.join(path, SIGNATURES_FILE), mmap_mode='r')
+        dedup.count = len(dedup.signatures)
+        dedup.registered = np.ones(dedup.count, dtype=bool)
+        dedup.registered[data['unregistered']] = False
+        dedup.aliases = {int(chunk_id): aliases for chunk_id, aliases in data['aliases'].items()}
+        return dedup
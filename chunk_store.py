@@ -0,0 +1,461 @@
+"""
+Chunk Store Module
+Columnar, array-backed storage for document chunks
+"""
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+STORE_DIR = "chunks"
+META_FILE = "store.json"
+FORMAT_VERSION = 1
+
+# Integer fields stored as int64 columns; absent values are stored as MISSING
+INT_COLUMNS = ("id", "char_start", "char_end", "token_count")
+MISSING = np.iinfo(np.int64).min
+
+COMPRESSIONS = (None, "zstd")
+
+
+def has_chunk_store(path: str) -> bool:
+    """Whether a directory contains a saved chunk store"""
+    return os.path.exists(os.path.join(path, STORE_DIR, META_FILE))
+
+
+class ChunkStore(Sequence):
+    """
+    Chunks stored as columns instead of a list of dictionaries
+
+    Integer fields live in int64 arrays, sources are dictionary-encoded and
+    all texts share one UTF-8 blob addressed by an offsets array. Indexing
+    decodes a fresh chunk dictionary, so callers see the same chunk views as
+    before while the store holds no per-chunk Python objects. Deleted chunks
+    read back as None.
+    """
+
+    BLOCK_SIZE = 1 << 16
+
+    def __init__(self, initial_capacity: int = 1024):
+        """
+        Create an empty in-memory store
+
+        Args:
+            initial_capacity: Number of chunks allocated before the columns grow
+        """
+        self.initial_capacity = initial_capacity
+        self.size = 0
+        self.columns = {name: np.zeros(0, dtype=np.int64) for name in INT_COLUMNS}
+        self.source_codes = np.zeros(0, dtype=np.int32)
+        self.deleted = np.zeros(0, dtype=bool)
+        self.sources: List[str] = []
+        self.source_lookup: Dict[str, int] = {}
+
+        # Text and extra fields (JSON) of chunk i span offsets[i]:offsets[i + 1]
+        self.text = bytearray()
+        self.text_offsets = np.zeros(1, dtype=np.int64)
+        self.extras = bytearray()
+        self.extras_offsets = np.zeros(1, dtype=np.int64)
+
+        # Set when the text blob is read from zstd-compressed blocks
+        self.text_blocks = None
+        self.block_offsets = None
+        self.block_size = self.BLOCK_SIZE
+        self._block_cache = (-1, b"")
+
+        self.mapped = False
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Optional[Dict[str, Any]]]) -> 'ChunkStore':
+        """
+        Build a store from chunk dictionaries
+
+        Args:
+            chunks: Chunk dictionaries indexed by chunk id (None marks a deleted chunk)
+
+        Returns:
+            New ChunkStore
+        """
+        store = cls()
+        for chunk in chunks:
+            if chunk is None:
+                store.append({'text': ''})
+                store.delete(store.size - 1)
+            else:
+                store.append(chunk)
+        return store
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, chunk_id):
+        if isinstance(chunk_id, slice):
+            return [self[i] for i in range(*chunk_id.indices(self.size))]
+
+        if chunk_id < 0:
+            chunk_id += self.size
+        if not 0 <= chunk_id < self.size:
+            raise IndexError("chunk id out of range")
+        if self.deleted[chunk_id]:
+            return None
+
+        chunk = {}
+        value = int(self.columns['id'][chunk_id])
+        if value != MISSING:
+            chunk['id'] = value
+        chunk['text'] = self._read_text(int(self.text_offsets[chunk_id]), int(self.text_offsets[chunk_id + 1]))
+        for name in INT_COLUMNS[1:]:
+            value = int(self.columns[name][chunk_id])
+            if value != MISSING:
+                chunk[name] = value
+        code = int(self.source_codes[chunk_id])
+        if code >= 0:
+            chunk['source'] = self.sources[code]
+
+        start, end = int(self.extras_offsets[chunk_id]), int(self.extras_offsets[chunk_id + 1])
+        if end > start:
+            chunk.update(json.loads(bytes(self.extras[start:end]).decode('utf-8')))
+        return chunk
+
+    def __iter__(self) -> Iterator[Optional[Dict[str, Any]]]:
+        for chunk_id in range(self.size):
+            yield self[chunk_id]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ChunkStore, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the columns and blobs"""
+        arrays = list(self.columns.values()) + [self.source_codes, self.deleted, self.text_offsets, self.extras_offsets]
+        text_bytes = len(self.text) if self.text_blocks is None else len(self.text_blocks)
+        return sum(array.nbytes for array in arrays) + text_bytes + len(self.extras)
+
+    def _read_text(self, start: int, end: int) -> str:
+        """Decode a span of the text blob"""
+        return self._read_text_bytes(start, end).decode('utf-8')
+
+    def _read_text_bytes(self, start: int, end: int) -> bytes:
+        """Raw UTF-8 bytes of a span of the text blob"""
+        if self.text_blocks is None:
+            return bytes(self.text[start:end])
+        if end <= start:
+            return b""
+
+        parts = []
+        for block_no in range(start // self.block_size, (end - 1) // self.block_size + 1):
+            block = self._read_block(block_no)
+            block_start = block_no * self.block_size
+            parts.append(block[max(start - block_start, 0):end - block_start])
+        return b"".join(parts)
+
+    def _read_block(self, block_no: int) -> bytes:
+        """Decompress one text block, keeping the last one for neighbouring reads"""
+        if self._block_cache[0] != block_no:
+            start, end = int(self.block_offsets[block_no]), int(self.block_offsets[block_no + 1])
+            data = zstandard.ZstdDecompressor().decompress(bytes(self.text_blocks[start:end]))
+            self._block_cache = (block_no, data)
+        return self._block_cache[1]
+
+    def _materialize(self):
+        """Copy mapped or compressed data into memory before the first write"""
+        if not self.mapped and self.text_blocks is None:
+            return
+
+        if self.text_blocks is not None:
+            self.text = bytearray(b"".join(self._read_block(b) for b in range(len(self.block_offsets) - 1)))
+            self.text_blocks = None
+            self.block_offsets = None
+            self._block_cache = (-1, b"")
+        else:
+            self.text = bytearray(self.text)
+        self.extras = bytearray(self.extras)
+        self.columns = {name: np.array(column) for name, column in self.columns.items()}
+        self.source_codes = np.array(self.source_codes)
+        self.deleted = np.array(self.deleted)
+        self.text_offsets = np.array(self.text_offsets)
+        self.extras_offsets = np.array(self.extras_offsets)
+        self.mapped = False
+
+    def _reserve(self, count: int):
+        """Make room for count more chunks, doubling the column capacity"""
+        capacity = len(self.deleted)
+        end = self.size + count
+        if end <= capacity:
+            return
+
+        new_capacity = max(self.initial_capacity, capacity)
+        while new_capacity < end:
+            new_capacity *= 2
+
+        def grow(array, fill):
+            # Offset arrays hold one more entry than the other columns
+            grown = np.full(new_capacity + len(array) - capacity, fill, dtype=array.dtype)
+            grown[:len(array)] = array
+            return grown
+
+        self.columns = {name: grow(column, MISSING) for name, column in self.columns.items()}
+        self.source_codes = grow(self.source_codes, -1)
+        self.deleted = grow(self.deleted, False)
+        self.text_offsets = grow(self.text_offsets, 0)
+        self.extras_offsets = grow(self.extras_offsets, 0)
+
+    def append(self, chunk: Dict[str, Any]):
+        """
+        Append a chunk
+
+        Args:
+            chunk: Chunk dictionary with at least a 'text' field
+        """
+        self._materialize()
+        self._reserve(1)
+        chunk_id = self.size
+        extras = {}
+
+        for name in INT_COLUMNS:
+            value = chunk.get(name)
+            if isinstance(value, (int, np.integer)) and not isinstance(value, bool) and value != MISSING:
+                self.columns[name][chunk_id] = value
+            else:
+                self.columns[name][chunk_id] = MISSING
+                if name in chunk:
+                    extras[name] = value
+
+        source = chunk.get('source')
+        if isinstance(source, str):
+            code = self.source_lookup.get(source)
+            if code is None:
+                code = self.source_lookup[source] = len(self.sources)
+                self.sources.append(source)
+            self.source_codes[chunk_id] = code
+        else:
+            self.source_codes[chunk_id] = -1
+            if 'source' in chunk:
+                extras['source'] = source
+
+        for key, value in chunk.items():
+            if key not in INT_COLUMNS and key not in ('text', 'source'):
+                extras[key] = value
+
+        self.text += chunk['text'].encode('utf-8')
+        self.text_offsets[chunk_id + 1] = len(self.text)
+        if extras:
+            self.extras += json.dumps(extras, ensure_ascii=False).encode('utf-8')
+        self.extras_offsets[chunk_id + 1] = len(self.extras)
+        self.deleted[chunk_id] = False
+        self.size += 1
+
+    def extend(self, chunks: Iterable[Dict[str, Any]]):
+        """
+        Append several chunks
+
+        Args:
+            chunks: Chunk dictionaries
+        """
+        for chunk in chunks:
+            self.append(chunk)
+
+    def delete(self, chunk_id: int):
+        """
+        Mark a chunk as deleted; its data is dropped by take()
+
+        Args:
+            chunk_id: Chunk to delete
+        """
+        self._materialize()
+        self.deleted[chunk_id] = True
+
+    def deleted_ids(self) -> np.ndarray:
+        """Ids of deleted chunks"""
+        return np.flatnonzero(self.deleted[:self.size])
+
+    def ids_for_source(self, source: Optional[str]) -> np.ndarray:
+        """
+        Ids of live chunks from a source document
+
+        Args:
+            source: Source document path (None selects chunks without a source)
+
+        Returns:
+            Array of chunk ids
+        """
+        if source is None:
+            code = -1
+        elif source in self.source_lookup:
+            code = self.source_lookup[source]
+        else:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero((self.source_codes[:self.size] == code) & ~self.deleted[:self.size])
+
+    def source_ids(self) -> Dict[Optional[str], List[int]]:
+        """Live chunk ids grouped by source document"""
+        codes = self.source_codes[:self.size]
+        live = np.flatnonzero(~self.deleted[:self.size])
+        grouped = {}
+        for code in np.unique(codes[live]).tolist():
+            source = self.sources[code] if code >= 0 else None
+            grouped[source] = live[codes[live] == code].tolist()
+        return grouped
+
+    def take(self, chunk_ids: np.ndarray) -> 'ChunkStore':
+        """
+        Copy the given chunks, in order, into a new packed store
+
+        Args:
+            chunk_ids: Chunk ids to keep
+
+        Returns:
+            New ChunkStore holding only those chunks
+        """
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        store = ChunkStore(initial_capacity=self.initial_capacity)
+        store.size = len(chunk_ids)
+        store.columns = {name: np.asarray(column[chunk_ids]) for name, column in self.columns.items()}
+        store.deleted = np.asarray(self.deleted[chunk_ids])
+
+        # Re-encode sources so the dictionary only holds sources still in use
+        codes = np.asarray(self.source_codes[chunk_ids])
+        used = np.unique(codes[codes >= 0])
+        recode = np.full(len(self.sources), -1, dtype=np.int32)
+        recode[used] = np.arange(len(used), dtype=np.int32)
+        store.source_codes = np.where(codes >= 0, recode[np.maximum(codes, 0)], -1).astype(np.int32)
+        store.sources = [self.sources[code] for code in used.tolist()]
+        store.source_lookup = {source: code for code, source in enumerate(store.sources)}
+
+        text_offsets = np.zeros(len(chunk_ids) + 1, dtype=np.int64)
+        extras_offsets = np.zeros(len(chunk_ids) + 1, dtype=np.int64)
+        for position, chunk_id in enumerate(chunk_ids.tolist()):
+            store.text += self._read_text_bytes(int(self.text_offsets[chunk_id]), int(self.text_offsets[chunk_id + 1]))
+            text_offsets[position + 1] = len(store.text)
+            start, end = int(self.extras_offsets[chunk_id]), int(self.extras_offsets[chunk_id + 1])
+            store.extras += bytes(self.extras[start:end])
+            extras_offsets[position + 1] = len(store.extras)
+        store.text_offsets = text_offsets
+        store.extras_offsets = extras_offsets
+        return store
+
+    def save(self, path: str, compression: Optional[str] = None):
+        """
+        Write the columns to a 'chunks' directory under path
+
+        Files are written next to their destination and renamed into place,
+        so a store currently mapped from the same directory keeps reading
+        the old files.
+
+        Args:
+            path: Directory to write to
+            compression: None, or 'zstd' to compress the text blob in blocks
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}'. Expected one of: {COMPRESSIONS}")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression requires the 'zstandard' package")
+
+        store_dir = os.path.join(path, STORE_DIR)
+        os.makedirs(store_dir, exist_ok=True)
+
+        def write(name, data):
+            target = os.path.join(store_dir, name)
+            with open(target + ".tmp", 'wb') as f:
+                if isinstance(data, np.ndarray):
+                    np.save(f, data)
+                else:
+                    f.write(data)
+            os.replace(target + ".tmp", target)
+
+        n = self.size
+        for name, column in self.columns.items():
+            write(f"{name}.npy", np.asarray(column[:n]))
+        write("source_codes.npy", np.asarray(self.source_codes[:n]))
+        write("deleted.npy", np.asarray(self.deleted[:n]))
+        write("text_offsets.npy", np.asarray(self.text_offsets[:n + 1]))
+        write("extras_offsets.npy", np.asarray(self.extras_offsets[:n + 1]))
+        write("extras.bin", bytes(self.extras[:int(self.extras_offsets[n])]))
+
+        text_size = int(self.text_offsets[n])
+        if compression == "zstd":
+            compressor = zstandard.ZstdCompressor()
+            blocks = bytearray()
+            block_offsets = [0]
+            for start in range(0, text_size, self.BLOCK_SIZE):
+                blocks += compressor.compress(self._read_text_bytes(start, min(start + self.BLOCK_SIZE, text_size)))
+                block_offsets.append(len(blocks))
+            write("text.bin", bytes(blocks))
+            write("block_offsets.npy", np.array(block_offsets, dtype=np.int64))
+        else:
+            write("text.bin", self._read_text_bytes(0, text_size))
+
+        meta = {
+            'version': FORMAT_VERSION,
+            'count': n,
+            'sources': self.sources,
+            'compression': compression,
+            'block_size': self.BLOCK_SIZE
+        }
+        write(META_FILE, json.dumps(meta, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False) -> 'ChunkStore':
+        """
+        Load a store written by save()
+
+        Args:
+            path: Directory the store was saved to
+            mmap: Memory-map the columns and blobs read-only instead of reading them
+
+        Returns:
+            Loaded ChunkStore
+        """
+        store_dir = os.path.join(path, STORE_DIR)
+        with open(os.path.join(store_dir, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        def read_array(name):
+            return np.load(os.path.join(store_dir, name), mmap_mode='r' if mmap else None)
+
+        def read_column(name):
+            # Columns added after a store was written are missing for all its chunks
+            if not os.path.exists(os.path.join(store_dir, f"{name}.npy")):
+                return np.full(meta['count'], MISSING, dtype=np.int64)
+            return read_array(f"{name}.npy")
+
+        def read_blob(name):
+            file_path = os.path.join(store_dir, name)
+            # numpy cannot map an empty file
+            if mmap and os.path.getsize(file_path):
+                return np.memmap(file_path, dtype=np.uint8, mode='r')
+            with open(file_path, 'rb') as f:
+                return bytearray(f.read())
+
+        store = cls()
+        store.size = meta['count']
+        store.columns = {name: read_column(name) for name in INT_COLUMNS}
+        store.source_codes = read_array("source_codes.npy")
+        store.deleted = read_array("deleted.npy")
+        store.text_offsets = read_array("text_offsets.npy")
+        store.extras_offsets = read_array("extras_offsets.npy")
+        store.extras = read_blob("extras.bin")
+        store.sources = meta['sources']
+        store.source_lookup = {source: code for code, source in enumerate(store.sources)}
+        store.block_size = meta.get('block_size', cls.BLOCK_SIZE)
+
+        if meta.get('compression') == "zstd":
+            if zstandard is None:
+                raise ImportError("Loading a zstd-compressed chunk store requires the 'zstandard' package")
+            store.text_blocks = read_blob("text.bin")
+            store.block_offsets = read_array("block_offsets.npy")
+        else:
+            store.text = read_blob("text.bin")
+        store.mapped = mmap
+        return store
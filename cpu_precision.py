@@ -0,0 +1,159 @@
+"""
+CPU Precision Module
+Lower-precision CPU inference with bfloat16 weights or int8 dynamic quantization of
+linear layers, validated against float32
+"""
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import torch
+
+
+CPU_PRECISIONS = ("fp32", "bf16", "int8")
+
+# Fixed (context, question) pairs a converted model is checked on against float32
+VALIDATION_SET = (
+    ("Radar calibration aligns the measured range, azimuth and elevation of a radar with known "
+     "reference values. Corner reflectors at surveyed positions serve as reference targets.",
+     "What is radar calibration?"),
+    ("Calibration should be performed after installation, after any maintenance of the antenna or "
+     "receiver chain, and at least once every twelve months during normal operation.",
+     "How often should calibration be performed?"),
+    ("Range accuracy is verified by comparing the measured distance to a reference target with its "
+     "surveyed distance. Deviations above the tolerance require adjusting the range offset.",
+     "How is range accuracy verified?"),
+    ("Common sources of error include multipath reflections, temperature drift of the receiver, "
+     "mechanical misalignment of the antenna and timing jitter in the signal processor.",
+     "What are common sources of error?"),
+)
+
+# Greedy tokens generated per validation prompt
+VALIDATION_TOKENS = 32
+
+
+def model_nbytes(model: torch.nn.Module) -> int:
+    """
+    Memory held by a model's weights and buffers, counting shared tensors once
+
+    Includes the packed weights of dynamically quantized linear layers, which
+    are not parameters.
+
+    Args:
+        model: Model to measure
+
+    Returns:
+        Size in bytes
+    """
+    seen, total = set(), 0
+    for value in model.state_dict().values():
+        tensors = value if isinstance(value, tuple) else (value,)
+        for tensor in tensors:
+            if not isinstance(tensor, torch.Tensor) or tensor.data_ptr() in seen:
+                continue
+            seen.add(tensor.data_ptr())
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def convert_model(model: torch.nn.Module, precision: str) -> torch.nn.Module:
+    """
+    Convert a float32 CPU model to a lower precision
+
+    Args:
+        model: Model in float32
+        precision: 'fp32' (unchanged), 'bf16' (bfloat16 weights and activations)
+            or 'int8' (linear layers quantized to int8 with dynamically quantized activations)
+
+    Returns:
+        Converted model (converted in place where possible)
+    """
+    if precision not in CPU_PRECISIONS:
+        raise ValueError(f"precision must be one of {CPU_PRECISIONS}, got {precision!r}")
+
+    if precision == "bf16":
+        return model.to(torch.bfloat16)
+    if precision == "int8":
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def _greedy(
+    model: torch.nn.Module,
+    prompts: List[torch.Tensor],
+    max_new_tokens: int,
+    pad_token_id: int
+) -> Tuple[List[torch.Tensor], float]:
+    """Greedy answers to the prompts and the decoding speed in tokens/s"""
+    kwargs = dict(do_sample=False, pad_token_id=pad_token_id)
+    with torch.no_grad():
+        # Warm-up, so one-time setup does not count against either precision
+        model.generate(prompts[0], attention_mask=torch.ones_like(prompts[0]), max_new_tokens=2, **kwargs)
+
+        answers, start = [], time.perf_counter()
+        for input_ids in prompts:
+            # Fixed answer length so both precisions time the same amount of decoding
+            outputs = model.generate(
+                input_ids, attention_mask=torch.ones_like(input_ids),
+                max_new_tokens=max_new_tokens, min_new_tokens=max_new_tokens, **kwargs
+            )
+            answers.append(outputs[0, input_ids.shape[1]:])
+        elapsed = time.perf_counter() - start
+
+    return answers, sum(len(answer) for answer in answers) / elapsed
+
+
+def compare_precision(
+    model: torch.nn.Module,
+    tokenizer,
+    precision: str,
+    prompts: Sequence[str],
+    max_new_tokens: int = VALIDATION_TOKENS
+) -> Tuple[torch.nn.Module, Dict[str, Any]]:
+    """
+    Convert a float32 model and compare it against float32 on a fixed prompt set
+
+    Token agreement is measured with teacher forcing: the converted model
+    predicts each token of the float32 greedy answer from the float32 prefix,
+    so a single early divergence does not hide agreement on the rest.
+
+    Args:
+        model: Model in float32
+        tokenizer: Tokenizer of the model
+        precision: Target precision (see convert_model())
+        prompts: Validation prompts
+        max_new_tokens: Greedy tokens generated per prompt
+
+    Returns:
+        (converted model, dictionary with memory, tokens/s and agreement of both precisions)
+    """
+    encoded = [tokenizer(prompt, return_tensors="pt")['input_ids'] for prompt in prompts]
+    pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+
+    reference_bytes = model_nbytes(model)
+    reference, reference_speed = _greedy(model, encoded, max_new_tokens, pad_token_id)
+
+    model = convert_model(model, precision)
+    answers, speed = _greedy(model, encoded, max_new_tokens, pad_token_id)
+
+    agreeing = total = 0
+    with torch.no_grad():
+        for input_ids, expected in zip(encoded, reference):
+            sequence = torch.cat([input_ids[0], expected])[None]
+            logits = model(sequence, attention_mask=torch.ones_like(sequence)).logits
+            predicted = logits[0, input_ids.shape[1] - 1:-1].argmax(-1)
+            agreeing += int((predicted == expected).sum())
+            total += len(expected)
+
+    converted_bytes = model_nbytes(model)
+    return model, {
+        'precision': precision,
+        'num_prompts': len(prompts),
+        'reference_bytes': reference_bytes,
+        'bytes': converted_bytes,
+        'memory_ratio': converted_bytes / reference_bytes,
+        'reference_tokens_per_second': reference_speed,
+        'tokens_per_second': speed,
+        'speedup': speed / reference_speed,
+        'top1_agreement': agreeing / total,
+        'identical_answers': sum(torch.equal(a, b) for a, b in zip(answers, reference))
+    }
@@ -2,22 +2,37 @@
 Document Loader and Chunking Module
 Loads and chunks documents for RAG pipeline
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+
+# Characters read from a document at a time when streaming it
+READ_BUFFER_SIZE = 1 << 20
+
+PARAGRAPH_SEPARATOR = "\n\n"
+
+# Paragraphs tokenized per call in token mode
+PARAGRAPH_BATCH_SIZE = 1024
 
 
 class DocumentLoader:
     """Load and process markdown documents"""
 
-    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50, tokenizer=None):
         """
         Initialize document loader
 
         Args:
-            chunk_size: Maximum number of characters per chunk
-            chunk_overlap: Number of overlapping characters between chunks
+            chunk_size: Maximum number of characters per chunk (tokens with a tokenizer)
+            chunk_overlap: Number of overlapping characters between chunks (tokens with a tokenizer)
+            tokenizer: Fast HuggingFace tokenizer of the serving model; when given, chunks
+                are sized in its tokens and each chunk records its 'token_count'
         """
+        if tokenizer is not None and not getattr(tokenizer, "is_fast", False):
+            raise ValueError("Token-based chunking requires a fast (Rust-backed) tokenizer")
+
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.tokenizer = tokenizer
 
     def load_document(self, file_path: str) -> str:
         """
@@ -33,6 +48,24 @@ class DocumentLoader:
             content = f.read()
         return content
 
+    def iter_chunks(self, file_path: str, buffer_size: int = READ_BUFFER_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a document from disk and yield its chunks one at a time
+
+        Only the current read buffer and chunk are held in memory, so chunks
+        of large documents can be processed before the whole file is read.
+
+        Args:
+            file_path: Path to the document
+            buffer_size: Characters read at a time
+
+        Returns:
+            Iterator of chunks with metadata; char_start and char_end are
+            offsets into the whole document
+        """
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from self._chunk_pieces(iter(lambda: f.read(buffer_size), ""))
+
     def chunk_text(self, text: str) -> List[Dict[str, Any]]:
         """
         Split text into overlapping chunks
@@ -43,45 +76,160 @@ class DocumentLoader:
         Returns:
             List of chunks with metadata
         """
-        chunks = []
-        start = 0
+        return list(self._chunk_pieces([text]))
+
+    def _chunk_pieces(self, pieces: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Merge consecutive paragraphs of a document into overlapping chunks
+
+        Paragraphs and chunks are tracked as (start, end) offsets into the
+        document, which arrives as consecutive pieces of text. A chunk's text
+        is only sliced out when the chunk is emitted, and text before the
+        current chunk is dropped, so each character is copied a bounded
+        number of times and the work is linear in the document length.
+        """
+        # Document text from offset base on
+        window = ""
+        base = 0
+        # Where the next paragraph separator may start
+        scan = 0
+        para_start = 0
+        # Current chunk span; empty until it holds a non-empty paragraph
+        chunk_start = chunk_end = 0
+        # Token mode: (paragraph start, paragraph end, token count, first token) segments of the chunk
+        chunk_segments = []
+        chunk_tokens = 0
         chunk_id = 0
 
-        # Split by paragraphs first for better semantic boundaries
-        paragraphs = text.split('\n\n')
-        current_chunk = ""
+        def overlap_start() -> int:
+            """Start of the overlap carried into the next chunk (token mode)"""
+            nonlocal chunk_segments, chunk_tokens
+            if self.chunk_overlap >= chunk_tokens:
+                return chunk_start
+            if self.chunk_overlap == 0:
+                chunk_segments, chunk_tokens = [], 0
+                return chunk_end
+
+            # Keep the last chunk_overlap tokens, walking back over the segments
+            needed = self.chunk_overlap
+            kept = []
+            for segment_start, segment_end, count, first in reversed(chunk_segments):
+                if count - first >= needed:
+                    kept.append((segment_start, segment_end, count, count - needed))
+                    break
+                kept.append((segment_start, segment_end, count, first))
+                needed -= count - first
+            chunk_segments, chunk_tokens = kept[::-1], self.chunk_overlap
+
+            # Only the paragraph the overlap starts in is tokenized again, for its offsets
+            segment_start, segment_end, _, first = chunk_segments[0]
+            encoding = self.tokenizer.backend_tokenizer.encode(
+                window[segment_start - base:segment_end - base], add_special_tokens=False
+            )
+            return segment_start + encoding.offsets[first][0]
+
+        def add_paragraph(start: int, end: int, tokens: Optional[int]) -> Optional[Tuple[int, int]]:
+            """Extend the current chunk with a paragraph, returning the chunk it completes"""
+            nonlocal chunk_start, chunk_end, chunk_segments, chunk_tokens
+            length = chunk_end - chunk_start
+            if tokens is None:
+                full = length and length + (end - start) > self.chunk_size
+            else:
+                full = length and chunk_tokens + tokens > self.chunk_size
 
-        for para in paragraphs:
             # If adding this paragraph exceeds chunk size, save current chunk
-            if len(current_chunk) + len(para) > self.chunk_size and current_chunk:
+            if full:
+                completed = (chunk_start, chunk_end)
+                # Create overlap
+                if tokens is None:
+                    chunk_start += max(0, length - self.chunk_overlap)
+                else:
+                    chunk_start = overlap_start()
+                chunk_end = end
+            elif length:
+                completed = None
+                chunk_end = end
+            else:
+                # Empty paragraphs before the chunk are skipped
+                completed = None
+                chunk_start, chunk_end = start, end
+                chunk_segments, chunk_tokens = [], 0
+
+            if tokens is not None:
+                chunk_segments.append((start, end, tokens, 0))
+                chunk_tokens += tokens
+            return completed
+
+        def make_chunks(spans: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+            """Slice out the text of completed chunks"""
+            nonlocal chunk_id
+            chunks = []
+            for span_start, span_end in spans:
                 chunks.append({
                     'id': chunk_id,
-                    'text': current_chunk.strip(),
-                    'char_start': start,
-                    'char_end': start + len(current_chunk)
+                    'text': window[span_start - base:span_end - base].strip(),
+                    'char_start': span_start,
+                    'char_end': span_end
                 })
-
-                # Create overlap
-                overlap_start = max(0, len(current_chunk) - self.chunk_overlap)
-                current_chunk = current_chunk[overlap_start:] + "\n\n" + para
-                start += overlap_start
                 chunk_id += 1
+
+            if self.tokenizer is not None and chunks:
+                # Exact counts of the stripped texts, separators included
+                counts = self._count_tokens([chunk['text'] for chunk in chunks])
+                for chunk, count in zip(chunks, counts):
+                    chunk['token_count'] = count
+            return chunks
+
+        def add_paragraphs(spans: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+            """Add a batch of paragraphs, returning the chunks they complete"""
+            if self.tokenizer is None:
+                counts = [None] * len(spans)
             else:
-                if current_chunk:
-                    current_chunk += "\n\n" + para
-                else:
-                    current_chunk = para
+                counts = self._count_tokens([window[start - base:end - base] for start, end in spans])
+            completed = [add_paragraph(start, end, count) for (start, end), count in zip(spans, counts)]
+            return make_chunks([span for span in completed if span])
+
+        for piece in pieces:
+            window += piece
+
+            # Split by paragraphs first for better semantic boundaries
+            spans = []
+            while True:
+                found = window.find(PARAGRAPH_SEPARATOR, scan - base)
+                if found < 0:
+                    break
+                spans.append((para_start, base + found))
+                para_start = scan = base + found + len(PARAGRAPH_SEPARATOR)
+                if len(spans) == PARAGRAPH_BATCH_SIZE:
+                    yield from add_paragraphs(spans)
+                    spans = []
+            yield from add_paragraphs(spans)
+
+            # A separator may straddle this piece and the next
+            scan = max(scan, base + len(window) - len(PARAGRAPH_SEPARATOR) + 1)
+
+            # Later chunks never reach back before the current one
+            keep = chunk_start if chunk_end > chunk_start else para_start
+            if chunk_segments:
+                # The overlap may start inside a paragraph that is tokenized again
+                keep = min(keep, chunk_segments[0][0])
+            if keep > base:
+                window = window[keep - base:]
+                base = keep
+
+        # The text after the last separator is the last paragraph
+        yield from add_paragraphs([(para_start, base + len(window))])
 
         # Add the last chunk
-        if current_chunk:
-            chunks.append({
-                'id': chunk_id,
-                'text': current_chunk.strip(),
-                'char_start': start,
-                'char_end': start + len(current_chunk)
-            })
+        if chunk_end > chunk_start:
+            yield from make_chunks([(chunk_start, chunk_end)])
 
-        return chunks
+    def _count_tokens(self, texts: List[str]) -> List[int]:
+        """Count tokens of texts in one batched call to the Rust tokenizer, without special tokens"""
+        backend = self.tokenizer.backend_tokenizer
+        # encode_batch_fast skips computing offsets (tokenizers >= 0.21)
+        encode_batch = getattr(backend, "encode_batch_fast", backend.encode_batch)
+        return [len(encoding) for encoding in encode_batch(texts, add_special_tokens=False)]
 
     def load_and_chunk(self, file_path: str) -> List[Dict[str, Any]]:
         """
@@ -93,9 +241,7 @@ class DocumentLoader:
         Returns:
             List of chunks with metadata
         """
-        content = self.load_document(file_path)
-        chunks = self.chunk_text(content)
-        return chunks
+        return list(self.iter_chunks(file_path))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+"""
+Embedding Batching Module
+Length-bucketed batches under a token budget for the embedding model
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+
+# Padded tokens per batch (32 texts of 512 tokens)
+DEFAULT_TOKEN_BUDGET = 16384
+
+# Fixed batch size that padding efficiency is compared against (encode's default)
+FIXED_BATCH_SIZE = 32
+
+# Characters per token of typical English text, for tokenizers without a Rust backend
+CHARS_PER_TOKEN = 4
+
+# Special tokens added around each text (e.g. [CLS] and [SEP]) when the tokenizer does not say
+SPECIAL_TOKENS = 2
+
+# Tokenizers without a length limit report a huge sentinel value instead
+MAX_SEQUENCE_LIMIT = 1_000_000
+
+
+def token_lengths(model, texts: Sequence[str]) -> np.ndarray:
+    """
+    Number of tokens the model sees for each text, after truncation
+
+    Counted in one batched call to the Rust tokenizer without offsets or
+    padding, so the token budget holds for CJK, code and numeric text too.
+    Tokenizers without a Rust backend fall back to an estimate of
+    CHARS_PER_TOKEN characters per token.
+
+    Args:
+        model: SentenceTransformer model
+        texts: Texts to measure
+
+    Returns:
+        Integer array of token counts
+    """
+    tokenizer = model.tokenizer
+    backend = getattr(tokenizer, 'backend_tokenizer', None)
+    if backend is not None:
+        # encode_batch_fast skips computing offsets (tokenizers >= 0.21)
+        encode_batch = getattr(backend, 'encode_batch_fast', None) or backend.encode_batch
+        encodings = encode_batch(list(texts), add_special_tokens=False)
+        lengths = np.fromiter((len(encoding) for encoding in encodings), dtype=np.int64, count=len(texts))
+    else:
+        characters = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        lengths = -(-characters // CHARS_PER_TOKEN)
+
+    num_special_tokens = getattr(tokenizer, 'num_special_tokens_to_add', None)
+    lengths += num_special_tokens() if num_special_tokens is not None else SPECIAL_TOKENS
+
+    limit = getattr(model, 'max_seq_length', None) or getattr(model.tokenizer, 'model_max_length', None)
+    if limit is not None and limit < MAX_SEQUENCE_LIMIT:
+        lengths = np.minimum(lengths, limit)
+    return lengths
+
+
+def token_budget_batches(lengths: np.ndarray, token_budget: int) -> List[np.ndarray]:
+    """
+    Group texts of similar length into batches whose padded size fits the budget
+
+    Texts are sorted by length, so each batch is padded only to its own
+    longest text. A text longer than the budget gets a batch of its own.
+
+    Args:
+        lengths: Token count of each text
+        token_budget: Maximum padded tokens (batch size x longest text) per batch
+
+    Returns:
+        List of arrays of text positions, one per batch
+    """
+    order = np.argsort(lengths, kind='stable')
+    batches = []
+    start = 0
+    for end in range(1, len(order) + 1):
+        # Lengths are ascending, so the newest text is the longest of the batch
+        if end < len(order) and (end + 1 - start) * lengths[order[end]] <= token_budget:
+            continue
+        batches.append(order[start:end])
+        start = end
+    return batches
+
+
+def padding_efficiency(lengths: np.ndarray, batches: List[np.ndarray]) -> float:
+    """
+    Fraction of computed tokens that are real tokens rather than padding
+
+    Args:
+        lengths: Token count of each text
+        batches: Batches of text positions
+
+    Returns:
+        Real tokens divided by padded tokens (1.0 means no padding)
+    """
+    padded = sum(len(batch) * int(lengths[batch].max()) for batch in batches if len(batch))
+    return float(lengths.sum()) / padded if padded else 1.0
+
+
+def encode_in_token_batches(
+    model,
+    texts: Sequence[str],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    show_progress_bar: bool = False
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Encode texts in length-bucketed batches and restore their original order
+
+    Args:
+        model: SentenceTransformer model
+        texts: Texts to encode
+        token_budget: Maximum padded tokens per batch
+        show_progress_bar: Show a progress bar over batches
+
+    Returns:
+        (embeddings, stats) where stats reports batch count and padding efficiency
+        compared with fixed batches of FIXED_BATCH_SIZE in the original order
+    """
+    lengths = token_lengths(model, texts)
+    batches = token_budget_batches(lengths, token_budget)
+    fixed_batches = [np.arange(start, min(start + FIXED_BATCH_SIZE, len(texts)))
+                     for start in range(0, len(texts), FIXED_BATCH_SIZE)]
+
+    embeddings = np.zeros((len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32)
+    for batch in tqdm(batches, desc="Batches", disable=not show_progress_bar):
+        embeddings[batch] = model.encode(
+            [texts[i] for i in batch], batch_size=len(batch), show_progress_bar=False, convert_to_numpy=True
+        )
+
+    stats = {
+        'num_texts': len(texts),
+        'num_batches': len(batches),
+        'real_tokens': int(lengths.sum()),
+        'padded_tokens': sum(len(batch) * int(lengths[batch].max()) for batch in batches),
+        'padding_efficiency': padding_efficiency(lengths, batches),
+        'fixed_batch_padding_efficiency': padding_efficiency(lengths, fixed_batches)
+    }
+    return embeddings, stats
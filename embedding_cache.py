@@ -0,0 +1,307 @@
+"""
+Embedding Cache Module
+Persistent, content-addressed cache of chunk embeddings backed by a memory-mapped array
+"""
+import hashlib
+import json
+import os
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """On-disk cache mapping (embedding model, chunk text hash) to an embedding vector"""
+
+    KEY_BYTES = 16
+    COMPACT_BLOCK_ROWS = 65536
+
+    def __init__(
+        self,
+        cache_dir: str,
+        model_name: str,
+        max_entries: int = 1_000_000,
+        initial_capacity: int = 1024
+    ):
+        """
+        Open (or create) the cache for one embedding model
+
+        Args:
+            cache_dir: Root directory of the cache
+            model_name: Name of the embedding model the vectors come from
+            max_entries: Maximum number of cached vectors before LRU eviction
+            initial_capacity: Number of rows allocated when the vector file is created
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.initial_capacity = initial_capacity
+
+        # One sub-directory per model so vectors of different sizes never mix
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+        self.path = os.path.join(cache_dir, safe_name)
+        os.makedirs(self.path, exist_ok=True)
+
+        self.dimension: Optional[int] = None
+        self.capacity = 0
+        self.size = 0
+        self.clock = 0
+        # Compaction writes the next generation of files and switches meta.json to it last
+        self.generation = 0
+        self.vectors: Optional[np.memmap] = None
+        self.keys = np.zeros(0, dtype=f'S{self.KEY_BYTES}')
+        self.last_used = np.zeros(0, dtype=np.int64)
+        self.rows = {}
+
+        self._load()
+
+    def _file(self, name: str, generation: Optional[int] = None) -> str:
+        """Path of a cache file of a generation (the current one by default)"""
+        generation = self.generation if generation is None else generation
+        if generation:
+            stem, extension = os.path.splitext(name)
+            name = f"{stem}.{generation}{extension}"
+        return os.path.join(self.path, name)
+
+    @property
+    def _vectors_file(self) -> str:
+        return self._file("vectors.f32")
+
+    def _load(self):
+        """Load cache metadata and map the vector file if it exists"""
+        meta_file = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_file):
+            return
+
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        self.dimension = meta['dimension']
+        self.capacity = meta['capacity']
+        self.size = meta['size']
+        self.clock = meta['clock']
+        self.generation = meta.get('generation', 0)
+
+        self.keys = np.load(self._file("keys.npy"))[:self.size]
+        self.last_used = np.load(self._file("last_used.npy"))[:self.size]
+        self.vectors = np.memmap(
+            self._vectors_file, dtype=np.float32, mode='r+',
+            shape=(self.capacity, self.dimension)
+        )
+        self.rows = {key: row for row, key in enumerate(self.keys.tolist())}
+
+    def key(self, text: str) -> bytes:
+        """
+        Content address of a chunk text for this cache's model
+
+        Args:
+            text: Chunk text
+
+        Returns:
+            Fixed-size digest of (model name, text)
+        """
+        digest = hashlib.blake2b(digest_size=self.KEY_BYTES)
+        digest.update(self.model_name.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8'))
+        return digest.digest()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def lookup(self, texts: List[str]) -> Tuple[Optional[np.ndarray], List[int]]:
+        """
+        Look up cached embeddings for a list of texts
+
+        Args:
+            texts: Chunk texts
+
+        Returns:
+            (embeddings, misses) where embeddings has one row per text (rows for
+            misses are left as zeros, None if the cache is still empty) and misses
+            lists the positions of texts that must be encoded
+        """
+        if self.dimension is None or self.size == 0:
+            return None, list(range(len(texts)))
+
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        hit_positions, hit_rows, misses = [], [], []
+        for position, text in enumerate(texts):
+            row = self.rows.get(self.key(text))
+            if row is None:
+                misses.append(position)
+            else:
+                hit_positions.append(position)
+                hit_rows.append(row)
+
+        if hit_rows:
+            hit_rows = np.asarray(hit_rows, dtype=np.int64)
+            embeddings[hit_positions] = self.vectors[hit_rows]
+            self.clock += 1
+            self.last_used[hit_rows] = self.clock
+
+        return embeddings, misses
+
+    def put(self, texts: List[str], embeddings: np.ndarray):
+        """
+        Store embeddings for texts, evicting least recently used entries if needed
+
+        Args:
+            texts: Chunk texts
+            embeddings: Array of shape (len(texts), dimension)
+        """
+        if len(texts) == 0:
+            return
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.dimension is None:
+            self.dimension = embeddings.shape[1]
+        elif embeddings.shape[1] != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {embeddings.shape[1]} does not match cache dimension {self.dimension}"
+            )
+
+        # Deduplicate within the batch and skip texts that are already cached
+        new_keys, new_rows = [], []
+        seen = set()
+        for i, text in enumerate(texts):
+            key = self.key(text)
+            if key in self.rows or key in seen:
+                continue
+            seen.add(key)
+            new_keys.append(key)
+            new_rows.append(i)
+
+        if not new_keys:
+            return
+
+        # Never try to hold more than max_entries
+        if len(new_keys) > self.max_entries:
+            new_keys = new_keys[-self.max_entries:]
+            new_rows = new_rows[-self.max_entries:]
+
+        overflow = self.size + len(new_keys) - self.max_entries
+        if overflow > 0:
+            self.evict(overflow)
+
+        self._reserve(self.size + len(new_keys))
+
+        start, end = self.size, self.size + len(new_keys)
+        self.clock += 1
+        self.vectors[start:end] = embeddings[new_rows]
+        self.keys = np.concatenate([self.keys, np.array(new_keys, dtype=self.keys.dtype)])
+        self.last_used = np.concatenate([self.last_used, np.full(len(new_keys), self.clock, dtype=np.int64)])
+        for offset, key in enumerate(new_keys):
+            self.rows[key] = start + offset
+        self.size = end
+
+    def _reserve(self, rows: int):
+        """Grow the vector file so it can hold at least `rows` rows"""
+        if rows <= self.capacity:
+            return
+
+        new_capacity = max(self.initial_capacity, self.capacity)
+        while new_capacity < rows:
+            new_capacity *= 2
+
+        if self.vectors is not None:
+            self.vectors.flush()
+            del self.vectors
+
+        with open(self._vectors_file, 'ab') as f:
+            f.truncate(new_capacity * self.dimension * 4)
+
+        self.capacity = new_capacity
+        self.vectors = np.memmap(
+            self._vectors_file, dtype=np.float32, mode='r+',
+            shape=(self.capacity, self.dimension)
+        )
+
+    def evict(self, count: int):
+        """
+        Drop the `count` least recently used entries and compact the vector file
+
+        Args:
+            count: Number of entries to evict
+        """
+        if count <= 0 or self.size == 0:
+            return
+
+        count = min(count, self.size)
+        # Stable sort keeps insertion order among entries with the same timestamp
+        keep = np.sort(np.argsort(self.last_used, kind='stable')[count:])
+        self.compact(keep)
+
+    def compact(self, keep: Optional[np.ndarray] = None):
+        """
+        Rewrite the cache so live entries are contiguous and the file is trimmed
+
+        Args:
+            keep: Rows to keep (defaults to all live rows)
+        """
+        if self.dimension is None:
+            return
+
+        if keep is None:
+            keep = np.arange(self.size)
+
+        # Copy live rows into the next generation's file block by block to keep memory bounded;
+        # the current files stay valid until meta.json points at the new ones
+        previous = self.generation
+        self.generation += 1
+        new_capacity = max(self.initial_capacity, len(keep))
+        compacted = np.memmap(self._vectors_file, dtype=np.float32, mode='w+', shape=(new_capacity, self.dimension))
+        for start in range(0, len(keep), self.COMPACT_BLOCK_ROWS):
+            block = keep[start:start + self.COMPACT_BLOCK_ROWS]
+            compacted[start:start + len(block)] = self.vectors[block]
+        compacted.flush()
+        del compacted
+
+        del self.vectors
+        self.vectors = None
+
+        self.keys = self.keys[keep]
+        self.last_used = self.last_used[keep]
+        self.size = len(keep)
+        self.rows = {key: row for row, key in enumerate(self.keys.tolist())}
+
+        self.capacity = new_capacity
+        self.vectors = np.memmap(
+            self._vectors_file, dtype=np.float32, mode='r+',
+            shape=(self.capacity, self.dimension)
+        )
+        self.flush()
+
+        for name in ("vectors.f32", "keys.npy", "last_used.npy"):
+            try:
+                os.remove(self._file(name, previous))
+            except FileNotFoundError:
+                pass
+
+    def flush(self):
+        """Persist vectors and metadata to disk"""
+        if self.dimension is None:
+            return
+
+        if self.vectors is not None:
+            self.vectors.flush()
+
+        for name, array in (("keys.npy", self.keys), ("last_used.npy", self.last_used)):
+            path = self._file(name)
+            with open(path + ".tmp", 'wb') as f:
+                np.save(f, array)
+            os.replace(path + ".tmp", path)
+
+        # Written last: it decides which generation of files is read back
+        meta = {
+            'model_name': self.model_name,
+            'dimension': self.dimension,
+            'capacity': self.capacity,
+            'size': self.size,
+            'clock': self.clock,
+            'generation': self.generation
+        }
+        tmp_file = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_file, os.path.join(self.path, "meta.json"))
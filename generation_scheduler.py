@@ -0,0 +1,478 @@
+"""
+Generation Scheduler Module
+Decodes concurrent generation requests together in one continuously refilled batch
+"""
+import inspect
+import queue
+import threading
+from typing import Iterable, List, Optional, Tuple, Union
+
+import torch
+import torch.nn.functional as F
+from transformers import DynamicCache
+
+
+# Sequences decoded together at most
+DEFAULT_MAX_BATCH_SIZE = 8
+
+# Per layer (keys, values), shaped (batch, heads, length, head_dim)
+KVLayers = List[Tuple[torch.Tensor, torch.Tensor]]
+
+
+def cache_layers(cache: DynamicCache) -> KVLayers:
+    """(keys, values) of each layer of a cache, shaped (batch, heads, length, head_dim)"""
+    if hasattr(cache, 'layers'):
+        return [(layer.keys, layer.values) for layer in cache.layers]
+    return list(zip(cache.key_cache, cache.value_cache))
+
+
+def build_cache(layers: Iterable[Tuple[torch.Tensor, torch.Tensor]]) -> DynamicCache:
+    """Cache holding the given (keys, values) per layer"""
+    cache = DynamicCache()
+    for layer_idx, (keys, values) in enumerate(layers):
+        cache.update(keys, values, layer_idx)
+    return cache
+
+
+def concat_batches(batches: List[Tuple[KVLayers, torch.Tensor]]) -> Tuple[KVLayers, torch.Tensor]:
+    """
+    Stack batches of key/values and attention masks, left-padding them to one length
+
+    Args:
+        batches: (per layer (keys, values), attention mask) of each batch
+
+    Returns:
+        Combined per layer (keys, values) and attention mask
+    """
+    if len(batches) == 1:
+        return batches[0]
+
+    length = max(mask.shape[1] for _, mask in batches)
+    pads = [length - mask.shape[1] for _, mask in batches]
+    layers = []
+    for layer_idx in range(len(batches[0][0])):
+        layers.append(tuple(
+            torch.cat([F.pad(batch[layer_idx][part], (0, 0, pad, 0)) for (batch, _), pad in zip(batches, pads)])
+            for part in (0, 1)
+        ))
+    attention_mask = torch.cat([F.pad(mask, (pad, 0)) for (_, mask), pad in zip(batches, pads)])
+    return layers, attention_mask
+
+
+class GenerationRequest:
+    """One prompt being generated by the scheduler, with its own sampling parameters"""
+
+    def __init__(
+        self,
+        input_ids: torch.Tensor,
+        max_new_tokens: int,
+        temperature: float,
+        do_sample: bool,
+        top_p: float,
+        top_k: int,
+        repetition_penalty: float,
+        eos_token_id: Optional[Union[int, List[int]]],
+        pad_token_id: Optional[int],
+        streamer=None,
+        stop_event: Optional[threading.Event] = None,
+        prefix_layers: Optional[KVLayers] = None,
+        return_prompt_layers: bool = False
+    ):
+        self.input_ids = input_ids
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.do_sample = do_sample
+        self.top_p = top_p
+        self.top_k = top_k
+        self.repetition_penalty = repetition_penalty
+        if eos_token_id is None:
+            eos_token_id = []
+        self.eos_token_ids = {eos_token_id} if isinstance(eos_token_id, int) else set(eos_token_id)
+        self.pad_token_id = pad_token_id
+        self.streamer = streamer
+        self.stop_event = stop_event
+        self.prefix_layers = prefix_layers
+        self.return_prompt_layers = return_prompt_layers
+        # Key/values of the whole prompt, kept after prefill if requested
+        self.prompt_layers: Optional[KVLayers] = None
+
+        # Prompt and generated tokens, for the repetition penalty
+        self.token_ids = input_ids
+        self.tokens: List[int] = []
+        self.error: Optional[Exception] = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        """Whether generation has ended"""
+        return self._done.is_set()
+
+    def result(self, timeout: Optional[float] = None) -> torch.Tensor:
+        """
+        Wait for the request to finish
+
+        Args:
+            timeout: Seconds to wait (None waits indefinitely)
+
+        Returns:
+            Generated token ids (without the prompt)
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError("Generation request did not finish in time")
+        if self.error is not None:
+            raise self.error
+        return torch.tensor(self.tokens, dtype=torch.long)
+
+    def _append(self, token: int) -> bool:
+        """Record a generated token and return whether the request is complete"""
+        self.tokens.append(token)
+        self.token_ids = torch.cat([self.token_ids, self.token_ids.new_tensor([token])])
+        if self.streamer is not None:
+            self.streamer.put(torch.tensor([token]))
+        return (
+            token in self.eos_token_ids
+            or len(self.tokens) >= self.max_new_tokens
+            or self._stopped()
+        )
+
+    def _stopped(self) -> bool:
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def _finish(self, error: Optional[Exception] = None):
+        self.error = error
+        if error is None and self.streamer is not None:
+            self.streamer.end()
+        self._done.set()
+
+
+class GenerationScheduler:
+    """
+    Continuous batching for a causal LM
+
+    A background thread keeps one batch of sequences decoding together. New
+    prompts are prefilled and join the batch between decoding steps, and
+    finished sequences leave it at once, so short answers never wait for
+    long ones. The batch's key/value cache is left-padded to a common length.
+    """
+
+    def __init__(self, model, device: Union[str, torch.device], max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        """
+        Initialize the scheduler (the decoding thread starts with the first request)
+
+        Args:
+            model: Causal LM; only the scheduler thread calls it
+            device: Device of the model's input embeddings
+            max_batch_size: Sequences decoded together at most
+        """
+        self.model = model
+        self.device = device
+        self.max_batch_size = max_batch_size
+
+        # Only compute logits for the last prompt position during prefill
+        parameters = inspect.signature(model.forward).parameters
+        self._logits_kwargs = {}
+        for name in ('logits_to_keep', 'num_logits_to_keep'):
+            if name in parameters:
+                self._logits_kwargs = {name: 1}
+                break
+
+        self._queue: "queue.Queue[Optional[GenerationRequest]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Batch state, owned by the scheduler thread
+        self._active: List[GenerationRequest] = []
+        self._cache: Optional[DynamicCache] = None
+        self._attention_mask: Optional[torch.Tensor] = None
+        self._next_tokens: Optional[torch.Tensor] = None
+
+    def submit(
+        self,
+        input_ids: torch.Tensor,
+        max_new_tokens: int = 256,
+        temperature: float = 1.0,
+        do_sample: bool = True,
+        top_p: float = 1.0,
+        top_k: int = 0,
+        repetition_penalty: float = 1.0,
+        eos_token_id: Optional[Union[int, List[int]]] = None,
+        pad_token_id: Optional[int] = None,
+        streamer=None,
+        stop_event: Optional[threading.Event] = None,
+        prefix_layers: Optional[KVLayers] = None,
+        return_prompt_layers: bool = False
+    ) -> GenerationRequest:
+        """
+        Queue a prompt for generation
+
+        Sampling parameters have the same meaning as in model.generate().
+
+        Args:
+            input_ids: Prompt token ids, shaped (length,) or (1, length)
+            max_new_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            do_sample: Sample instead of picking the most likely token
+            top_p: Nucleus sampling probability mass
+            top_k: Sample from the k most likely tokens (0 disables)
+            repetition_penalty: Penalty for tokens already in the prompt or answer
+            eos_token_id: Token id(s) that end the answer
+            pad_token_id: Token id used to pad prompts
+            streamer: Receives the prompt and then each new token, like a generate() streamer
+            stop_event: Ends generation early once set
+            prefix_layers: Cached key/values of the prompt's first tokens, which then skip prefill
+            return_prompt_layers: Keep the prompt's key/values in the request's prompt_layers
+
+        Returns:
+            GenerationRequest to wait on
+        """
+        input_ids = input_ids.reshape(-1).to(self.device)
+        request = GenerationRequest(
+            input_ids, max_new_tokens, temperature, do_sample, top_p, top_k,
+            repetition_penalty, eos_token_id, pad_token_id, streamer, stop_event,
+            prefix_layers, return_prompt_layers
+        )
+        if streamer is not None:
+            streamer.put(input_ids.cpu())
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Generation scheduler is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="generation-scheduler", daemon=True)
+                self._thread.start()
+            self._queue.put(request)
+
+        return request
+
+    def generate(self, input_ids: torch.Tensor, **kwargs) -> torch.Tensor:
+        """
+        Generate an answer for one prompt, blocking until it is complete
+
+        Args:
+            input_ids: Prompt token ids
+            **kwargs: Sampling parameters accepted by submit()
+
+        Returns:
+            Generated token ids (without the prompt)
+        """
+        return self.submit(input_ids, **kwargs).result()
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Finish the queued requests and stop the decoding thread
+
+        Args:
+            timeout: Seconds to wait for the thread (None waits indefinitely)
+        """
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+            self._queue.put(None)
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self):
+        """Admit, prefill and decode until closed"""
+        closing = False
+        while not (closing and not self._active):
+            # Block for work only while nothing is decoding
+            admitted = []
+            while len(self._active) + len(admitted) < self.max_batch_size and not closing:
+                try:
+                    request = self._queue.get(block=not self._active and not admitted)
+                except queue.Empty:
+                    break
+                if request is None:
+                    closing = True
+                elif request._stopped():
+                    request._finish()
+                else:
+                    admitted.append(request)
+
+            try:
+                if admitted:
+                    self._admit(admitted)
+                if self._active:
+                    self._step()
+            except Exception as e:
+                # A failed forward pass leaves the batch cache unusable
+                for request in self._active + admitted:
+                    if not request.finished:
+                        request._finish(e)
+                self._reset()
+
+    def _reset(self):
+        self._active = []
+        self._cache = None
+        self._attention_mask = None
+        self._next_tokens = None
+
+    def _prefill(
+        self, requests: List[GenerationRequest], prefix_layers: Optional[KVLayers] = None
+    ) -> Tuple[KVLayers, torch.Tensor, torch.Tensor]:
+        """
+        Run prompts through the model
+
+        Several prompts are left-padded into one batch; a single prompt can
+        start from the cached key/values of its first tokens.
+
+        Returns:
+            Per layer (keys, values), attention mask and last-position logits
+        """
+        if prefix_layers is None:
+            length = max(len(request.input_ids) for request in requests)
+            input_ids = torch.stack([
+                F.pad(request.input_ids, (length - len(request.input_ids), 0), value=request.pad_token_id or 0)
+                for request in requests
+            ])
+            attention_mask = torch.stack([
+                F.pad(torch.ones_like(request.input_ids), (length - len(request.input_ids), 0))
+                for request in requests
+            ])
+            position_ids = (attention_mask.cumsum(-1) - 1).clamp(min=0)
+            cache = DynamicCache()
+        else:
+            prompt = requests[0].input_ids
+            prefix_length = prefix_layers[0][0].shape[2]
+            input_ids = prompt[None, prefix_length:]
+            attention_mask = torch.ones_like(prompt)[None]
+            position_ids = torch.arange(prefix_length, len(prompt), device=prompt.device)[None]
+            cache = build_cache(prefix_layers)
+
+        outputs = self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=cache,
+            use_cache=True,
+            **self._logits_kwargs
+        )
+        layers = cache_layers(outputs.past_key_values)
+
+        for i, request in enumerate(requests):
+            if request.return_prompt_layers:
+                length = len(request.input_ids)
+                request.prompt_layers = [
+                    (keys[i:i + 1, :, -length:].clone(), values[i:i + 1, :, -length:].clone())
+                    for keys, values in layers
+                ]
+
+        return layers, attention_mask, outputs.logits[:, -1, :].float()
+
+    @torch.no_grad()
+    def _admit(self, requests: List[GenerationRequest]):
+        """Prefill new prompts and merge them into the decoding batch"""
+        # Prompts without a cached prefix are prefilled together, the others one by one
+        fresh = [request for request in requests if request.prefix_layers is None]
+        groups = [(fresh, self._prefill(fresh))] if fresh else []
+        for request in requests:
+            if request.prefix_layers is not None:
+                groups.append(([request], self._prefill([request], request.prefix_layers)))
+                request.prefix_layers = None
+
+        requests = [request for group, _ in groups for request in group]
+        layers, attention_mask = concat_batches([(layers, mask) for _, (layers, mask, _) in groups])
+        next_tokens = self._sample(requests, torch.cat([logits for _, (_, _, logits) in groups]))
+
+        # Requests can be complete after their first token
+        keep = [i for i, request in enumerate(requests) if not self._complete(request, int(next_tokens[i]))]
+        if not keep:
+            return
+
+        if len(keep) < len(requests):
+            index = torch.tensor(keep, device=attention_mask.device)
+            layers = [(keys[index], values[index]) for keys, values in layers]
+            attention_mask, next_tokens = attention_mask[index], next_tokens[index]
+        requests = [requests[i] for i in keep]
+
+        if self._active:
+            layers, attention_mask = concat_batches([
+                (cache_layers(self._cache), self._attention_mask), (layers, attention_mask)
+            ])
+            next_tokens = torch.cat([self._next_tokens, next_tokens])
+            requests = self._active + requests
+
+        self._active = requests
+        self._cache = build_cache(layers)
+        self._attention_mask = attention_mask
+        self._next_tokens = next_tokens
+
+    @torch.no_grad()
+    def _step(self):
+        """Decode one token for every sequence in the batch and retire finished ones"""
+        attention_mask = F.pad(self._attention_mask, (0, 1), value=1)
+        outputs = self.model(
+            input_ids=self._next_tokens[:, None],
+            attention_mask=attention_mask,
+            position_ids=attention_mask.sum(-1, keepdim=True) - 1,
+            past_key_values=self._cache,
+            use_cache=True
+        )
+        self._cache = outputs.past_key_values
+        self._attention_mask = attention_mask
+        self._next_tokens = self._sample(self._active, outputs.logits[:, -1, :].float())
+
+        keep = [
+            i for i, request in enumerate(self._active)
+            if not self._complete(request, int(self._next_tokens[i]))
+        ]
+        if len(keep) == len(self._active):
+            return
+        if not keep:
+            self._reset()
+            return
+
+        # Drop finished rows and the left padding no remaining row needs
+        index = torch.tensor(keep, device=attention_mask.device)
+        attention_mask = attention_mask[index]
+        start = int(attention_mask.any(0).long().argmax())
+        self._cache = build_cache(
+            (keys[index, :, start:], values[index, :, start:]) for keys, values in cache_layers(self._cache)
+        )
+        self._attention_mask = attention_mask[:, start:]
+        self._next_tokens = self._next_tokens[index]
+        self._active = [self._active[i] for i in keep]
+
+    def _complete(self, request: GenerationRequest, token: int) -> bool:
+        """Hand a new token to its request; finish the request if it is done"""
+        if request._append(token):
+            request._finish()
+            return True
+        return False
+
+    def _sample(self, requests: List[GenerationRequest], logits: torch.Tensor) -> torch.Tensor:
+        """Pick the next token of each row with its request's parameters, in generate()'s order"""
+        for i, request in enumerate(requests):
+            if request.repetition_penalty != 1.0:
+                scores = logits[i].gather(0, request.token_ids)
+                scores = torch.where(
+                    scores < 0, scores * request.repetition_penalty, scores / request.repetition_penalty
+                )
+                logits[i].scatter_(0, request.token_ids, scores)
+
+        greedy = logits.argmax(-1)
+        sampled = [i for i, request in enumerate(requests) if request.do_sample]
+        if not sampled:
+            return greedy
+
+        rows = torch.tensor(sampled, device=logits.device)
+        scores = logits[rows] / torch.tensor(
+            [[requests[i].temperature] for i in sampled], dtype=logits.dtype, device=logits.device
+        )
+
+        # Top-k, then top-p over what is left; the most likely token always stays.
+        # Only the largest k is ever needed, so avoid sorting the whole vocabulary.
+        vocab_size = scores.shape[-1]
+        top_k = [min(requests[i].top_k, vocab_size) or vocab_size for i in sampled]
+        scores, order = scores.topk(max(top_k), dim=-1)
+        ranks = torch.arange(scores.shape[-1], device=logits.device)
+        scores = scores.masked_fill(ranks >= torch.tensor(top_k, device=logits.device)[:, None], float('-inf'))
+        probs = scores.softmax(-1)
+        top_p = torch.tensor([[requests[i].top_p] for i in sampled], dtype=probs.dtype, device=logits.device)
+        remove = (probs.cumsum(-1) - probs >= top_p) & (ranks > 0)
+        probs = scores.masked_fill(remove, float('-inf')).softmax(-1)
+
+        choice = torch.multinomial(probs, 1)
+        greedy[rows] = order.gather(-1, choice).squeeze(-1)
+        return greedy
@@ -96,7 +96,7 @@ class MLflowExperimentTracker:
             mlflow.log_metric("index_time_seconds", index_time)
 
             # Get index stats
-            num_chunks = len(pipeline.vector_store.chunks)
+            num_chunks = pipeline.vector_store.num_chunks
             mlflow.log_metric("num_chunks", num_chunks)
 
             # Run queries and collect metrics
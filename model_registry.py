@@ -0,0 +1,149 @@
+"""
+Model Registry Module
+Process-wide registry of embedding models shared by all vector stores
+"""
+import gc
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import torch
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+
+# 'torch' runs the model in PyTorch; 'onnx-int8' runs a dynamically int8-quantized
+# ONNX export through ONNX Runtime (CPU only, needs optimum[onnxruntime])
+EMBEDDING_BACKENDS = ("torch", "onnx-int8")
+
+# ONNX Runtime quantization presets supported by sentence-transformers
+ONNX_QUANTIZATIONS = ("avx512_vnni", "avx512", "avx2", "arm64")
+
+DEFAULT_ONNX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "offline-rag", "onnx")
+
+
+def model_key(model_name: str, backend: str = "torch") -> str:
+    """
+    Identifier of a model and backend, used to keep their embeddings apart in caches
+
+    Args:
+        model_name: Name or path of the sentence transformer model
+        backend: Embedding backend
+
+    Returns:
+        The model name for the torch backend, 'model_name@backend' otherwise
+    """
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+class EmbeddingModelRegistry:
+    """Loads each SentenceTransformer model once and hands out the shared instance"""
+
+    def __init__(self, onnx_dir: str = DEFAULT_ONNX_DIR, onnx_quantization: str = "avx512_vnni"):
+        """
+        Initialize an empty registry
+
+        Args:
+            onnx_dir: Directory holding quantized ONNX exports
+            onnx_quantization: ONNX Runtime quantization preset used when exporting
+        """
+        if onnx_quantization not in ONNX_QUANTIZATIONS:
+            raise ValueError(
+                f"Unknown ONNX quantization '{onnx_quantization}'. Expected one of: {', '.join(ONNX_QUANTIZATIONS)}"
+            )
+
+        self.onnx_dir = onnx_dir
+        self.onnx_quantization = onnx_quantization
+        self._models: Dict[str, SentenceTransformer] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str, backend: str = "torch") -> SentenceTransformer:
+        """
+        Get a model, loading it on first use
+
+        Args:
+            model_name: Name or path of the sentence transformer model
+            backend: Embedding backend ('torch' or 'onnx-int8')
+
+        Returns:
+            Shared model instance
+        """
+        key = model_key(model_name, backend)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{backend}'. Expected one of: {', '.join(EMBEDDING_BACKENDS)}")
+
+        with self._lock:
+            # Another thread may have loaded the model while we waited
+            if key not in self._models:
+                print(f"Loading embedding model: {key}")
+                if backend == "onnx-int8":
+                    self._models[key] = self._load_onnx_int8(model_name)
+                else:
+                    self._models[key] = SentenceTransformer(model_name)
+            return self._models[key]
+
+    def _load_onnx_int8(self, model_name: str) -> SentenceTransformer:
+        """Load the int8 ONNX model, exporting and quantizing it on first use"""
+        export_dir = os.path.join(self.onnx_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+        file_suffix = f"qint8_{self.onnx_quantization}"
+        file_name = os.path.join("onnx", f"model_{file_suffix}.onnx")
+
+        if not os.path.exists(os.path.join(export_dir, file_name)):
+            print(f"Exporting {model_name} to ONNX with {self.onnx_quantization} int8 quantization")
+            onnx_model = SentenceTransformer(model_name, backend="onnx", device="cpu")
+            onnx_model.save(export_dir)
+            export_dynamic_quantized_onnx_model(onnx_model, self.onnx_quantization, export_dir, file_suffix=file_suffix)
+
+        return SentenceTransformer(export_dir, backend="onnx", device="cpu", model_kwargs={"file_name": file_name})
+
+    def warm_up(self, model_names: Iterable[str], backend: str = "torch"):
+        """
+        Load models ahead of the first request
+
+        Args:
+            model_names: Models to load
+            backend: Embedding backend
+        """
+        for model_name in model_names:
+            self.get(model_name, backend)
+
+    def loaded_models(self) -> List[str]:
+        """Keys (see model_key) of the models currently held in memory"""
+        return list(self._models)
+
+    def release(self, model_name: Optional[str] = None) -> List[str]:
+        """
+        Drop models from the registry and reclaim their memory
+
+        Vector stores fetch their model from the registry on every use, so a
+        released model is simply loaded again if it is needed later.
+
+        Args:
+            model_name: Model to release with all its backends (all models if None)
+
+        Returns:
+            Keys of the released models
+        """
+        with self._lock:
+            released = [
+                key for key in self._models
+                if model_name is None or key == model_name or key.startswith(f"{model_name}@")
+            ]
+            for key in released:
+                del self._models[key]
+
+        if released:
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            print(f"Released embedding model(s): {', '.join(released)}")
+
+        return released
+
+
+# Registry shared by every VectorStore in the process
+embedding_models = EmbeddingModelRegistry()
@@ -0,0 +1,106 @@
+"""
+Parallel Embedding Module
+Encodes text shards in a pool of worker processes, each with its own model
+"""
+import multiprocessing
+import os
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from embedding_batching import DEFAULT_TOKEN_BUDGET, encode_in_token_batches
+
+
+# Texts sent to a worker per task
+DEFAULT_SHARD_SIZE = 4096
+
+# Model loaded by the current worker process
+_worker_model = None
+_worker_token_budget = DEFAULT_TOKEN_BUDGET
+
+
+def _init_worker(model_name: str, backend: str, num_threads: int, token_budget: int):
+    """Pin the worker's thread count and load its embedding model"""
+    global _worker_model, _worker_token_budget
+
+    # Must be set before torch starts its thread pools
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[variable] = str(num_threads)
+
+    import torch
+    from model_registry import embedding_models
+
+    torch.set_num_threads(num_threads)
+    _worker_model = embedding_models.get(model_name, backend)
+    _worker_token_budget = token_budget
+
+
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    """Encode one shard in a worker process"""
+    if not texts:
+        return np.zeros((0, _worker_model.get_sentence_embedding_dimension()), dtype=np.float32)
+    embeddings, _ = encode_in_token_batches(_worker_model, texts, _worker_token_budget)
+    return embeddings
+
+
+class ParallelEncoder:
+    """Pool of embedding worker processes"""
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str = "torch",
+        num_workers: int = 2,
+        threads_per_worker: Optional[int] = None,
+        token_budget: int = DEFAULT_TOKEN_BUDGET
+    ):
+        """
+        Start the worker pool
+
+        Args:
+            model_name: Name or path of the sentence transformer model
+            backend: Embedding backend each worker loads
+            num_workers: Number of worker processes
+            threads_per_worker: Intra-op threads per worker (defaults to cores / workers)
+            token_budget: Maximum padded tokens per encoder batch inside each worker
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+        print(f"Starting {num_workers} embedding workers with {self.threads_per_worker} thread(s) each")
+
+        # Spawned workers do not inherit the parent's torch thread pools
+        self.pool = multiprocessing.get_context("spawn").Pool(
+            num_workers,
+            initializer=_init_worker,
+            initargs=(model_name, backend, self.threads_per_worker, token_budget)
+        )
+
+    def imap(self, shards: Iterable[List[str]]) -> Iterator[np.ndarray]:
+        """
+        Encode shards in parallel, yielding results in input order
+
+        Args:
+            shards: Lists of texts
+
+        Returns:
+            Iterator of float32 arrays, one per shard
+        """
+        return self.pool.imap(_encode_shard, shards)
+
+    def close(self):
+        """Stop the workers after pending shards are done"""
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self) -> 'ParallelEncoder':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.pool.terminate()
+            self.pool.join()
+        else:
+            self.close()
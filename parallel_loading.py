@@ -0,0 +1,103 @@
+"""
+Parallel Loading Module
+Reads and chunks documents in a pool of worker processes
+"""
+import collections
+import multiprocessing
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from document_loader import DocumentLoader
+
+
+# Documents loaded ahead of the consumer per worker
+DEFAULT_PREFETCH_PER_WORKER = 4
+
+# Loader used by the current worker process
+_worker_loader = None
+
+
+def _init_worker(chunk_size: int, chunk_overlap: int, tokenizer):
+    """Create the worker's document loader"""
+    global _worker_loader
+    _worker_loader = DocumentLoader(chunk_size=chunk_size, chunk_overlap=chunk_overlap, tokenizer=tokenizer)
+
+
+def _load_document(document_path: str) -> List[Dict[str, Any]]:
+    """Read and chunk one document in a worker process"""
+    return _worker_loader.load_and_chunk(document_path)
+
+
+class ParallelLoader:
+    """Pool of document loading worker processes"""
+
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        num_workers: int = 2,
+        prefetch: int = 0,
+        tokenizer=None
+    ):
+        """
+        Start the worker pool
+
+        Args:
+            chunk_size: Maximum number of characters per chunk
+            chunk_overlap: Number of overlapping characters between chunks
+            num_workers: Number of worker processes
+            prefetch: Documents loaded ahead of the consumer (defaults to
+                DEFAULT_PREFETCH_PER_WORKER per worker)
+            tokenizer: Fast tokenizer for token-based chunking (pickled to each worker)
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+
+        self.num_workers = num_workers
+        self.prefetch = prefetch or num_workers * DEFAULT_PREFETCH_PER_WORKER
+        print(f"Starting {num_workers} document loading workers")
+
+        # Workers only need the loader, not the parent's models
+        self.pool = multiprocessing.get_context("spawn").Pool(
+            num_workers,
+            initializer=_init_worker,
+            initargs=(chunk_size, chunk_overlap, tokenizer)
+        )
+
+    def imap(self, document_paths: Iterable[str]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Load and chunk documents in parallel, yielding results in input order
+
+        At most prefetch documents are in flight or waiting for the consumer,
+        so a slow consumer does not let loaded chunks pile up in memory.
+
+        Args:
+            document_paths: Paths of the documents
+
+        Returns:
+            Iterator of (document_path, chunks) pairs
+        """
+        pending = collections.deque()
+        for document_path in document_paths:
+            if len(pending) >= self.prefetch:
+                path, result = pending.popleft()
+                yield path, result.get()
+            pending.append((document_path, self.pool.apply_async(_load_document, (document_path,))))
+
+        while pending:
+            path, result = pending.popleft()
+            yield path, result.get()
+
+    def close(self):
+        """Stop the workers after pending documents are done"""
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self) -> 'ParallelLoader':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.pool.terminate()
+            self.pool.join()
+        else:
+            self.close()
@@ -0,0 +1,166 @@
+"""
+Prefix Cache Module
+LRU cache of prompt key/values so prompts sharing a prefix skip recomputing it
+"""
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import torch
+
+from generation_scheduler import KVLayers
+
+
+# Prompts are indexed every this many tokens; shorter shared prefixes are not reused
+DEFAULT_BLOCK_SIZE = 16
+
+
+class _Entry:
+    """Key/values of one prompt"""
+
+    def __init__(self, tokens: torch.Tensor, layers: KVLayers, block_hashes: List[int]):
+        self.tokens = tokens
+        self.layers = layers
+        self.block_hashes = block_hashes
+        self.nbytes = sum(keys.nbytes + values.nbytes for keys, values in layers)
+
+
+class PrefixKVCache:
+    """
+    Memory-capped LRU cache of prompt key/values, searched by longest token prefix
+
+    Each prompt is indexed by a hash chain over its blocks of block_size
+    tokens, so finding the cached prompt that shares the most blocks with a
+    new one is a dictionary lookup per block. The match is then extended
+    token by token, so the reusable prefix can end anywhere.
+    """
+
+    def __init__(self, max_bytes: int, block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        Initialize the cache
+
+        Args:
+            max_bytes: Memory cap for cached key/values; least recently used prompts are evicted
+            block_size: Tokens per indexed block
+        """
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self.nbytes = 0
+        # Block hash -> ids of the entries containing that prefix
+        self._blocks: Dict[int, Dict[int, None]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _block_hashes(self, tokens: torch.Tensor) -> List[int]:
+        """Hash of every whole-block prefix of the tokens"""
+        hashes, chain = [], 0
+        values = tokens.tolist()
+        for end in range(self.block_size, len(values) + 1, self.block_size):
+            chain = hash((chain, tuple(values[end - self.block_size:end])))
+            hashes.append(chain)
+        return hashes
+
+    def lookup(self, tokens: torch.Tensor) -> Tuple[int, Optional[KVLayers]]:
+        """
+        Find the longest cached prefix of a prompt, marking its entry as most recently used
+
+        At least the last token is always left out, so the remainder still
+        produces logits for the first new token.
+
+        Args:
+            tokens: Prompt token ids, shaped (length,)
+
+        Returns:
+            (prefix length, key/values of the prefix), or (0, None) on a miss
+        """
+        tokens = tokens.reshape(-1).cpu()
+        limit = len(tokens) - 1
+
+        with self._lock:
+            candidates = None
+            for block_hash in self._block_hashes(tokens[:limit]):
+                entry_ids = self._blocks.get(block_hash)
+                if not entry_ids:
+                    break
+                candidates = entry_ids
+
+            if candidates is None:
+                return 0, None
+
+            best_length, best_id = 0, None
+            for entry_id in candidates:
+                entry = self.entries[entry_id]
+                length = min(len(entry.tokens), limit)
+                mismatches = (entry.tokens[:length] != tokens[:length]).nonzero()
+                if len(mismatches):
+                    length = int(mismatches[0])
+                if length > best_length:
+                    best_length, best_id = length, entry_id
+
+            if best_id is None:
+                return 0, None
+
+            self.entries.move_to_end(best_id)
+            layers = self.entries[best_id].layers
+
+        return best_length, [(keys[:, :, :best_length], values[:, :, :best_length]) for keys, values in layers]
+
+    def put(self, tokens: torch.Tensor, layers: KVLayers):
+        """
+        Store the key/values of a prompt, evicting least recently used prompts over the memory cap
+
+        Cached prompts that are a prefix of this one are replaced by it.
+
+        Args:
+            tokens: Prompt token ids, shaped (length,)
+            layers: Per layer (keys, values) of exactly these tokens
+        """
+        tokens = tokens.reshape(-1).cpu()
+        block_hashes = self._block_hashes(tokens)
+        if not block_hashes:
+            return
+        entry = _Entry(tokens, layers, block_hashes)
+        if entry.nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            covered = [
+                entry_id for entry_id in self._blocks.get(block_hashes[0], ())
+                if len(self.entries[entry_id].tokens) <= len(tokens)
+                and torch.equal(self.entries[entry_id].tokens, tokens[:len(self.entries[entry_id].tokens)])
+            ]
+            for entry_id in covered:
+                self._remove(entry_id)
+
+            entry_id = next(self._ids)
+            self.entries[entry_id] = entry
+            self.nbytes += entry.nbytes
+            for block_hash in block_hashes:
+                self._blocks.setdefault(block_hash, {})[entry_id] = None
+
+            while self.nbytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def _remove(self, entry_id: int):
+        entry = self.entries.pop(entry_id)
+        self.nbytes -= entry.nbytes
+        for block_hash in entry.block_hashes:
+            entry_ids = self._blocks[block_hash]
+            entry_ids.pop(entry_id, None)
+            if not entry_ids:
+                del self._blocks[block_hash]
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self.entries.clear()
+            self._blocks.clear()
+            self.nbytes = 0
@@ -0,0 +1,101 @@
+"""
+Query Cache Module
+In-memory LRU cache of query embeddings
+"""
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize query text so trivially different spellings share a cache entry
+
+    Applies Unicode NFC normalization, trims the query and collapses runs of
+    whitespace. Case is preserved because cased embedding models treat it as
+    meaningful.
+
+    Args:
+        query: Raw query text
+
+    Returns:
+        Normalized query text
+    """
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache from normalized query text to embedding vector, safe to share between threads"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of cached queries
+            ttl_seconds: Seconds an entry stays valid (never expires if None)
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[Hashable, Tuple[np.ndarray, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model_name: str, query: str) -> Tuple[str, str]:
+        """Cache key of a query for an embedding model"""
+        return model_name, normalize_query(query)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        """
+        Look up an embedding, marking it as most recently used
+
+        Args:
+            key: Key from QueryEmbeddingCache.key()
+
+        Returns:
+            Cached embedding, or None on a miss or an expired entry
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+                del self.entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, embedding: np.ndarray):
+        """
+        Store an embedding, evicting the least recently used entry when full
+
+        Args:
+            key: Key from QueryEmbeddingCache.key()
+            embedding: Query embedding
+        """
+        with self._lock:
+            self.entries[key] = (embedding, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self.entries.clear()
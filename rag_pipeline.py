@@ -2,14 +2,29 @@
 RAG Pipeline with Gemma
 Retrieval-Augmented Generation using local Gemma model
 """
+import numpy as np
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
-from typing import List, Dict, Any
+from transformers import (
+    AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig, StoppingCriteriaList, TextIteratorStreamer
+)
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+import itertools
+import os
+import threading
 import time
 import logging
 from prometheus_client import Counter, Histogram, Gauge
-from vector_store import VectorStore
+from vector_store import DEFAULT_EMBEDDING_MODEL, VectorStore
+from model_registry import embedding_models, model_key
 from document_loader import DocumentLoader
+from parallel_loading import ParallelLoader
+from source_manifest import MANIFEST_FILE, SourceManifest, expand_sources
+from query_cache import QueryEmbeddingCache
+from answer_stream import StopOnEvent, StopPhraseTrimmer, clean_answer
+from generation_scheduler import GenerationScheduler, KVLayers, build_cache, cache_layers
+from prefix_cache import PrefixKVCache
+from speculative_decoding import SpeculativeDecoder
+from cpu_precision import CPU_PRECISIONS, VALIDATION_SET, compare_precision, convert_model, model_nbytes
 
 # Configure logging
 logging.basicConfig(
@@ -23,11 +38,31 @@ QUERY_COUNT = Counter('rag_query_total', 'Total number of RAG queries')
 QUERY_ERRORS = Counter('rag_query_errors_total', 'Total number of query errors')
 QUERY_DURATION = Histogram('rag_query_duration_seconds', 'Query duration in seconds')
 RETRIEVAL_DURATION = Histogram('rag_retrieval_duration_seconds', 'Retrieval duration in seconds')
+BATCH_RETRIEVAL_DURATION = Histogram('rag_batch_retrieval_duration_seconds', 'Batched retrieval duration in seconds')
+QUERY_CACHE_HITS = Counter('rag_query_cache_hits_total', 'Query embeddings served from the cache')
+QUERY_CACHE_MISSES = Counter('rag_query_cache_misses_total', 'Query embeddings computed because of a cache miss')
+PREFIX_CACHE_HITS = Counter('rag_prefix_cache_hits_total', 'Prompts whose prefix key/values were found in the prefix cache')
+PREFIX_CACHE_MISSES = Counter('rag_prefix_cache_misses_total', 'Prompts prefilled without a cached prefix')
+PREFILL_TOKENS = Counter('rag_prefill_tokens_total', 'Prompt tokens run through the model')
+PREFILL_TOKENS_SAVED = Counter('rag_prefill_tokens_saved_total', 'Prompt tokens whose key/values came from the prefix cache')
+MODEL_BYTES = Gauge('rag_model_bytes', 'Memory held by the generation model weights')
+PREFIX_CACHE_BYTES = Gauge('rag_prefix_cache_bytes', 'Memory held by cached prompt key/values')
+DRAFT_TOKENS = Counter('rag_draft_tokens_total', 'Tokens proposed by the draft model in speculative decoding')
+DRAFT_TOKENS_ACCEPTED = Counter('rag_draft_tokens_accepted_total', 'Draft tokens accepted by the main model')
 GENERATION_DURATION = Histogram('rag_generation_duration_seconds', 'Generation duration in seconds')
+TIME_TO_FIRST_TOKEN = Histogram(
+    'rag_time_to_first_token_seconds', 'Time from the start of a streamed query to its first answer text in seconds'
+)
 CONTEXT_CHUNKS = Histogram('rag_context_chunks', 'Number of context chunks retrieved')
 TOKENS_GENERATED = Histogram('rag_tokens_generated', 'Number of tokens generated')
 MODEL_MEMORY_USAGE = Gauge('rag_model_memory_mb', 'Model memory usage in MB')
 
+# Supported index_documents modes
+INDEX_MODES = ("rebuild", "append", "update")
+
+# Share of validation tokens a lower CPU precision must predict like float32 without a warning
+MIN_PRECISION_AGREEMENT = 0.9
+
 
 class RAGPipeline:
     """RAG Pipeline with Gemma model"""
@@ -37,7 +72,18 @@ class RAGPipeline:
         model_path: str,
         device: str = "auto",
         use_cpu: bool = False,
-        quantize_4bit: bool = False
+        quantize_4bit: bool = False,
+        embedding_cache_dir: Optional[str] = None,
+        query_cache_size: int = 1024,
+        query_cache_ttl: Optional[float] = None,
+        warm_up_embeddings: bool = False,
+        embedding_backend: str = "torch",
+        generation_batch_size: int = 1,
+        prefix_cache_mb: float = 0,
+        draft_model_path: Optional[str] = None,
+        num_draft_tokens: int = 5,
+        cpu_precision: str = "fp32",
+        validate_cpu_precision: bool = True
     ):
         """
         Initialize RAG pipeline
@@ -47,11 +93,41 @@ class RAGPipeline:
             device: Device to run model on ('cpu', 'cuda', or 'auto')
             use_cpu: Force CPU usage (for low memory systems)
             quantize_4bit: Use 4-bit quantization to reduce VRAM usage (~3-4GB for 12B models)
+            embedding_cache_dir: Directory of the persistent chunk embedding cache (disabled if None)
+            query_cache_size: Number of query embeddings kept in memory (disabled if 0)
+            query_cache_ttl: Seconds a cached query embedding stays valid (no expiry if None)
+            warm_up_embeddings: Load the embedding model now instead of on first use
+            embedding_backend: Embedding backend ('torch', or 'onnx-int8' for int8 ONNX Runtime on CPU)
+            generation_batch_size: Decode up to this many concurrent requests together in one
+                continuously refilled batch (1 runs each request's generate() on its own)
+            prefix_cache_mb: Memory for key/values of recent prompts, so prompts sharing the
+                instruction header or a whole context skip recomputing it (disabled if 0)
+            draft_model_path: Path to a much smaller model sharing the tokenizer (e.g. Gemma 3-1B);
+                it proposes tokens that the main model verifies in one forward pass
+                (speculative decoding, disabled if None)
+            num_draft_tokens: Tokens the draft model proposes per step to start with; adjusted
+                to the acceptance rate as generation runs
+            cpu_precision: Model precision on CPU: 'fp32', 'bf16' (bfloat16 weights) or 'int8'
+                (int8 dynamic quantization of the linear layers); ignored on GPU
+            validate_cpu_precision: Compare a lower cpu_precision against fp32 on a fixed prompt
+                set at startup and log the memory, tokens/s and agreement (needs the fp32 weights
+                in memory while loading)
         """
+        if cpu_precision not in CPU_PRECISIONS:
+            raise ValueError(f"cpu_precision must be one of {CPU_PRECISIONS}, got {cpu_precision!r}")
+        if draft_model_path and generation_batch_size > 1:
+            raise ValueError("Speculative decoding (draft_model_path) cannot be combined with generation_batch_size > 1")
+        if draft_model_path and prefix_cache_mb > 0:
+            # Assisted generate() re-runs the whole prompt on top of a pre-filled cache
+            raise ValueError("Speculative decoding (draft_model_path) cannot be combined with prefix_cache_mb")
+
         print("Initializing RAG Pipeline...")
 
         # Store quantization flag
         self.quantize_4bit = quantize_4bit
+        self.embedding_cache_dir = embedding_cache_dir
+        self.embedding_backend = embedding_backend
+        self.query_cache = QueryEmbeddingCache(query_cache_size, query_cache_ttl) if query_cache_size > 0 else None
 
         # Determine device
         if use_cpu:
@@ -139,9 +215,11 @@ class RAGPipeline:
         # Load model with appropriate settings
         if self.device == "cpu":
             print("Loading model on CPU (this will take 3-5 minutes)...")
+            # bfloat16 weights can be loaded as such unless fp32 is needed as a reference
+            load_bf16 = cpu_precision == "bf16" and not validate_cpu_precision
             self.model = AutoModelForCausalLM.from_pretrained(
                 model_path,
-                dtype=torch.float32,
+                dtype=torch.bfloat16 if load_bf16 else torch.float32,
                 low_cpu_mem_usage=True,
                 device_map=None
             )
@@ -176,8 +254,32 @@ class RAGPipeline:
 
         self.model.eval()
 
-        # Initialize vector store
+        self.cpu_precision = "fp32"
+        self.precision_report = None
+        if cpu_precision != "fp32":
+            if self.device == "cpu":
+                self._apply_cpu_precision(cpu_precision, validate_cpu_precision)
+            else:
+                print(f"⚠️  cpu_precision={cpu_precision} only applies on CPU, ignoring it on {self.device}")
+        MODEL_BYTES.set(model_nbytes(self.model))
+
+        # Concurrent requests share decoding steps instead of queueing behind each other
+        self.scheduler = None
+        if generation_batch_size > 1:
+            self.scheduler = GenerationScheduler(self.model, self.device, max_batch_size=generation_batch_size)
+            print(f"Continuous batching enabled (up to {generation_batch_size} concurrent requests)")
+
+        self.prefix_cache = PrefixKVCache(int(prefix_cache_mb * 1024**2)) if prefix_cache_mb > 0 else None
+
+        # Speculative decoding with a small draft model
+        self.speculative_decoder = None
+        if draft_model_path:
+            self._load_draft_model(draft_model_path, num_draft_tokens)
+
+        # Initialize vector store; embedding models are shared across stores
         self.vector_store = None
+        if warm_up_embeddings:
+            embedding_models.warm_up([DEFAULT_EMBEDDING_MODEL], backend=embedding_backend)
 
         # Track model memory usage
         if self.device != "cpu" and torch.cuda.is_available():
@@ -188,6 +290,66 @@ class RAGPipeline:
         logger.info("RAG Pipeline initialized successfully")
         print("✅ RAG Pipeline initialized successfully")
 
+    def _apply_cpu_precision(self, precision: str, validate: bool):
+        """
+        Convert the CPU model to a lower precision, logging how it compares to fp32
+
+        Args:
+            precision: 'bf16' or 'int8'
+            validate: Compare against fp32 on the validation prompts
+        """
+        self.cpu_precision = precision
+        if not validate:
+            self.model = convert_model(self.model, precision)
+            message = f"CPU precision {precision}: {model_nbytes(self.model) / 1024**3:.2f} GB of weights (not validated)"
+            logger.info(message)
+            print(f"✓ {message}")
+            return
+
+        print(f"Validating {precision} against fp32 on {len(VALIDATION_SET)} prompts...")
+        prompts = [self._build_prompt(question, [{'text': context}]) for context, question in VALIDATION_SET]
+        self.model, report = compare_precision(self.model, self.tokenizer, precision, prompts)
+        self.precision_report = report
+
+        message = (
+            f"CPU precision {precision}: weights {report['reference_bytes'] / 1024**3:.2f} GB -> "
+            f"{report['bytes'] / 1024**3:.2f} GB ({report['memory_ratio']:.2f}x), "
+            f"{report['reference_tokens_per_second']:.1f} -> {report['tokens_per_second']:.1f} tokens/s "
+            f"({report['speedup']:.2f}x), {report['top1_agreement']:.1%} of tokens predicted as in fp32, "
+            f"{report['identical_answers']}/{report['num_prompts']} answers identical"
+        )
+        if report['top1_agreement'] < MIN_PRECISION_AGREEMENT:
+            logger.warning(message)
+            print(f"⚠️  {message}")
+            print(f"⚠️  Agreement with fp32 is below {MIN_PRECISION_AGREEMENT:.0%}, answers may differ noticeably")
+        else:
+            logger.info(message)
+            print(f"✓ {message}")
+
+    def _load_draft_model(self, draft_model_path: str, num_draft_tokens: int):
+        """
+        Load the draft model for speculative decoding next to the main model
+
+        Args:
+            draft_model_path: Path to the draft model
+            num_draft_tokens: Tokens proposed per step to start with
+        """
+        print(f"Loading draft model from: {draft_model_path}")
+        draft_tokenizer = AutoTokenizer.from_pretrained(draft_model_path)
+        draft_model = AutoModelForCausalLM.from_pretrained(
+            draft_model_path,
+            dtype=torch.float32 if self.device == "cpu" else torch.float16,
+            low_cpu_mem_usage=True
+        ).to(self.device)
+        draft_model.eval()
+        if self.device == "cpu":
+            draft_model = convert_model(draft_model, self.cpu_precision)
+
+        self.speculative_decoder = SpeculativeDecoder(
+            self.model, draft_model, num_draft_tokens, tokenizer=self.tokenizer, draft_tokenizer=draft_tokenizer
+        )
+        print(f"✓ Speculative decoding enabled ({num_draft_tokens} draft tokens per step to start)")
+
     def index_document(self, document_path: str, chunk_size: int = 500, chunk_overlap: int = 50):
         """
         Load and index a document
@@ -204,12 +366,32 @@ class RAGPipeline:
         chunks = loader.load_and_chunk(document_path)
 
         # Build vector store
-        self.vector_store = VectorStore()
+        self.vector_store = VectorStore(
+            embedding_cache_dir=self.embedding_cache_dir,
+            embedding_backend=self.embedding_backend
+        )
         self.vector_store.build_index(chunks)
 
         print("Document indexed successfully")
 
-    def index_documents(self, document_paths: List[str], chunk_size: int = 500, chunk_overlap: int = 50):
+    def index_documents(
+        self,
+        document_paths: List[str],
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        mode: str = "rebuild",
+        index_type: str = "flat",
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        rerank: bool = False,
+        num_workers: int = 1,
+        stream_batch_size: Optional[int] = None,
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_every: int = 10,
+        num_loaders: int = 1,
+        chunk_by_tokens: bool = False,
+        dedup_threshold: Optional[float] = None
+    ) -> int:
         """
         Load and index multiple documents
 
@@ -217,27 +399,347 @@ class RAGPipeline:
             document_paths: List of paths to documents
             chunk_size: Size of text chunks
             chunk_overlap: Overlap between chunks
+            mode: 'rebuild' replaces the whole index, 'append' adds the documents to the
+                existing index, 'update' replaces existing chunks of each document
+            index_type: FAISS index type for a rebuilt index ('flat', 'ivf', 'hnsw', 'sq8' or 'ivfpq')
+            nprobe: Number of IVF lists visited per query
+            ef_search: HNSW search queue size
+            rerank: Keep full-precision vectors on disk and re-rank candidates exactly
+            num_workers: Embedding worker processes; shards are streamed into the index in order
+            stream_batch_size: Stream chunks from the documents and index them in batches of this
+                size instead of loading all chunks first (implied by checkpoint_dir)
+            checkpoint_dir: Directory for build checkpoints; a restarted build with the same
+                arguments resumes from the last checkpoint
+            checkpoint_every: Batches between checkpoints
+            num_loaders: Document loading worker processes; documents are read and chunked ahead
+                of the embedding stage in input order (with stream_batch_size, loading and
+                embedding overlap)
+            chunk_by_tokens: Measure chunk_size and chunk_overlap in tokens of the serving
+                tokenizer and record each chunk's 'token_count'
+            dedup_threshold: For a rebuilt index, keep one chunk per group of near-duplicates
+                (MinHash estimate of shingle similarity at or above this value) and record the
+                other copies as its aliases; updates follow the existing index's setting
+
+        Returns:
+            Number of chunks created from the documents
         """
-        print(f"\nIndexing {len(document_paths)} document(s)...")
+        if mode not in INDEX_MODES:
+            raise ValueError(f"Unknown index mode '{mode}'. Expected one of: {', '.join(INDEX_MODES)}")
+
+        print(f"\nIndexing {len(document_paths)} document(s) (mode: {mode})...")
+        start_time = time.time()
 
         # Load and chunk all documents
-        loader = DocumentLoader(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        loader = DocumentLoader(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            tokenizer=self.tokenizer if chunk_by_tokens else None
+        )
+
+        if stream_batch_size is not None or checkpoint_dir is not None:
+            search_params = {
+                key: value for key, value in (('nprobe', nprobe), ('ef_search', ef_search)) if value is not None
+            }
+            num_chunks = self._index_documents_streaming(
+                document_paths, loader, mode, index_type, rerank, search_params, num_workers,
+                stream_batch_size or 1024, checkpoint_dir, checkpoint_every, num_loaders, dedup_threshold
+            )
+            elapsed = time.time() - start_time
+            print(f"\n✅ Indexed {len(document_paths)} document(s) with {num_chunks} new chunks "
+                  f"({self.vector_store.num_chunks} chunks in index) in {elapsed:.2f}s "
+                  f"({num_chunks / elapsed if elapsed else float('inf'):.1f} chunks/s)")
+            return num_chunks
+
         all_chunks = []
 
+        for doc_path, chunks in self._load_documents(document_paths, loader, num_loaders):
+            all_chunks.extend(chunks)
+            print(f"    Created {len(chunks)} chunks")
+
+        if mode == "rebuild" or self.vector_store is None:
+            # Build vector store with all chunks
+            search_params = {
+                key: value for key, value in (('nprobe', nprobe), ('ef_search', ef_search)) if value is not None
+            }
+            store = VectorStore(
+                embedding_cache_dir=self.embedding_cache_dir,
+                embedding_backend=self.embedding_backend,
+                index_type=index_type,
+                rerank=rerank,
+                dedup_threshold=dedup_threshold,
+                **search_params
+            )
+            store.build_index(all_chunks, num_workers=num_workers)
+            # Queries keep using the previous index until the new one is complete
+            self.vector_store = store
+        else:
+            self.vector_store.set_search_params(nprobe=nprobe, ef_search=ef_search)
+            if mode == "update":
+                # New chunks go in before the stale ones are dropped
+                removed, _ = self.vector_store.replace_sources(document_paths, all_chunks, num_workers=num_workers)
+                if removed:
+                    print(f"  Removed {removed} stale chunks")
+            else:
+                self.vector_store.add_chunks(all_chunks, num_workers=num_workers)
+
+        elapsed = time.time() - start_time
+        print(f"\n✅ Indexed {len(document_paths)} document(s) with {len(all_chunks)} new chunks "
+              f"({self.vector_store.num_chunks} chunks in index) in {elapsed:.2f}s "
+              f"({len(all_chunks) / elapsed if elapsed else float('inf'):.1f} chunks/s)")
+
+        return len(all_chunks)
+
+    def _load_documents(
+        self,
+        document_paths: List[str],
+        loader: DocumentLoader,
+        num_loaders: int = 1
+    ) -> Iterator[Tuple[str, List[Dict]]]:
+        """Yield (path, chunks) for each document in input order, tagging chunks with their source"""
+        if num_loaders > 1:
+            with ParallelLoader(
+                loader.chunk_size, loader.chunk_overlap, num_workers=num_loaders, tokenizer=loader.tokenizer
+            ) as pool:
+                for doc_path, chunks in pool.imap(document_paths):
+                    print(f"  Loaded: {doc_path}")
+                    for chunk in chunks:
+                        chunk['source'] = doc_path
+                    yield doc_path, chunks
+            return
+
         for doc_path in document_paths:
             print(f"  Loading: {doc_path}")
             chunks = loader.load_and_chunk(doc_path)
             # Add source file metadata to each chunk
             for chunk in chunks:
                 chunk['source'] = doc_path
-            all_chunks.extend(chunks)
-            print(f"    Created {len(chunks)} chunks")
+            yield doc_path, chunks
 
-        # Build vector store with all chunks
-        self.vector_store = VectorStore()
-        self.vector_store.build_index(all_chunks)
+    def _iter_document_chunks(
+        self,
+        document_paths: List[str],
+        loader: DocumentLoader,
+        num_loaders: int = 1
+    ) -> Iterator[Dict]:
+        """Yield chunks of each document in turn, tagged with their source"""
+        if num_loaders > 1:
+            for _, chunks in self._load_documents(document_paths, loader, num_loaders):
+                yield from chunks
+            return
 
-        print(f"\n✅ Indexed {len(document_paths)} document(s) with {len(all_chunks)} total chunks")
+        for doc_path in document_paths:
+            print(f"  Loading: {doc_path}")
+            for chunk in loader.iter_chunks(doc_path):
+                chunk['source'] = doc_path
+                yield chunk
+
+    def _index_documents_streaming(
+        self,
+        document_paths: List[str],
+        loader: DocumentLoader,
+        mode: str,
+        index_type: str,
+        rerank: bool,
+        search_params: Dict[str, int],
+        num_workers: int,
+        batch_size: int,
+        checkpoint_dir: Optional[str],
+        checkpoint_every: int,
+        num_loaders: int,
+        dedup_threshold: Optional[float]
+    ) -> int:
+        """Index documents in fixed-size batches, resuming from a checkpoint when possible"""
+        # A checkpoint is only reused by a build over the same input
+        build = {
+            'document_paths': list(document_paths),
+            'chunk_size': loader.chunk_size,
+            'chunk_overlap': loader.chunk_overlap,
+            'chunk_by_tokens': loader.tokenizer is not None,
+            'mode': mode,
+            'index_type': index_type,
+            'dedup_threshold': dedup_threshold
+        }
+
+        store = VectorStore(
+            embedding_cache_dir=self.embedding_cache_dir,
+            embedding_backend=self.embedding_backend,
+            index_type=index_type,
+            rerank=rerank,
+            dedup_threshold=dedup_threshold,
+            **search_params
+        )
+        cursor = store.load_checkpoint(checkpoint_dir) if checkpoint_dir else None
+        # An update checkpoint must know which chunks the new ones replace
+        if cursor is not None and cursor.get('build') == build and (mode != "update" or 'stale' in cursor):
+            print(f"Resuming from checkpoint after {cursor['chunks_consumed']} chunks")
+            start = cursor['chunks_consumed']
+        else:
+            if cursor is not None:
+                print("⚠️  Checkpoint belongs to a different build, starting over")
+            cursor = None
+            start = 0
+            if mode == "rebuild" or self.vector_store is None:
+                store.reset()
+            else:
+                store = self.vector_store
+                store.set_search_params(**search_params)
+
+        chunks = itertools.islice(self._iter_document_chunks(document_paths, loader, num_loaders), start, None)
+        options = {
+            'batch_size': batch_size,
+            'num_workers': num_workers,
+            'checkpoint_dir': checkpoint_dir,
+            'checkpoint_every': checkpoint_every,
+            'checkpoint_meta': {'build': build},
+            'start': start
+        }
+        if mode == "update":
+            # New chunks go in before the stale ones are dropped
+            removed, consumed = store.replace_source_stream(
+                document_paths, chunks, stale=cursor['stale'] if cursor else None, **options
+            )
+            if removed:
+                print(f"  Removed {removed} stale chunks")
+        else:
+            consumed = store.add_chunk_stream(chunks, **options)
+
+        # Queries keep using the previous index until the new one is complete
+        self.vector_store = store
+
+        # The finished build no longer needs its checkpoint
+        if checkpoint_dir:
+            VectorStore.remove_checkpoint(checkpoint_dir)
+
+        return consumed
+
+    def sync_documents(
+        self,
+        sources: List[str],
+        index_path: Optional[str] = None,
+        manifest_path: Optional[str] = None,
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        index_type: str = "flat",
+        num_workers: int = 1,
+        num_loaders: int = 1,
+        stream_batch_size: Optional[int] = None,
+        chunk_by_tokens: bool = False,
+        dedup_threshold: Optional[float] = None
+    ) -> Dict[str, int]:
+        """
+        Incrementally index files, directories and glob patterns
+
+        A manifest records the size, modification time and content hash of
+        every indexed file. Only added and changed files are chunked and
+        embedded again, and chunks of files that disappeared are removed.
+
+        Args:
+            sources: File paths, directories or glob patterns
+            index_path: Directory of the saved index; it is saved there after changes
+                and holds the manifest unless manifest_path is given
+            manifest_path: Manifest file
+            chunk_size: Size of text chunks
+            chunk_overlap: Overlap between chunks
+            index_type: FAISS index type when the index has to be built from scratch
+            num_workers: Embedding worker processes
+            num_loaders: Document loading worker processes
+            stream_batch_size: Embed chunks in batches of this size while documents load
+            chunk_by_tokens: Measure chunk_size and chunk_overlap in tokens
+            dedup_threshold: Record near-duplicate chunks as aliases (see index_documents)
+
+        Returns:
+            Number of added, changed, deleted and unchanged files and of chunks created
+        """
+        if manifest_path is None:
+            if index_path is None:
+                raise ValueError("sync_documents needs an index_path or a manifest_path")
+            manifest_path = os.path.join(index_path, MANIFEST_FILE)
+
+        paths = expand_sources(sources)
+        settings = {
+            'chunk_size': chunk_size,
+            'chunk_overlap': chunk_overlap,
+            'chunk_by_tokens': chunk_by_tokens,
+            'embedding_model': model_key(DEFAULT_EMBEDDING_MODEL, self.embedding_backend)
+        }
+        if dedup_threshold is not None:
+            settings['dedup_threshold'] = dedup_threshold
+
+        manifest = SourceManifest.load(manifest_path)
+        rebuild = self.vector_store is None or manifest.settings != settings
+        if rebuild:
+            # The recorded files do not describe the current index
+            manifest = SourceManifest(settings)
+
+        changes = manifest.diff(paths)
+        print(f"\nSyncing {len(paths)} file(s): {len(changes['added'])} added, {len(changes['changed'])} changed, "
+              f"{len(changes['deleted'])} deleted, {len(changes['unchanged'])} unchanged")
+
+        for path in changes['deleted']:
+            removed = self.vector_store.remove_by_source(path)
+            print(f"  Removed {removed} chunks of deleted {path}")
+            manifest.remove(path)
+
+        to_index = changes['added'] + changes['changed']
+        chunks_created = 0
+        if to_index:
+            chunks_created = self.index_documents(
+                to_index,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                mode="rebuild" if rebuild else "update",
+                index_type=index_type,
+                num_workers=num_workers,
+                num_loaders=num_loaders,
+                stream_batch_size=stream_batch_size,
+                chunk_by_tokens=chunk_by_tokens,
+                dedup_threshold=dedup_threshold
+            )
+            for path in to_index:
+                manifest.record(path)
+
+        # The manifest must never describe files the saved index does not contain
+        if index_path and (to_index or changes['deleted']):
+            self.save_index(index_path)
+        manifest.save(manifest_path)
+
+        return {
+            'added': len(changes['added']),
+            'changed': len(changes['changed']),
+            'deleted': len(changes['deleted']),
+            'unchanged': len(changes['unchanged']),
+            'chunks_created': chunks_created
+        }
+
+    def save_index(self, path: str):
+        """
+        Save the vector store so it can be loaded on the next start
+
+        Args:
+            path: Directory to save the index to
+        """
+        if self.vector_store is None:
+            raise ValueError("No documents indexed. Call index_documents() first.")
+
+        self.vector_store.save(path)
+
+    def load_index(self, path: str, mmap: bool = True) -> int:
+        """
+        Load a saved vector store
+
+        Args:
+            path: Directory the index was saved to
+            mmap: Memory-map the index and chunks instead of reading them into memory
+
+        Returns:
+            Number of chunks in the loaded index
+        """
+        self.vector_store = VectorStore(
+            embedding_cache_dir=self.embedding_cache_dir,
+            embedding_backend=self.embedding_backend
+        )
+        self.vector_store.load(path, mmap=mmap)
+        return self.vector_store.num_chunks
 
     def retrieve_context(self, query: str, top_k: int = 3) -> List[Dict]:
         """
@@ -254,14 +756,61 @@ class RAGPipeline:
             raise ValueError("No document indexed. Call index_document() first.")
 
         start_time = time.time()
-        results = self.vector_store.search(query, top_k=top_k)
+        results = self.vector_store.search_chunks(self._embed_queries([query]), top_k=top_k)[0]
         retrieval_time = time.time() - start_time
 
         RETRIEVAL_DURATION.observe(retrieval_time)
         CONTEXT_CHUNKS.observe(len(results))
         logger.debug(f"Retrieved {len(results)} chunks in {retrieval_time:.3f}s")
 
-        return [chunk for chunk, distance in results]
+        return results
+
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed queries, reusing cached embeddings of repeated queries"""
+        if self.query_cache is None:
+            return self.vector_store.embed_queries(queries)
+
+        keys = [self.query_cache.key(self.vector_store.embedding_key, query) for query in queries]
+        embeddings = [self.query_cache.get(key) for key in keys]
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        QUERY_CACHE_HITS.inc(len(queries) - len(misses))
+        QUERY_CACHE_MISSES.inc(len(misses))
+
+        if misses:
+            computed = self.vector_store.embed_queries([queries[i] for i in misses])
+            for i, embedding in zip(misses, computed):
+                embeddings[i] = embedding
+                self.query_cache.put(keys[i], embedding)
+
+        return np.stack(embeddings)
+
+    def retrieve_context_batch(self, queries: List[str], top_k: int = 3) -> List[List[Dict]]:
+        """
+        Retrieve relevant context for many queries with one batched search
+
+        Args:
+            queries: User queries
+            top_k: Number of chunks to retrieve per query
+
+        Returns:
+            List of relevant chunks for each query
+        """
+        if self.vector_store is None:
+            raise ValueError("No document indexed. Call index_document() first.")
+
+        if not queries:
+            return []
+
+        start_time = time.time()
+        results = self.vector_store.search_chunks(self._embed_queries(queries), top_k=top_k)
+        retrieval_time = time.time() - start_time
+
+        BATCH_RETRIEVAL_DURATION.observe(retrieval_time)
+        for chunks in results:
+            CONTEXT_CHUNKS.observe(len(chunks))
+        logger.debug(f"Retrieved context for {len(queries)} queries in {retrieval_time:.3f}s")
+
+        return results
 
     def generate_response(
         self,
@@ -284,11 +833,121 @@ class RAGPipeline:
         """
         start_time = time.time()
 
-        # Construct prompt with context
+        # Tokenize
+        inputs = self.tokenizer(self._build_prompt(query, context_chunks), return_tensors="pt").to(self.device)
+
+        # Only the generated part (exclude input prompt)
+        generated_tokens = self._generate(inputs, self._generation_kwargs(max_new_tokens, temperature))
+        answer = self.tokenizer.decode(generated_tokens, skip_special_tokens=True)
+
+        # Clean up formatting artifacts and stop at common hallucination patterns
+        answer = clean_answer(answer)
+
+        generation_time = time.time() - start_time
+        num_tokens = len(generated_tokens)
+
+        GENERATION_DURATION.observe(generation_time)
+        TOKENS_GENERATED.observe(num_tokens)
+        logger.debug(f"Generated {num_tokens} tokens in {generation_time:.3f}s ({num_tokens/generation_time:.1f} tokens/s)")
+
+        return answer
+
+    def _generate(
+        self,
+        inputs: Dict[str, torch.Tensor],
+        generation_kwargs: Dict[str, Any],
+        streamer=None,
+        stop_event: Optional[threading.Event] = None
+    ) -> torch.Tensor:
+        """
+        Generate from a tokenized prompt through the scheduler or generate(), reusing cached prefixes
+
+        Args:
+            inputs: Tokenized prompt (batch of one)
+            generation_kwargs: Sampling parameters from _generation_kwargs()
+            streamer: Receives the prompt and then each new token
+            stop_event: Ends generation early once set
+
+        Returns:
+            Generated token ids (without the prompt)
+        """
+        input_ids = inputs['input_ids']
+        input_length = input_ids.shape[1]
+        prefix_length, prefix_layers = self._cached_prefix(input_ids)
+        # A prompt cached up to its last token is not worth storing again
+        cache_prompt = self.prefix_cache is not None and prefix_length < input_length - 1
+
+        if self.scheduler is not None:
+            request = self.scheduler.submit(
+                input_ids,
+                streamer=streamer,
+                stop_event=stop_event,
+                prefix_layers=prefix_layers,
+                return_prompt_layers=cache_prompt,
+                **generation_kwargs
+            )
+            generated_tokens = request.result()
+            if request.prompt_layers is not None:
+                self._cache_prompt(input_ids, request.prompt_layers)
+            return generated_tokens
+
+        if streamer is not None:
+            generation_kwargs = dict(generation_kwargs, streamer=streamer)
+        if stop_event is not None:
+            generation_kwargs = dict(generation_kwargs, stopping_criteria=StoppingCriteriaList([StopOnEvent(stop_event)]))
+        if self.prefix_cache is not None:
+            # generate() only runs the tokens the cache does not hold yet
+            generation_kwargs = dict(
+                generation_kwargs, past_key_values=build_cache(prefix_layers or []), return_dict_in_generate=True
+            )
+        speculative_decoder = self.speculative_decoder
+        if speculative_decoder is not None:
+            generation_kwargs = dict(generation_kwargs, **speculative_decoder.generation_kwargs())
+
+        with torch.no_grad():
+            outputs = self.model.generate(**inputs, **generation_kwargs)
+
+        if speculative_decoder is not None:
+            draft_tokens, accepted = speculative_decoder.record(outputs.shape[1] - input_length)
+            DRAFT_TOKENS.inc(draft_tokens)
+            DRAFT_TOKENS_ACCEPTED.inc(accepted)
+
+        if cache_prompt:
+            self._cache_prompt(input_ids, [
+                (keys[:, :, :input_length].clone(), values[:, :, :input_length].clone())
+                for keys, values in cache_layers(outputs.past_key_values)
+            ])
+        if self.prefix_cache is not None:
+            outputs = outputs.sequences
+        return outputs[0][input_length:]
+
+    def _cached_prefix(self, input_ids: torch.Tensor) -> Tuple[int, Optional[KVLayers]]:
+        """Longest prefix of a prompt with cached key/values, recording prefill metrics"""
+        prompt_length = input_ids.shape[-1]
+        if self.prefix_cache is None:
+            PREFILL_TOKENS.inc(prompt_length)
+            return 0, None
+
+        prefix_length, prefix_layers = self.prefix_cache.lookup(input_ids)
+        if prefix_length:
+            PREFIX_CACHE_HITS.inc()
+        else:
+            PREFIX_CACHE_MISSES.inc()
+        PREFILL_TOKENS_SAVED.inc(prefix_length)
+        PREFILL_TOKENS.inc(prompt_length - prefix_length)
+        return prefix_length, prefix_layers
+
+    def _cache_prompt(self, input_ids: torch.Tensor, layers: KVLayers):
+        """Store the key/values of a prompt for later prompts sharing its prefix"""
+        self.prefix_cache.put(input_ids, layers)
+        PREFIX_CACHE_BYTES.set(self.prefix_cache.nbytes)
+
+    def _build_prompt(self, query: str, context_chunks: List[Dict]) -> str:
+        """Prompt with the retrieved context and the question"""
         context_text = "\n\n".join([chunk['text'] for chunk in context_chunks])
 
         # Clear prompt format for Gemma models
-        prompt = f"""Use the following context to answer the question accurately and concisely.
+        return f"""Use the following context to answer the question accurately and concisely.
 
 Context:
 {context_text}
@@ -297,45 +956,149 @@ Question: {query}
 
 Answer:"""
 
-        # Tokenize
-        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
-        input_length = inputs['input_ids'].shape[1]
+    def _generation_kwargs(self, max_new_tokens: int, temperature: float) -> Dict[str, Any]:
+        """Balanced sampling parameters for Gemma models"""
+        return {
+            'max_new_tokens': max_new_tokens,
+            'temperature': temperature,
+            'do_sample': True,
+            'top_p': 0.9,
+            'top_k': 50,
+            'repetition_penalty': 1.1,
+            'pad_token_id': self.tokenizer.eos_token_id,
+            'eos_token_id': self.tokenizer.eos_token_id
+        }
+
+    def generate_response_stream(
+        self,
+        query: str,
+        context_chunks: List[Dict],
+        max_new_tokens: int = 256,
+        temperature: float = 0.7
+    ) -> Iterator[str]:
+        """
+        Generate a response and yield it piece by piece as tokens are decoded
 
-        # Generate with balanced parameters for Gemma models
-        with torch.no_grad():
-            outputs = self.model.generate(
-                **inputs,
-                max_new_tokens=max_new_tokens,
-                temperature=temperature,
-                do_sample=True,
-                top_p=0.9,
-                top_k=50,
-                repetition_penalty=1.1,
-                pad_token_id=self.tokenizer.eos_token_id,
-                eos_token_id=self.tokenizer.eos_token_id
-            )
+        generate() runs in a background thread and feeds a token streamer.
+        Stop-phrase trimming is applied as text arrives, and generation stops
+        as soon as a stop phrase appears or the caller closes the iterator.
 
-        # Decode only the generated part (exclude input prompt)
-        generated_tokens = outputs[0][input_length:]
-        answer = self.tokenizer.decode(generated_tokens, skip_special_tokens=True).strip()
+        Args:
+            query: User query
+            context_chunks: Retrieved context chunks
+            max_new_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
 
-        # Clean up formatting artifacts
-        answer = answer.lstrip('*#-').strip()
+        Returns:
+            Iterator of answer text pieces; joined, they equal generate_response()'s cleanup
+        """
+        start_time = time.time()
 
-        # Stop at common hallucination patterns (less aggressive for 3-12B)
-        stop_phrases = ["Answer:", "Question:", "Context:", "\n\nQuestion"]
-        for stop in stop_phrases:
-            if stop in answer:
-                answer = answer.split(stop)[0].strip()
+        inputs = self.tokenizer(self._build_prompt(query, context_chunks), return_tensors="pt").to(self.device)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        stop = threading.Event()
+        result = {}
+
+        def generate():
+            try:
+                generated_tokens = self._generate(
+                    inputs, self._generation_kwargs(max_new_tokens, temperature), streamer=streamer, stop_event=stop
+                )
+                result['num_tokens'] = len(generated_tokens)
+            except Exception as e:
+                result['error'] = e
+                # Unblock the consumer waiting on the streamer
+                streamer.end()
+
+        thread = threading.Thread(target=generate, name="rag-generate", daemon=True)
+        thread.start()
+
+        trimmer = StopPhraseTrimmer()
+        try:
+            for text in streamer:
+                piece = trimmer.feed(text)
+                if piece:
+                    yield piece
+                if trimmer.stopped:
+                    break
+            if 'error' in result:
+                raise result['error']
+            piece = trimmer.finish()
+            if piece:
+                yield piece
+        finally:
+            # Also reached when the consumer goes away mid-answer
+            stop.set()
+            thread.join()
 
         generation_time = time.time() - start_time
-        num_tokens = len(generated_tokens)
-
+        num_tokens = result.get('num_tokens', 0)
         GENERATION_DURATION.observe(generation_time)
         TOKENS_GENERATED.observe(num_tokens)
-        logger.debug(f"Generated {num_tokens} tokens in {generation_time:.3f}s ({num_tokens/generation_time:.1f} tokens/s)")
+        logger.debug(f"Streamed {num_tokens} tokens in {generation_time:.3f}s")
 
-        return answer
+    def query_stream(
+        self,
+        question: str,
+        top_k: int = 3,
+        max_new_tokens: int = 256,
+        temperature: float = 0.7,
+        show_context: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Perform a RAG query and stream the answer as it is generated
+
+        Args:
+            question: User question
+            top_k: Number of context chunks to retrieve
+            max_new_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            show_context: Whether to include retrieved context in the final event
+
+        Returns:
+            Iterator of events: {'event': 'token', 'text': ...} for each answer piece,
+            then {'event': 'done', ...} with the full answer and metadata
+        """
+        start_time = time.time()
+        QUERY_COUNT.inc()
+
+        try:
+            logger.info(f"Processing streamed query: {question[:100]}...")
+            context_chunks = self.retrieve_context(question, top_k=top_k)
+
+            pieces = []
+            for piece in self.generate_response_stream(
+                question,
+                context_chunks,
+                max_new_tokens=max_new_tokens,
+                temperature=temperature
+            ):
+                if not pieces:
+                    TIME_TO_FIRST_TOKEN.observe(time.time() - start_time)
+                pieces.append(piece)
+                yield {"event": "token", "text": piece}
+
+            query_time = time.time() - start_time
+            QUERY_DURATION.observe(query_time)
+            logger.info(f"Streamed query completed in {query_time:.3f}s")
+
+            result = {
+                "event": "done",
+                "question": question,
+                "answer": "".join(pieces),
+                "metadata": {
+                    "query_time": query_time,
+                    "num_chunks": len(context_chunks)
+                }
+            }
+            if show_context:
+                result["context"] = [chunk['text'] for chunk in context_chunks]
+            yield result
+
+        except Exception as e:
+            QUERY_ERRORS.inc()
+            logger.error(f"Streamed query failed: {str(e)}", exc_info=True)
+            raise
 
     def query(
         self,
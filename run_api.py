@@ -19,7 +19,107 @@ def main():
         type=str,
         nargs='+',
         default=["radar-calibration-doc.md"],
-        help="Path(s) to document(s) to auto-index on startup (supports multiple files)"
+        help="Document file(s), directories or glob patterns to auto-index on startup"
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="On startup, only re-index documents added, changed or deleted since the index at --index-path was saved (can also use SYNC_DOCUMENTS=1)"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Sync on startup, then keep watching --document sources and sync the index in the background after changes; needs --index-path (can also use WATCH_DOCUMENTS=1)"
+    )
+    parser.add_argument(
+        "--watch-debounce",
+        type=float,
+        default=None,
+        help="Seconds without further changes before watched changes are indexed (default: 2.0, can also use WATCH_DEBOUNCE_SECONDS env var)"
+    )
+    parser.add_argument(
+        "--watch-poll-interval",
+        type=float,
+        default=None,
+        help="Seconds between scans when inotify is unavailable (default: 5.0, can also use WATCH_POLL_INTERVAL env var)"
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=None,
+        help="Index one chunk per group of near-duplicates at least this similar and keep the other sources as aliases (e.g. 0.8, can also use DEDUP_THRESHOLD env var)"
+    )
+    parser.add_argument(
+        "--embedding-cache-dir",
+        type=str,
+        default=None,
+        help="Directory for the persistent chunk embedding cache (can also use EMBEDDING_CACHE_DIR env var)"
+    )
+    parser.add_argument(
+        "--query-cache-size",
+        type=int,
+        default=None,
+        help="Number of query embeddings cached in memory, 0 disables the cache (default: 1024, can also use QUERY_CACHE_SIZE env var)"
+    )
+    parser.add_argument(
+        "--query-cache-ttl",
+        type=float,
+        default=None,
+        help="Seconds a cached query embedding stays valid (default: no expiry, can also use QUERY_CACHE_TTL env var)"
+    )
+    parser.add_argument(
+        "--embedding-backend",
+        type=str,
+        choices=["torch", "onnx-int8"],
+        default=None,
+        help="Embedding backend; 'onnx-int8' runs an int8-quantized ONNX export on CPU (default: torch, can also use EMBEDDING_BACKEND env var)"
+    )
+    parser.add_argument(
+        "--generation-batch-size",
+        type=int,
+        default=None,
+        help="Decode up to this many concurrent queries together with continuous batching (default: 1, can also use GENERATION_BATCH_SIZE env var)"
+    )
+    parser.add_argument(
+        "--prefix-cache-mb",
+        type=float,
+        default=None,
+        help="Memory for key/values of recent prompts, reused by prompts sharing a prefix; 0 disables (default: 0, can also use PREFIX_CACHE_MB env var)"
+    )
+    parser.add_argument(
+        "--cpu-precision",
+        type=str,
+        choices=["fp32", "bf16", "int8"],
+        default=None,
+        help="Model precision on CPU; 'bf16' loads bfloat16 weights, 'int8' quantizes the linear layers dynamically (default: fp32, can also use CPU_PRECISION env var)"
+    )
+    parser.add_argument(
+        "--skip-precision-validation",
+        action="store_true",
+        help="Skip comparing --cpu-precision against fp32 at startup (can also use VALIDATE_CPU_PRECISION=0)"
+    )
+    parser.add_argument(
+        "--draft-model-path",
+        type=str,
+        default=None,
+        help="Small draft model (e.g. Gemma 3-1B) for speculative decoding (can also use DRAFT_MODEL_PATH env var)"
+    )
+    parser.add_argument(
+        "--num-draft-tokens",
+        type=int,
+        default=None,
+        help="Tokens the draft model proposes per step to start with (default: 5, can also use NUM_DRAFT_TOKENS env var)"
+    )
+    parser.add_argument(
+        "--warm-up-embeddings",
+        action="store_true",
+        help="Load the embedding model at startup instead of on the first request (can also use WARM_UP_EMBEDDINGS=1)"
+    )
+    parser.add_argument(
+        "--index-path",
+        type=str,
+        default=None,
+        help="Directory of a saved index, memory-mapped on startup if present and written after auto-indexing otherwise (can also use INDEX_PATH env var)"
     )
     parser.add_argument(
         "--host",
@@ -45,6 +145,57 @@ def main():
     if args.model_path:
         os.environ["GEMMA_MODEL_PATH"] = args.model_path
 
+    if args.embedding_cache_dir:
+        os.environ["EMBEDDING_CACHE_DIR"] = args.embedding_cache_dir
+
+    if args.index_path:
+        os.environ["INDEX_PATH"] = args.index_path
+
+    if args.embedding_backend:
+        os.environ["EMBEDDING_BACKEND"] = args.embedding_backend
+
+    if args.generation_batch_size is not None:
+        os.environ["GENERATION_BATCH_SIZE"] = str(args.generation_batch_size)
+
+    if args.prefix_cache_mb is not None:
+        os.environ["PREFIX_CACHE_MB"] = str(args.prefix_cache_mb)
+
+    if args.cpu_precision:
+        os.environ["CPU_PRECISION"] = args.cpu_precision
+
+    if args.skip_precision_validation:
+        os.environ["VALIDATE_CPU_PRECISION"] = "0"
+
+    if args.draft_model_path:
+        os.environ["DRAFT_MODEL_PATH"] = args.draft_model_path
+
+    if args.num_draft_tokens is not None:
+        os.environ["NUM_DRAFT_TOKENS"] = str(args.num_draft_tokens)
+
+    if args.warm_up_embeddings:
+        os.environ["WARM_UP_EMBEDDINGS"] = "1"
+
+    if args.sync:
+        os.environ["SYNC_DOCUMENTS"] = "1"
+
+    if args.watch:
+        os.environ["WATCH_DOCUMENTS"] = "1"
+
+    if args.dedup_threshold is not None:
+        os.environ["DEDUP_THRESHOLD"] = str(args.dedup_threshold)
+
+    if args.watch_debounce is not None:
+        os.environ["WATCH_DEBOUNCE_SECONDS"] = str(args.watch_debounce)
+
+    if args.watch_poll_interval is not None:
+        os.environ["WATCH_POLL_INTERVAL"] = str(args.watch_poll_interval)
+
+    if args.query_cache_size is not None:
+        os.environ["QUERY_CACHE_SIZE"] = str(args.query_cache_size)
+
+    if args.query_cache_ttl is not None:
+        os.environ["QUERY_CACHE_TTL"] = str(args.query_cache_ttl)
+
     # Join multiple document paths with pipe delimiter
     os.environ["DOCUMENT_PATH"] = "|".join(args.document)
 
@@ -0,0 +1,173 @@
+"""
+Source Manifest Module
+Tracks indexed source files so re-ingestion only processes what changed
+"""
+import glob
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+# File types picked up when a directory is ingested
+DEFAULT_EXTENSIONS = (".md", ".markdown", ".txt")
+
+# Bytes read at a time when hashing a file
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def expand_sources(patterns: Iterable[str], extensions: Iterable[str] = DEFAULT_EXTENSIONS) -> List[str]:
+    """
+    Expand files, directories and glob patterns into a sorted list of files
+
+    Args:
+        patterns: File paths, directories (searched recursively) or glob
+            patterns ('**' matches nested directories)
+        extensions: File extensions included from directories
+
+    Returns:
+        Normalized paths of the existing matching files, without duplicates
+    """
+    extensions = tuple(extension.lower() for extension in extensions)
+    paths = set()
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.update(
+                    os.path.join(root, name) for name in files if name.lower().endswith(extensions)
+                )
+        elif glob.has_magic(pattern):
+            paths.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+        elif os.path.isfile(pattern):
+            # A listed file that was deleted is left out, so its chunks count as deleted
+            paths.add(pattern)
+
+    return sorted(os.path.normpath(path) for path in paths)
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 hex digest of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SourceManifest:
+    """Persistent record of (size, mtime, content hash) per indexed source file"""
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        """
+        Initialize an empty manifest
+
+        Args:
+            settings: Ingestion settings (chunking, index type) the recorded
+                sources were indexed with
+        """
+        self.settings = settings or {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # Entries for files hashed by diff(), recorded once they are indexed
+        self._observed: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> 'SourceManifest':
+        """
+        Load a manifest, or return an empty one if the file does not exist
+
+        Args:
+            path: Manifest file
+
+        Returns:
+            Loaded SourceManifest
+        """
+        manifest = cls()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            manifest.settings = data.get('settings', {})
+            manifest.entries = data.get('sources', {})
+        return manifest
+
+    def save(self, path: str):
+        """
+        Write the manifest atomically
+
+        Args:
+            path: Manifest file
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'settings': self.settings, 'sources': self.entries}, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def diff(self, paths: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Compare files on disk with the manifest
+
+        A file whose size and modification time match its entry is taken as
+        unchanged without reading it. Otherwise its content hash decides, so
+        a file that was only touched is not re-indexed.
+
+        Args:
+            paths: Files currently in the corpus
+
+        Returns:
+            Dictionary with 'added', 'changed', 'deleted' and 'unchanged' paths
+        """
+        result = {'added': [], 'changed': [], 'deleted': [], 'unchanged': []}
+        seen = set()
+
+        for path in paths:
+            entry = self.entries.get(path)
+            try:
+                stat = os.stat(path)
+                if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                    seen.add(path)
+                    result['unchanged'].append(path)
+                    continue
+                observed = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_hash(path)}
+            except FileNotFoundError:
+                # Deleted since the paths were listed, so reported as deleted below
+                continue
+
+            seen.add(path)
+            if entry is not None and entry['sha256'] == observed['sha256']:
+                # Same content under a new timestamp
+                self.entries[path] = observed
+                result['unchanged'].append(path)
+            else:
+                self._observed[path] = observed
+                result['changed' if entry is not None else 'added'].append(path)
+
+        result['deleted'] = sorted(path for path in self.entries if path not in seen)
+        return result
+
+    def record(self, path: str):
+        """
+        Record the size, modification time and content hash of an indexed file
+
+        Files compared by diff() are recorded as they were seen then, so an
+        edit made while the file was being indexed is picked up next time.
+
+        Args:
+            path: Indexed file
+        """
+        observed = self._observed.pop(path, None)
+        if observed is None:
+            stat = os.stat(path)
+            observed = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_hash(path)}
+        self.entries[path] = observed
+
+    def remove(self, path: str):
+        """
+        Forget a file
+
+        Args:
+            path: File that is no longer indexed
+        """
+        self.entries.pop(path, None)
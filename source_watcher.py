@@ -0,0 +1,218 @@
+"""
+Source Watcher Module
+Watches document sources and runs incremental index updates after changes settle
+"""
+import glob
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from source_manifest import DEFAULT_EXTENSIONS, expand_sources
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+# Quiet time after the last change before an update runs
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+
+# Longest an update is postponed while changes keep arriving
+DEFAULT_MAX_DELAY_SECONDS = 60.0
+
+# Seconds between scans when file system events are not available
+DEFAULT_POLL_INTERVAL = 5.0
+
+# Event types that can change a document; 'opened' and 'closed_no_write' are
+# also raised by the sync's own reads and would retrigger it
+CHANGE_EVENT_TYPES = frozenset({'created', 'modified', 'moved', 'deleted', 'closed'})
+
+
+def watch_roots(sources: Iterable[str]) -> List[Tuple[str, bool]]:
+    """
+    Directories to observe for a set of sources
+
+    Args:
+        sources: File paths, directories or glob patterns
+
+    Returns:
+        (directory, recursive) pairs
+    """
+    roots = []
+    for source in sources:
+        if os.path.isdir(source):
+            roots.append((source, True))
+        elif glob.has_magic(source):
+            # Observe the part of the pattern before the first wildcard
+            prefix = []
+            for part in source.split(os.sep):
+                if glob.has_magic(part):
+                    break
+                prefix.append(part)
+            roots.append((os.sep.join(prefix) or ".", True))
+        else:
+            roots.append((os.path.dirname(source) or ".", False))
+
+    return sorted({(os.path.normpath(root), recursive) for root, recursive in roots if os.path.isdir(root)})
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Forwards file system events on document files to the watcher"""
+
+    def __init__(self, watcher: 'SourceWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def dispatch(self, event):
+        if event.is_directory or event.event_type not in CHANGE_EVENT_TYPES:
+            return
+        paths = [event.src_path, getattr(event, 'dest_path', '')]
+        if any(path and path.lower().endswith(self.watcher.extensions) for path in paths):
+            self.watcher.notify()
+
+
+class SourceWatcher:
+    """Runs a callback in a background thread once changes to the sources settle"""
+
+    def __init__(
+        self,
+        sources: List[str],
+        on_change: Callable[[], None],
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        max_delay_seconds: float = DEFAULT_MAX_DELAY_SECONDS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_events: bool = True,
+        extensions: Iterable[str] = DEFAULT_EXTENSIONS
+    ):
+        """
+        Initialize the watcher (nothing is observed until start())
+
+        Args:
+            sources: File paths, directories or glob patterns to watch
+            on_change: Called without arguments after a burst of changes, e.g. to
+                sync the index; never runs twice at the same time
+            debounce_seconds: Quiet time after the last change before on_change runs
+            max_delay_seconds: Run on_change after this long even if changes keep arriving
+            poll_interval: Seconds between scans when polling
+            use_events: Use inotify (through watchdog) when available instead of polling
+            extensions: File extensions that count as document changes
+        """
+        self.sources = list(sources)
+        self.on_change = on_change
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.poll_interval = poll_interval
+        self.use_events = use_events
+        self.extensions = tuple(extension.lower() for extension in extensions)
+        self.mode = None
+
+        self._changed = threading.Event()
+        self._stopped = threading.Event()
+        self._first_change = None
+        self._last_change = None
+        self._observer = None
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """Start observing the sources and the background update worker"""
+        self._stopped.clear()
+
+        if self.use_events and Observer is not None:
+            try:
+                observer = Observer()
+                handler = _ChangeHandler(self)
+                for root, recursive in watch_roots(self.sources):
+                    observer.schedule(handler, root, recursive=recursive)
+                observer.start()
+                self._observer = observer
+                self.mode = "events"
+            except OSError as e:
+                # e.g. the inotify watch limit is reached
+                print(f"⚠️  File system events unavailable ({e}), polling instead")
+
+        if self._observer is None:
+            self.mode = "polling"
+            # Taken before returning, so changes made right after start() are not part of the baseline
+            snapshot = self._snapshot()
+            self._threads.append(threading.Thread(
+                target=self._poll, args=(snapshot,), name="source-watcher-poll", daemon=True
+            ))
+        self._threads.append(threading.Thread(target=self._run, name="source-watcher", daemon=True))
+
+        for thread in self._threads:
+            thread.start()
+
+        print(f"Watching {len(self.sources)} source(s) for changes ({self.mode})")
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop observing and wait for a running update to finish
+
+        Args:
+            timeout: Seconds to wait for each background thread (None waits indefinitely)
+        """
+        self._stopped.set()
+        self._changed.set()
+
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout)
+            self._observer = None
+
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        """Record a change to the sources"""
+        now = time.monotonic()
+        if not self._changed.is_set():
+            self._first_change = now
+        self._last_change = now
+        self._changed.set()
+
+    def _run(self):
+        """Wait for changes to settle, then run on_change, until stopped"""
+        while not self._stopped.is_set():
+            self._changed.wait()
+
+            # Postpone while changes keep arriving, up to max_delay_seconds
+            while not self._stopped.is_set():
+                now = time.monotonic()
+                due = min(self._last_change + self.debounce_seconds, self._first_change + self.max_delay_seconds)
+                if now >= due:
+                    break
+                self._stopped.wait(due - now)
+
+            if self._stopped.is_set():
+                break
+
+            # Changes arriving while on_change runs trigger another run
+            self._changed.clear()
+            try:
+                self.on_change()
+            except Exception as e:
+                print(f"⚠️  Update after source changes failed: {e}")
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """Size and modification time of every source file"""
+        snapshot = {}
+        for path in expand_sources(self.sources, self.extensions):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def _poll(self, snapshot: Dict[str, Tuple[int, int]]):
+        """Scan the sources every poll_interval seconds and report differences from the last scan"""
+        while not self._stopped.wait(self.poll_interval):
+            current = self._snapshot()
+            if current != snapshot:
+                self.notify()
+            snapshot = current
@@ -0,0 +1,112 @@
+"""
+Speculative Decoding Module
+A small draft model proposes tokens that the main model verifies in one forward pass
+"""
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+
+def _count_forwards(counts: threading.local, name: str):
+    """Forward hook counting a model's forward passes in the calling thread"""
+    def hook(module, inputs, outputs):
+        setattr(counts, name, getattr(counts, name, 0) + 1)
+    return hook
+
+
+class SpeculativeDecoder:
+    """
+    Configures generate() for assisted generation and measures how well the draft model does
+
+    The draft model proposes tokens one forward pass at a time and the main
+    model checks a whole round of them in a single pass, keeping the longest
+    prefix it agrees with plus one token of its own. Forward hooks count both
+    kinds of passes per thread, from which the accepted draft tokens of each
+    generate() call follow.
+    """
+
+    def __init__(
+        self,
+        model,
+        draft_model,
+        num_draft_tokens: int = 5,
+        tokenizer=None,
+        draft_tokenizer=None
+    ):
+        """
+        Initialize the decoder
+
+        Args:
+            model: Main model
+            draft_model: Much smaller model sharing the main model's tokenizer
+            num_draft_tokens: Tokens proposed per step to start with; grows while all
+                are accepted and shrinks otherwise
+            tokenizer: Main model tokenizer, needed when the vocabulary sizes differ
+            draft_tokenizer: Draft model tokenizer, needed when the vocabulary sizes differ
+        """
+        if num_draft_tokens < 1:
+            raise ValueError("num_draft_tokens must be at least 1")
+
+        self.model = model
+        self.draft_model = draft_model
+        self.draft_model.generation_config.num_assistant_tokens = num_draft_tokens
+        self.draft_model.generation_config.num_assistant_tokens_schedule = "heuristic"
+
+        self._generate_kwargs: Dict[str, Any] = {'assistant_model': draft_model}
+        # Same tokenizer with a differently sized embedding matrix (e.g. Gemma 3-1B for 3-4B)
+        # still needs generate() to translate between the two vocabularies
+        if model.config.get_text_config().vocab_size != draft_model.config.get_text_config().vocab_size:
+            if tokenizer is None or draft_tokenizer is None:
+                raise ValueError("Models with different vocabulary sizes need both tokenizers")
+            self._generate_kwargs.update(tokenizer=tokenizer, assistant_tokenizer=draft_tokenizer)
+
+        self.stats = {'draft_tokens': 0, 'accepted_tokens': 0, 'verify_steps': 0, 'generated_tokens': 0}
+        self._lock = threading.Lock()
+        self._counts = threading.local()
+        self._hooks = [
+            model.register_forward_hook(_count_forwards(self._counts, 'verify_steps')),
+            draft_model.register_forward_hook(_count_forwards(self._counts, 'draft_tokens'))
+        ]
+
+    def generation_kwargs(self) -> Dict[str, Any]:
+        """
+        Start measuring a generate() call in this thread
+
+        Returns:
+            Keyword arguments that make generate() use the draft model
+        """
+        self._counts.verify_steps = self._counts.draft_tokens = 0
+        return dict(self._generate_kwargs)
+
+    def record(self, num_tokens: int) -> Tuple[int, int]:
+        """
+        Finish measuring the generate() call that just ran in this thread
+
+        Args:
+            num_tokens: Tokens the call generated
+
+        Returns:
+            (draft tokens proposed, draft tokens accepted)
+        """
+        verify_steps = getattr(self._counts, 'verify_steps', 0)
+        draft_tokens = getattr(self._counts, 'draft_tokens', 0)
+        # Every verification pass yields the accepted draft tokens plus one from the main model
+        accepted = min(draft_tokens, max(0, num_tokens - verify_steps))
+
+        with self._lock:
+            self.stats['draft_tokens'] += draft_tokens
+            self.stats['accepted_tokens'] += accepted
+            self.stats['verify_steps'] += verify_steps
+            self.stats['generated_tokens'] += num_tokens
+        return draft_tokens, accepted
+
+    def acceptance_rate(self) -> Optional[float]:
+        """Share of draft tokens the main model accepted so far (None before any were proposed)"""
+        if not self.stats['draft_tokens']:
+            return None
+        return self.stats['accepted_tokens'] / self.stats['draft_tokens']
+
+    def close(self):
+        """Remove the forward hooks from both models"""
+        for hook in self._hooks:
+            hook.remove()
+        self._hooks = []
@@ -0,0 +1,97 @@
+"""Unit tests for incremental answer cleanup"""
+import random
+import sys
+import threading
+from pathlib import Path
+
+import torch
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from answer_stream import StopOnEvent, StopPhraseTrimmer, clean_answer
+
+
+def stream(text, pieces):
+    """Feed text to a trimmer in the given number of random pieces and join the output"""
+    rng = random.Random(len(text) * 31 + pieces)
+    cuts = sorted(rng.sample(range(1, len(text)), min(pieces, len(text) - 1))) if len(text) > 1 else []
+    trimmer = StopPhraseTrimmer()
+    output = []
+    for start, end in zip([0] + cuts, cuts + [len(text)]):
+        output.append(trimmer.feed(text[start:end]))
+        if trimmer.stopped:
+            break
+    output.append(trimmer.finish())
+    return "".join(output), trimmer
+
+
+class TestCleanAnswer:
+    """Test suite for one-shot answer cleanup"""
+
+    def test_strips_leading_markup(self):
+        """Test formatting characters at the start are removed"""
+        assert clean_answer("  ** Paris is the capital.  ") == "Paris is the capital."
+
+    def test_cuts_at_stop_phrase(self):
+        """Test the answer ends before a new prompt turn"""
+        assert clean_answer("Paris.\n\nQuestion: And Rome?") == "Paris."
+        assert clean_answer("Paris. Context: more") == "Paris."
+
+
+class TestStopPhraseTrimmer:
+    """Test suite for incremental answer cleanup"""
+
+    TEXTS = [
+        "Paris is the capital of France.",
+        "  ## Paris is the capital.\n\nQuestion: What about Italy?",
+        "- The answer is 42. Answer: again",
+        "It depends on the Context: here",
+        "Ques is not Question",
+        "trailing spaces   \n\n",
+        "***",
+        "",
+        "Answer: nothing before",
+    ]
+
+    def test_matches_clean_answer(self):
+        """Test any split of the text yields the same answer as clean_answer()"""
+        for text in self.TEXTS:
+            for pieces in (1, 2, 5, len(text)):
+                output, _ = stream(text, pieces)
+                assert output == clean_answer(text), (text, pieces)
+
+    def test_stop_phrase_split_across_pieces(self):
+        """Test a stop phrase arriving in several pieces is never emitted"""
+        trimmer = StopPhraseTrimmer()
+        emitted = [trimmer.feed(piece) for piece in ["The capital is Paris. Ques", "tion: ", "And Rome?"]]
+        assert "".join(emitted) == "The capital is Paris."
+        assert trimmer.stopped
+        assert trimmer.finish() == ""
+
+    def test_emits_before_generation_ends(self):
+        """Test text well before any possible stop phrase is released immediately"""
+        trimmer = StopPhraseTrimmer()
+        emitted = trimmer.feed("The capital of France is Paris and it is large")
+        assert emitted.startswith("The capital of France")
+        assert not trimmer.stopped
+
+    def test_ignores_text_after_stop(self):
+        """Test pieces fed after a stop phrase are dropped"""
+        trimmer = StopPhraseTrimmer()
+        trimmer.feed("Paris. Answer:")
+        assert trimmer.stopped
+        assert trimmer.feed("more text") == ""
+
+
+class TestStopOnEvent:
+    """Test suite for the cancellation stopping criterion"""
+
+    def test_follows_event(self):
+        """Test generation stops only once the event is set"""
+        event = threading.Event()
+        criteria = StopOnEvent(event)
+        input_ids = torch.zeros((2, 3), dtype=torch.long)
+        assert not criteria(input_ids, None).any()
+        event.set()
+        assert criteria(input_ids, None).all()
@@ -125,6 +125,16 @@ class TestAPIEndpoints:
         # Should either work or return 503 (model not loaded), not 422 (validation error)
         assert response.status_code in [200, 503]
 
+    def test_query_stream_endpoint_structure(self, client):
+        """Test streaming query endpoint validates request structure (without running model)"""
+        response = client.post("/query/stream", json={})
+        assert response.status_code in [422, 503]
+
+        response = client.post("/query/stream", json={"question": "test"})
+        assert response.status_code in [200, 503]
+        if response.status_code == 200:
+            assert response.headers["content-type"].startswith("text/event-stream")
+
     def test_index_endpoint_validation(self, client):
         """Test index endpoint validates request"""
         # Test invalid request (missing document_paths)
@@ -210,6 +220,31 @@ class TestAPIRequestValidation:
 
         assert response.status_code == 422  # Validation error
 
+    def test_index_request_mode_validation(self, client):
+        """Test index request rejects unknown indexing modes"""
+        response = client.post("/index", json={
+            "document_paths": ["radar-calibration-doc.md"],
+            "mode": "invalid"
+        })
+
+        assert response.status_code == 422  # Validation error
+
+    def test_retrieve_batch_validation(self, client):
+        """Test batched retrieval validates the query list"""
+        response = client.post("/retrieve/batch", json={"queries": []})
+        assert response.status_code == 422  # Validation error
+
+        response = client.post("/retrieve/batch", json={"queries": ["What is radar calibration?"]})
+        assert response.status_code in [200, 503]
+
+    def test_sync_request_validation(self, client):
+        """Test incremental sync validates its sources"""
+        response = client.post("/index/sync", json={"sources": []})
+        assert response.status_code == 422  # Validation error
+
+        response = client.post("/index/sync", json={"sources": ["docs/"]})
+        assert response.status_code in [200, 400, 503]
+
 
 class TestAPIResponseFormat:
     """Test API response formats"""
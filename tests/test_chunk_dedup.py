@@ -0,0 +1,85 @@
+"""Unit tests for MinHash/LSH chunk deduplication"""
+import numpy as np
+import pytest
+
+from chunk_dedup import ChunkDeduplicator, shingle_hashes
+
+
+NOTICE = ("Safety notice: disconnect power before servicing the radar antenna "
+          "and follow the lockout procedure at all times.")
+
+
+class TestShingleHashes:
+    """Test suite for shingle_hashes"""
+
+    def test_ignores_case_and_punctuation(self):
+        """Test formatting differences produce the same shingles"""
+        assert np.array_equal(shingle_hashes(NOTICE), shingle_hashes(NOTICE.upper().replace(":", " -")))
+
+    def test_short_texts_have_one_shingle(self):
+        """Test texts shorter than a shingle still get a hash"""
+        assert len(shingle_hashes("two words")) == 1
+        assert len(shingle_hashes("")) == 1
+
+
+class TestChunkDeduplicator:
+    """Test suite for ChunkDeduplicator"""
+
+    def test_similarity_estimates(self):
+        """Test signatures agree for near-duplicates and not for unrelated texts"""
+        dedup = ChunkDeduplicator()
+        signatures = dedup.compute([NOTICE, NOTICE + " Contact support.", "Doppler drift of the receiver chain."])
+
+        assert (signatures[0] == signatures[1]).mean() >= 0.7
+        assert (signatures[0] == signatures[2]).mean() < 0.1
+
+    def test_match_registered_chunks(self):
+        """Test only registered chunks above the threshold are matched"""
+        dedup = ChunkDeduplicator(threshold=0.8)
+        notice, other = dedup.compute([NOTICE, "Doppler drift of the receiver chain."])
+        dedup.append(np.stack([other, notice]))
+
+        assert dedup.match(notice) == 1
+        dedup.unregister([1])
+        assert dedup.match(notice) is None
+
+    def test_aliases_follow_compaction(self):
+        """Test aliases are renumbered with the chunks they belong to"""
+        dedup = ChunkDeduplicator()
+        dedup.append(dedup.compute(["first text here", "second text here", NOTICE]))
+        dedup.add_alias(2, {'text': NOTICE, 'source': "b.md", 'char_start': 0})
+
+        dedup.compact(np.array([0, 2]))
+
+        assert dedup.aliases == {1: [{'source': "b.md", 'char_start': 0}]}
+        assert dedup.match(dedup.compute([NOTICE])[0]) == 1
+
+    def test_drop_aliases(self):
+        """Test aliases of removed sources are forgotten"""
+        dedup = ChunkDeduplicator()
+        dedup.add_alias(0, {'text': NOTICE, 'source': "b.md"})
+        dedup.add_alias(0, {'text': NOTICE, 'source': "c.md"})
+
+        assert dedup.drop_aliases(["b.md"]) == 1
+        assert dedup.aliases == {0: [{'source': "c.md"}]}
+
+    def test_save_and_load(self, tmp_path):
+        """Test signatures, registrations and aliases survive a save"""
+        dedup = ChunkDeduplicator(threshold=0.9)
+        dedup.append(dedup.compute([NOTICE, "other text entirely"]))
+        dedup.unregister([1])
+        dedup.add_alias(0, {'text': NOTICE, 'source': "b.md"})
+        dedup.save(str(tmp_path))
+
+        loaded = ChunkDeduplicator.load(str(tmp_path))
+
+        assert loaded.threshold == 0.9
+        assert loaded.count == 2
+        assert loaded.registered[:2].tolist() == [True, False]
+        assert loaded.aliases == {0: [{'source': "b.md"}]}
+        assert loaded.match(loaded.compute([NOTICE])[0]) == 0
+
+    def test_invalid_threshold(self):
+        """Test thresholds outside (0, 1] are rejected"""
+        with pytest.raises(ValueError):
+            ChunkDeduplicator(threshold=0.0)
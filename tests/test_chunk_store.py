@@ -0,0 +1,120 @@
+"""Unit tests for ChunkStore class"""
+import numpy as np
+import pytest
+from chunk_store import ChunkStore, has_chunk_store
+
+
+def make_chunks(n):
+    return [
+        {'id': i, 'text': f'Chunk {i} über Kalibrierung', 'char_start': i * 10, 'char_end': i * 10 + 9, 'source': f'doc{i % 3}.md'}
+        for i in range(n)
+    ]
+
+
+class TestChunkStore:
+    """Test suite for ChunkStore"""
+
+    def test_round_trip(self, sample_chunks):
+        """Test chunks read back as the same dictionaries"""
+        store = ChunkStore.from_chunks(sample_chunks)
+
+        assert len(store) == 3
+        assert store == sample_chunks
+        assert store[-1] == sample_chunks[-1]
+        assert store[1:] == sample_chunks[1:]
+        with pytest.raises(IndexError):
+            store[3]
+
+    def test_extra_fields_preserved(self):
+        """Test fields outside the fixed columns survive"""
+        chunks = [
+            {'text': 'no ids'},
+            {'id': 'a-string-id', 'text': 'extra', 'source': None, 'token_count': 3},
+        ]
+        store = ChunkStore.from_chunks(chunks)
+
+        assert list(store) == chunks
+
+    def test_grows_beyond_initial_capacity(self):
+        """Test the columns grow as chunks are appended"""
+        chunks = make_chunks(10)
+        store = ChunkStore(initial_capacity=2)
+        store.extend(chunks)
+
+        assert store == chunks
+
+    def test_delete_and_take(self):
+        """Test deleted chunks read as None and are dropped by take"""
+        chunks = make_chunks(6)
+        store = ChunkStore.from_chunks(chunks)
+        for chunk_id in store.ids_for_source('doc0.md'):
+            store.delete(chunk_id)
+
+        assert store[0] is None
+        assert store.deleted_ids().tolist() == [0, 3]
+        assert store.source_ids() == {'doc1.md': [1, 4], 'doc2.md': [2, 5]}
+
+        packed = store.take(np.flatnonzero(~store.deleted[:len(store)]))
+        assert packed == [chunk for chunk in chunks if chunk['source'] != 'doc0.md']
+        assert packed.sources == ['doc1.md', 'doc2.md']
+
+    def test_save_and_load(self, tmp_path):
+        """Test a saved store loads unchanged, mapped or not"""
+        chunks = make_chunks(5)
+        store = ChunkStore.from_chunks(chunks)
+        store.delete(2)
+        store.save(str(tmp_path))
+
+        assert has_chunk_store(str(tmp_path))
+        expected = chunks[:2] + [None] + chunks[3:]
+        assert ChunkStore.load(str(tmp_path)) == expected
+        mapped = ChunkStore.load(str(tmp_path), mmap=True)
+        assert mapped.mapped
+        assert mapped == expected
+
+    def test_mapped_store_copied_on_write(self, tmp_path):
+        """Test appending to a mapped store leaves the saved files untouched"""
+        chunks = make_chunks(3)
+        ChunkStore.from_chunks(chunks).save(str(tmp_path))
+
+        mapped = ChunkStore.load(str(tmp_path), mmap=True)
+        mapped.append({'id': 3, 'text': 'new', 'char_start': 0, 'char_end': 3, 'source': 'new.md'})
+
+        assert not mapped.mapped
+        assert len(mapped) == 4
+        assert ChunkStore.load(str(tmp_path)) == chunks
+
+    def test_empty_store(self, tmp_path):
+        """Test an empty store can be saved and mapped"""
+        ChunkStore().save(str(tmp_path))
+        store = ChunkStore.load(str(tmp_path), mmap=True)
+
+        assert len(store) == 0
+        assert store.source_ids() == {}
+
+    def test_zstd_compression(self, tmp_path):
+        """Test texts read back from compressed blocks"""
+        pytest.importorskip("zstandard")
+        chunks = make_chunks(50)
+        store = ChunkStore.from_chunks(chunks)
+        store.BLOCK_SIZE = 64
+        store.save(str(tmp_path), compression="zstd")
+
+        loaded = ChunkStore.load(str(tmp_path), mmap=True)
+        assert loaded == chunks
+        loaded.append(chunks[0])
+        assert loaded[50] == chunks[0]
+
+    def test_unknown_compression(self, tmp_path):
+        """Test unknown compression names are rejected"""
+        with pytest.raises(ValueError, match="Unknown compression"):
+            ChunkStore().save(str(tmp_path), compression="lz4")
+
+    def test_store_without_token_counts_loads(self, tmp_path):
+        """Test a store saved before the token_count column existed still loads"""
+        chunks = make_chunks(3)
+        ChunkStore.from_chunks(chunks).save(str(tmp_path))
+        (tmp_path / "chunks" / "token_count.npy").unlink()
+
+        assert ChunkStore.load(str(tmp_path)) == chunks
+        assert ChunkStore.load(str(tmp_path), mmap=True) == chunks
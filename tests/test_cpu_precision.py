@@ -0,0 +1,90 @@
+"""Unit tests for CPU precision conversion and validation"""
+import pytest
+import torch
+from transformers import LlamaConfig, LlamaForCausalLM
+
+from cpu_precision import compare_precision, convert_model, model_nbytes
+
+
+VOCAB_SIZE = 64
+PROMPTS = ["radar calibration", "range accuracy check", "antenna alignment"]
+
+
+class CharTokenizer:
+    """Maps characters to token ids"""
+
+    pad_token_id = None
+    eos_token_id = 1
+
+    def __call__(self, text, return_tensors="pt"):
+        return {'input_ids': torch.tensor([[2 + ord(char) % (VOCAB_SIZE - 2) for char in text]])}
+
+
+def tiny_model():
+    """Tiny randomly initialized causal LM"""
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=VOCAB_SIZE, hidden_size=64, intermediate_size=128, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=256
+    )
+    return LlamaForCausalLM(config).eval()
+
+
+class TestConvertModel:
+    """Test precision conversion"""
+
+    def test_bf16_halves_weights(self):
+        """Test bfloat16 weights take half the memory"""
+        model = tiny_model()
+        fp32_bytes = model_nbytes(model)
+        model = convert_model(model, "bf16")
+        assert model.dtype == torch.bfloat16
+        assert model_nbytes(model) == fp32_bytes // 2
+
+    def test_int8_quantizes_linear_layers(self):
+        """Test int8 replaces linear layers and its packed weights are counted"""
+        model = tiny_model()
+        fp32_bytes = model_nbytes(model)
+        model = convert_model(model, "int8")
+        assert not any(type(module) is torch.nn.Linear for module in model.modules())
+        assert 0 < model_nbytes(model) < fp32_bytes / 2
+
+    def test_fp32_unchanged(self):
+        """Test fp32 returns the model as it is"""
+        model = tiny_model()
+        assert convert_model(model, "fp32") is model
+
+    def test_unknown_precision(self):
+        """Test an unknown precision is rejected"""
+        with pytest.raises(ValueError):
+            convert_model(tiny_model(), "fp8")
+
+    def test_tied_weights_counted_once(self):
+        """Test weights shared between modules are counted once"""
+        model = tiny_model()
+        untied_bytes = model_nbytes(model)
+        model.lm_head.weight = model.model.embed_tokens.weight
+        assert model_nbytes(model) == untied_bytes - model.lm_head.weight.nbytes
+
+
+class TestComparePrecision:
+    """Test validation against float32"""
+
+    def test_fp32_matches_itself(self):
+        """Test comparing fp32 with itself agrees on every token"""
+        _, report = compare_precision(tiny_model(), CharTokenizer(), "fp32", PROMPTS, max_new_tokens=8)
+        assert report['top1_agreement'] == 1.0
+        assert report['identical_answers'] == len(PROMPTS)
+        assert report['memory_ratio'] == 1.0
+
+    @pytest.mark.parametrize("precision", ["bf16", "int8"])
+    def test_report(self, precision):
+        """Test the report covers memory, speed and agreement of the converted model"""
+        model, report = compare_precision(tiny_model(), CharTokenizer(), precision, PROMPTS, max_new_tokens=8)
+        assert report['precision'] == precision
+        assert report['num_prompts'] == len(PROMPTS)
+        assert report['bytes'] == model_nbytes(model)
+        assert report['memory_ratio'] < 1.0
+        assert report['tokens_per_second'] > 0 and report['reference_tokens_per_second'] > 0
+        assert 0.0 <= report['top1_agreement'] <= 1.0
+        assert 0 <= report['identical_answers'] <= len(PROMPTS)
@@ -1,8 +1,17 @@
 """Unit tests for DocumentLoader class"""
 import pytest
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import PreTrainedTokenizerFast
 from document_loader import DocumentLoader
 
 
+def word_tokenizer():
+    """Fast tokenizer with one token per word or punctuation mark"""
+    tokenizer = Tokenizer(models.WordLevel(vocab={"[UNK]": 0}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer)
+
+
 class TestDocumentLoader:
     """Test suite for DocumentLoader"""
 
@@ -134,3 +143,67 @@ class TestDocumentLoader:
             assert isinstance(chunk['char_start'], int)
             assert isinstance(chunk['char_end'], int)
             assert chunk['char_end'] >= chunk['char_start']
+
+    @pytest.mark.parametrize("buffer_size", [1, 3, 7, 1 << 20])
+    def test_iter_chunks_matches_chunk_text(self, tmp_path, buffer_size):
+        """Test streaming chunks match chunking the whole text, whatever the read size"""
+        loader = DocumentLoader(chunk_size=60, chunk_overlap=10)
+        text = "\n\n".join(f"Paragraph {i} " * (i % 4 + 1) for i in range(30)) + "\n\n\n\nTail\n"
+        path = tmp_path / "doc.md"
+        path.write_text(text, encoding="utf-8")
+
+        chunks = list(loader.iter_chunks(str(path), buffer_size=buffer_size))
+
+        assert chunks == loader.chunk_text(text)
+        assert len(chunks) > 5
+
+    def test_chunk_offsets_are_absolute(self):
+        """Test char_start and char_end locate each chunk in the document"""
+        loader = DocumentLoader(chunk_size=50, chunk_overlap=10)
+        text = "\n\n\n\nIntro.\n\n" + "\n\n".join("Sentence %d here." % i for i in range(20))
+        chunks = loader.chunk_text(text)
+
+        assert chunks[0]['char_start'] == 4
+        for chunk in chunks:
+            assert text[chunk['char_start']:chunk['char_end']].strip() == chunk['text']
+
+    def test_parallel_loader_preserves_order(self, tmp_path):
+        """Test documents loaded by worker processes come back in input order"""
+        from parallel_loading import ParallelLoader
+
+        loader = DocumentLoader(chunk_size=40, chunk_overlap=5)
+        paths = []
+        for i in range(12):
+            path = tmp_path / f"doc{i}.md"
+            path.write_text("\n\n".join(f"Document {i} paragraph {j}." for j in range(i + 1)), encoding="utf-8")
+            paths.append(str(path))
+
+        with ParallelLoader(chunk_size=40, chunk_overlap=5, num_workers=3, prefetch=2) as pool:
+            results = list(pool.imap(paths))
+
+        assert [path for path, _ in results] == paths
+        assert [chunks for _, chunks in results] == [loader.load_and_chunk(path) for path in paths]
+
+    def test_token_chunking(self, tmp_path):
+        """Test chunks are sized in tokens and record their exact token count"""
+        tokenizer = word_tokenizer()
+        loader = DocumentLoader(chunk_size=20, chunk_overlap=5, tokenizer=tokenizer)
+        text = "\n\n".join(" ".join(f"w{i}{j}" for j in range(8)) for i in range(10))
+        chunks = loader.chunk_text(text)
+
+        assert len(chunks) == 9
+        for chunk in chunks:
+            assert chunk['token_count'] == len(tokenizer(chunk['text'], add_special_tokens=False)['input_ids'])
+            assert chunk['token_count'] <= 20
+            assert text[chunk['char_start']:chunk['char_end']].strip() == chunk['text']
+        # The last 5 tokens of each chunk start the next one
+        assert chunks[1]['text'].startswith("w13 w14 w15 w16 w17")
+
+        path = tmp_path / "doc.md"
+        path.write_text(text, encoding="utf-8")
+        assert list(loader.iter_chunks(str(path), buffer_size=7)) == chunks
+
+    def test_token_chunking_requires_fast_tokenizer(self):
+        """Test a slow tokenizer is rejected"""
+        with pytest.raises(ValueError):
+            DocumentLoader(tokenizer=object())
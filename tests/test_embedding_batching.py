@@ -0,0 +1,77 @@
+"""Unit tests for token-budget embedding batching"""
+from types import SimpleNamespace
+
+import numpy as np
+from embedding_batching import (
+    encode_in_token_batches, padding_efficiency, token_budget_batches, token_lengths
+)
+from vector_store import VectorStore
+
+
+class TestTokenBudgetBatches:
+    """Test suite for length-bucketed batching"""
+
+    def test_batches_respect_budget(self):
+        """Test every batch's padded size fits the token budget"""
+        lengths = np.array([5, 120, 7, 64, 9, 300, 64, 6])
+        batches = token_budget_batches(lengths, token_budget=256)
+
+        assert sorted(np.concatenate(batches).tolist()) == list(range(len(lengths)))
+        for batch in batches:
+            assert len(batch) == 1 or len(batch) * lengths[batch].max() <= 256
+
+    def test_oversized_text_gets_own_batch(self):
+        """Test a text longer than the budget is batched alone"""
+        batches = token_budget_batches(np.array([10, 500, 10]), token_budget=100)
+
+        assert [batch.tolist() for batch in batches] == [[0, 2], [1]]
+
+    def test_sorting_reduces_padding(self):
+        """Test length bucketing beats fixed batches in the original order"""
+        lengths = np.array([4, 200, 5, 180, 6, 190, 3, 210])
+        bucketed = token_budget_batches(lengths, token_budget=420)
+        fixed = [np.arange(0, 4), np.arange(4, 8)]
+
+        assert padding_efficiency(lengths, bucketed) > padding_efficiency(lengths, fixed)
+
+    def test_empty_input(self):
+        """Test no texts produce no batches"""
+        assert token_budget_batches(np.zeros(0, dtype=np.int64), 100) == []
+
+    def test_lengths_are_counted_and_truncated(self):
+        """Test lengths come from the Rust tokenizer plus special tokens, capped at the model's limit"""
+        # One token per character, as for CJK text
+        backend = SimpleNamespace(
+            encode_batch_fast=lambda texts, add_special_tokens: [list(text) for text in texts]
+        )
+        tokenizer = SimpleNamespace(
+            backend_tokenizer=backend, model_max_length=512, num_special_tokens_to_add=lambda: 2
+        )
+        texts = ["雷" * 40, "达" * 4000]
+
+        model = SimpleNamespace(max_seq_length=256, tokenizer=tokenizer)
+        assert token_lengths(model, texts).tolist() == [42, 256]
+
+        model = SimpleNamespace(max_seq_length=None, tokenizer=tokenizer)
+        assert token_lengths(model, texts).tolist() == [42, 512]
+
+        # Tokenizers without a limit report a huge sentinel
+        tokenizer.model_max_length = int(1e30)
+        assert token_lengths(model, texts).tolist() == [42, 4002]
+
+    def test_slow_tokenizer_lengths_are_estimated(self):
+        """Test tokenizers without a Rust backend fall back to estimating from characters"""
+        model = SimpleNamespace(max_seq_length=256, tokenizer=SimpleNamespace(model_max_length=512))
+        assert token_lengths(model, ["a" * 40, "b" * 4000]).tolist() == [12, 256]
+
+    def test_encode_restores_order(self):
+        """Test embeddings come back in input order"""
+        model = VectorStore().embedding_model
+        texts = ["a much longer text about radar calibration procedures", "short", "medium length text"]
+
+        embeddings, stats = encode_in_token_batches(model, texts, token_budget=8)
+        expected = model.encode(texts, convert_to_numpy=True)
+
+        np.testing.assert_allclose(embeddings, expected, rtol=1e-5, atol=1e-6)
+        assert stats['num_texts'] == 3
+        assert 0 < stats['padding_efficiency'] <= 1
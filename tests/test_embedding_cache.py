@@ -0,0 +1,150 @@
+"""Unit tests for EmbeddingCache class"""
+import os
+
+import numpy as np
+import pytest
+from embedding_cache import EmbeddingCache
+
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def random_embeddings(n, dim=8, seed=0):
+    return np.random.default_rng(seed).random((n, dim), dtype=np.float32)
+
+
+class TestEmbeddingCache:
+    """Test suite for EmbeddingCache"""
+
+    def test_empty_cache_reports_all_misses(self, tmp_path):
+        """Test lookup on an empty cache"""
+        cache = EmbeddingCache(str(tmp_path), MODEL)
+        embeddings, misses = cache.lookup(["a", "b"])
+
+        assert embeddings is None
+        assert misses == [0, 1]
+
+    def test_put_and_lookup(self, tmp_path):
+        """Test cached vectors are returned for known texts"""
+        cache = EmbeddingCache(str(tmp_path), MODEL)
+        vectors = random_embeddings(2)
+        cache.put(["first", "second"], vectors)
+
+        embeddings, misses = cache.lookup(["second", "new", "first"])
+
+        assert misses == [1]
+        np.testing.assert_array_equal(embeddings[0], vectors[1])
+        np.testing.assert_array_equal(embeddings[2], vectors[0])
+
+    def test_persistence(self, tmp_path):
+        """Test cache survives reopening after flush"""
+        cache = EmbeddingCache(str(tmp_path), MODEL)
+        vectors = random_embeddings(3)
+        cache.put(["a", "b", "c"], vectors)
+        cache.flush()
+
+        reopened = EmbeddingCache(str(tmp_path), MODEL)
+        embeddings, misses = reopened.lookup(["a", "b", "c"])
+
+        assert len(reopened) == 3
+        assert misses == []
+        np.testing.assert_array_equal(embeddings, vectors)
+
+    def test_keys_depend_on_model(self, tmp_path):
+        """Test that different models never share entries"""
+        cache = EmbeddingCache(str(tmp_path), MODEL)
+        cache.put(["a"], random_embeddings(1))
+        cache.flush()
+
+        other = EmbeddingCache(str(tmp_path), "other-model")
+        _, misses = other.lookup(["a"])
+
+        assert misses == [0]
+
+    def test_duplicate_texts_stored_once(self, tmp_path):
+        """Test duplicate texts in a batch occupy one row"""
+        cache = EmbeddingCache(str(tmp_path), MODEL)
+        cache.put(["a", "a", "b"], random_embeddings(3))
+        cache.put(["a"], random_embeddings(1, seed=1))
+
+        assert len(cache) == 2
+
+    def test_grows_beyond_initial_capacity(self, tmp_path):
+        """Test the vector file grows as entries are added"""
+        cache = EmbeddingCache(str(tmp_path), MODEL, initial_capacity=4)
+        texts = [f"text {i}" for i in range(10)]
+        vectors = random_embeddings(10)
+        cache.put(texts, vectors)
+
+        embeddings, misses = cache.lookup(texts)
+
+        assert cache.capacity >= 10
+        assert misses == []
+        np.testing.assert_array_equal(embeddings, vectors)
+
+    def test_lru_eviction(self, tmp_path):
+        """Test least recently used entries are evicted first"""
+        cache = EmbeddingCache(str(tmp_path), MODEL, max_entries=3, initial_capacity=2)
+        vectors = random_embeddings(3)
+        cache.put(["a", "b", "c"], vectors)
+
+        # Touch "a" so "b" becomes the least recently used entry
+        cache.lookup(["a"])
+        cache.put(["d"], random_embeddings(1, seed=1))
+
+        embeddings, misses = cache.lookup(["a", "b", "c", "d"])
+
+        assert len(cache) == 3
+        assert misses == [1]
+        np.testing.assert_array_equal(embeddings[0], vectors[0])
+        np.testing.assert_array_equal(embeddings[2], vectors[2])
+
+    def test_compact_trims_file(self, tmp_path):
+        """Test compaction keeps vectors and shrinks capacity"""
+        cache = EmbeddingCache(str(tmp_path), MODEL, initial_capacity=2)
+        texts = [f"text {i}" for i in range(20)]
+        vectors = random_embeddings(20)
+        cache.put(texts, vectors)
+        cache.evict(15)
+
+        assert len(cache) == 5
+        assert cache.capacity < 20
+
+        embeddings, misses = cache.lookup(texts[15:])
+        assert misses == []
+        np.testing.assert_array_equal(embeddings, vectors[15:])
+
+    def test_compact_survives_reopening(self, tmp_path):
+        """Test a compacted cache reads back correctly and drops the previous files"""
+        cache = EmbeddingCache(str(tmp_path), MODEL, initial_capacity=2)
+        texts = [f"text {i}" for i in range(10)]
+        vectors = random_embeddings(10)
+        cache.put(texts, vectors)
+        cache.flush()
+        cache.evict(4)
+
+        reopened = EmbeddingCache(str(tmp_path), MODEL)
+        embeddings, misses = reopened.lookup(texts)
+        assert misses == [0, 1, 2, 3]
+        np.testing.assert_array_equal(embeddings[4:], vectors[4:])
+        assert sorted(os.listdir(cache.path)) == ["keys.1.npy", "last_used.1.npy", "meta.json", "vectors.1.f32"]
+
+    def test_crash_during_compact_keeps_previous_cache(self, tmp_path, monkeypatch):
+        """Test a crash before compaction is recorded leaves the previous cache consistent"""
+        cache = EmbeddingCache(str(tmp_path), MODEL, initial_capacity=2)
+        texts = [f"text {i}" for i in range(10)]
+        vectors = random_embeddings(10)
+        cache.put(texts, vectors)
+        cache.flush()
+
+        def crash():
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(cache, "flush", crash)
+        with pytest.raises(KeyboardInterrupt):
+            cache.evict(4)
+
+        reopened = EmbeddingCache(str(tmp_path), MODEL)
+        embeddings, misses = reopened.lookup(texts)
+        assert misses == []
+        np.testing.assert_array_equal(embeddings, vectors)
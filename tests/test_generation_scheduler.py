@@ -0,0 +1,123 @@
+"""Unit tests for GenerationScheduler"""
+import threading
+
+import pytest
+import torch
+from transformers import LlamaConfig, LlamaForCausalLM
+
+from generation_scheduler import GenerationScheduler
+
+
+VOCAB_SIZE = 64
+EOS = 1
+
+
+@pytest.fixture(scope="module")
+def model():
+    """Tiny randomly initialized causal LM"""
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=VOCAB_SIZE, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=256
+    )
+    return LlamaForCausalLM(config).eval()
+
+
+@pytest.fixture
+def scheduler(model):
+    scheduler = GenerationScheduler(model, "cpu", max_batch_size=3)
+    yield scheduler
+    scheduler.close()
+
+
+def prompts(count):
+    generator = torch.Generator().manual_seed(1)
+    lengths = torch.randint(3, 20, (count,), generator=generator)
+    return [torch.randint(2, VOCAB_SIZE, (int(length),), generator=generator) for length in lengths]
+
+
+def greedy(model, input_ids, max_new_tokens):
+    """Reference answer from generate()"""
+    outputs = model.generate(
+        input_ids[None], attention_mask=torch.ones_like(input_ids[None]), max_new_tokens=max_new_tokens,
+        do_sample=False, repetition_penalty=1.1, eos_token_id=EOS, pad_token_id=EOS
+    )
+    return outputs[0, len(input_ids):].tolist()
+
+
+class TestGenerationScheduler:
+    """Test suite for continuous batching"""
+
+    def test_matches_generate(self, model, scheduler):
+        """Test concurrent requests joining and leaving the batch get generate()'s answers"""
+        lengths = [4, 30, 9, 22, 1, 15, 6]
+        requests = [
+            scheduler.submit(
+                input_ids, max_new_tokens=length, do_sample=False,
+                repetition_penalty=1.1, eos_token_id=EOS, pad_token_id=EOS
+            )
+            for input_ids, length in zip(prompts(len(lengths)), lengths)
+        ]
+
+        for request, input_ids, length in zip(requests, prompts(len(lengths)), lengths):
+            assert request.result(timeout=60).tolist() == greedy(model, input_ids, length)
+
+    def test_per_request_parameters(self, model, scheduler):
+        """Test each request keeps its own sampling parameters and token limit"""
+        input_ids = prompts(1)[0]
+        sampled = scheduler.submit(input_ids, max_new_tokens=12, temperature=5.0, top_k=1, eos_token_id=EOS)
+        short = scheduler.submit(input_ids, max_new_tokens=3, do_sample=False, eos_token_id=EOS)
+
+        # Top-1 sampling is greedy whatever the temperature
+        expected = model.generate(
+            input_ids[None], attention_mask=torch.ones_like(input_ids[None]),
+            max_new_tokens=12, do_sample=False, eos_token_id=EOS, pad_token_id=EOS
+        )[0, len(input_ids):].tolist()
+        assert sampled.result(timeout=60).tolist() == expected
+        assert short.result(timeout=60).tolist() == expected[:3]
+
+    def test_stop_event_ends_request(self, scheduler):
+        """Test a request stops early once its event is set"""
+        stop = threading.Event()
+        stop.set()
+        request = scheduler.submit(prompts(1)[0], max_new_tokens=50, stop_event=stop)
+        assert len(request.result(timeout=60)) <= 1
+
+    def test_streamer_receives_prompt_then_tokens(self, scheduler):
+        """Test the streamer protocol matches generate()'s"""
+        class Recorder:
+            def __init__(self):
+                self.values, self.ended = [], False
+
+            def put(self, value):
+                self.values.append(value.tolist())
+
+            def end(self):
+                self.ended = True
+
+        recorder = Recorder()
+        input_ids = prompts(1)[0]
+        tokens = scheduler.submit(input_ids, max_new_tokens=5, streamer=recorder).result(timeout=60)
+
+        assert recorder.values[0] == input_ids.tolist()
+        assert [value[0] for value in recorder.values[1:]] == tokens.tolist()
+        assert recorder.ended
+
+    def test_prefix_layers_skip_prefill(self, model, scheduler):
+        """Test starting from a prompt's cached key/values gives the same answer"""
+        input_ids = torch.cat(prompts(2))
+        kwargs = dict(max_new_tokens=10, do_sample=False, eos_token_id=EOS, pad_token_id=EOS)
+
+        first = scheduler.submit(input_ids, return_prompt_layers=True, **kwargs)
+        expected = first.result(timeout=60).tolist()
+        assert first.prompt_layers[0][0].shape[2] == len(input_ids)
+
+        prefix_layers = [(keys[:, :, :-3], values[:, :, :-3]) for keys, values in first.prompt_layers]
+        second = scheduler.submit(input_ids, prefix_layers=prefix_layers, **kwargs)
+        assert second.result(timeout=60).tolist() == expected
+
+    def test_closed_scheduler_rejects_requests(self, scheduler):
+        """Test submit() fails after close()"""
+        scheduler.close()
+        with pytest.raises(RuntimeError):
+            scheduler.submit(prompts(1)[0])
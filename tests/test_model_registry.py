@@ -0,0 +1,68 @@
+"""Unit tests for EmbeddingModelRegistry class"""
+import pytest
+from model_registry import EmbeddingModelRegistry, embedding_models, model_key
+from vector_store import VectorStore
+
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class TestEmbeddingModelRegistry:
+    """Test suite for EmbeddingModelRegistry"""
+
+    def test_loads_lazily_and_once(self):
+        """Test a model is loaded on first use and then reused"""
+        registry = EmbeddingModelRegistry()
+        assert registry.loaded_models() == []
+
+        model = registry.get(MODEL)
+
+        assert registry.get(MODEL) is model
+        assert registry.loaded_models() == [MODEL]
+
+    def test_warm_up(self):
+        """Test warm-up loads the requested models"""
+        registry = EmbeddingModelRegistry()
+        registry.warm_up([MODEL, "other-model"])
+
+        assert sorted(registry.loaded_models()) == sorted([MODEL, "other-model"])
+
+    def test_release(self):
+        """Test released models are dropped and reloaded on demand"""
+        registry = EmbeddingModelRegistry()
+        model = registry.get(MODEL)
+        registry.get("other-model")
+
+        assert registry.release(MODEL) == [MODEL]
+        assert registry.release("unknown-model") == []
+        assert registry.loaded_models() == ["other-model"]
+        assert registry.get(MODEL) is not model
+
+        assert sorted(registry.release()) == sorted([MODEL, "other-model"])
+        assert registry.loaded_models() == []
+
+    def test_vector_stores_share_model(self):
+        """Test vector stores use the process-wide model instance"""
+        first = VectorStore()
+        second = VectorStore()
+
+        assert first.embedding_model is second.embedding_model
+        assert first.embedding_model is embedding_models.get(MODEL)
+
+    def test_model_key(self):
+        """Test non-default backends get their own key"""
+        assert model_key(MODEL) == MODEL
+        assert model_key(MODEL, "onnx-int8") == f"{MODEL}@onnx-int8"
+
+    def test_release_drops_all_backends(self):
+        """Test releasing a model name drops every backend of it"""
+        registry = EmbeddingModelRegistry()
+        registry._models[model_key(MODEL, "onnx-int8")] = object()
+        registry.get(MODEL)
+
+        assert sorted(registry.release(MODEL)) == sorted([MODEL, f"{MODEL}@onnx-int8"])
+
+    def test_unknown_backend(self):
+        """Test unknown backends are rejected"""
+        with pytest.raises(ValueError, match="Unknown embedding backend"):
+            EmbeddingModelRegistry().get(MODEL, "tensorrt")
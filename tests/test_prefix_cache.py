@@ -0,0 +1,81 @@
+"""Unit tests for PrefixKVCache"""
+import pytest
+import torch
+
+from prefix_cache import PrefixKVCache
+
+
+def layers_for(tokens, num_layers=2):
+    """Fake key/values whose entries encode the token ids, shaped (1, heads, length, head_dim)"""
+    values = tokens.float().reshape(1, 1, -1, 1).expand(1, 2, -1, 4).contiguous()
+    return [(values.clone(), -values.clone()) for _ in range(num_layers)]
+
+
+def tokens(*values):
+    return torch.tensor(values, dtype=torch.long)
+
+
+class TestPrefixKVCache:
+    """Test suite for the prefix key/value cache"""
+
+    def test_longest_prefix_is_found(self):
+        """Test the cached prompt sharing the most tokens wins, even past a block boundary"""
+        cache = PrefixKVCache(max_bytes=10**6, block_size=4)
+        header = list(range(100, 108))
+        cache.put(tokens(*header, 1, 2), layers_for(tokens(*header, 1, 2)))
+        cache.put(tokens(*header, 5, 6, 7, 8, 9, 10), layers_for(tokens(*header, 5, 6, 7, 8, 9, 10)))
+
+        length, layers = cache.lookup(tokens(*header, 5, 6, 7, 8, 9, 42, 43))
+        assert length == 13
+        assert layers[0][0].shape == (1, 2, 13, 4)
+        assert layers[0][0][0, 0, :, 0].tolist() == [*header, 5, 6, 7, 8, 9]
+
+    def test_last_token_is_left_to_prefill(self):
+        """Test an identical prompt still leaves its last token uncached"""
+        cache = PrefixKVCache(max_bytes=10**6, block_size=4)
+        prompt = tokens(*range(12))
+        cache.put(prompt, layers_for(prompt))
+        length, _ = cache.lookup(prompt)
+        assert length == 11
+
+    def test_miss(self):
+        """Test prompts sharing less than a block are misses"""
+        cache = PrefixKVCache(max_bytes=10**6, block_size=4)
+        cache.put(tokens(*range(12)), layers_for(tokens(*range(12))))
+        assert cache.lookup(tokens(0, 1, 2, 9, 9, 9)) == (0, None)
+        assert cache.lookup(tokens(0, 1)) == (0, None)
+
+    def test_memory_cap_evicts_least_recently_used(self):
+        """Test entries are evicted by recency once the byte cap is exceeded"""
+        prompts = [tokens(i, *range(1, 8)) for i in range(3)]
+        entry_bytes = sum(keys.nbytes + values.nbytes for keys, values in layers_for(prompts[0]))
+        cache = PrefixKVCache(max_bytes=2 * entry_bytes, block_size=4)
+
+        cache.put(prompts[0], layers_for(prompts[0]))
+        cache.put(prompts[1], layers_for(prompts[1]))
+        assert cache.lookup(prompts[0])[0] == 7  # Now most recently used
+        cache.put(prompts[2], layers_for(prompts[2]))
+
+        assert len(cache) == 2
+        assert cache.nbytes <= cache.max_bytes
+        assert cache.lookup(prompts[1]) == (0, None)
+        assert cache.lookup(prompts[0])[0] == 7
+
+    def test_extended_prompt_replaces_its_prefix(self):
+        """Test a cached prompt that is a prefix of a new one is replaced by it"""
+        cache = PrefixKVCache(max_bytes=10**6, block_size=4)
+        cache.put(tokens(*range(8)), layers_for(tokens(*range(8))))
+        cache.put(tokens(*range(12)), layers_for(tokens(*range(12))))
+        assert len(cache) == 1
+        assert cache.lookup(tokens(*range(20)))[0] == 12
+
+    def test_oversized_entry_is_not_stored(self):
+        """Test a prompt larger than the whole cap is skipped"""
+        cache = PrefixKVCache(max_bytes=16, block_size=4)
+        cache.put(tokens(*range(8)), layers_for(tokens(*range(8))))
+        assert len(cache) == 0
+
+    def test_invalid_size(self):
+        """Test a non-positive cap is rejected"""
+        with pytest.raises(ValueError):
+            PrefixKVCache(max_bytes=0)
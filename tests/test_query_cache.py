@@ -0,0 +1,89 @@
+"""Unit tests for QueryEmbeddingCache class"""
+import threading
+import numpy as np
+import pytest
+from query_cache import QueryEmbeddingCache, normalize_query
+
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class TestQueryEmbeddingCache:
+    """Test suite for QueryEmbeddingCache"""
+
+    def test_normalize_query(self):
+        """Test whitespace is collapsed and case preserved"""
+        assert normalize_query("  What is\tradar \n calibration? ") == "What is radar calibration?"
+        assert normalize_query("Radar") != normalize_query("radar")
+
+    def test_hit_and_miss(self):
+        """Test lookups count hits and misses"""
+        cache = QueryEmbeddingCache(max_size=4)
+        key = cache.key(MODEL, "What is radar calibration?")
+
+        assert cache.get(key) is None
+        cache.put(key, np.ones(3, dtype=np.float32))
+
+        np.testing.assert_array_equal(cache.get(cache.key(MODEL, " What is  radar calibration?")), np.ones(3))
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_keys_depend_on_model(self):
+        """Test different models never share entries"""
+        cache = QueryEmbeddingCache()
+        cache.put(cache.key(MODEL, "query"), np.ones(3))
+
+        assert cache.get(cache.key("other-model", "query")) is None
+
+    def test_lru_eviction(self):
+        """Test the least recently used query is evicted first"""
+        cache = QueryEmbeddingCache(max_size=2)
+        for query in ("a", "b"):
+            cache.put(cache.key(MODEL, query), np.zeros(3))
+        cache.get(cache.key(MODEL, "a"))
+        cache.put(cache.key(MODEL, "c"), np.zeros(3))
+
+        assert len(cache) == 2
+        assert cache.get(cache.key(MODEL, "b")) is None
+        assert cache.get(cache.key(MODEL, "a")) is not None
+
+    def test_ttl_expiry(self, monkeypatch):
+        """Test entries expire after the TTL"""
+        now = [100.0]
+        monkeypatch.setattr("query_cache.time.monotonic", lambda: now[0])
+        cache = QueryEmbeddingCache(ttl_seconds=10)
+        key = cache.key(MODEL, "query")
+        cache.put(key, np.zeros(3))
+
+        now[0] += 5
+        assert cache.get(key) is not None
+        now[0] += 10
+        assert cache.get(key) is None
+        assert len(cache) == 0
+
+    def test_eviction_during_lookup(self):
+        """Test another thread evicting the entry being looked up cannot break the lookup"""
+        cache = QueryEmbeddingCache(max_size=1)
+        key, other = cache.key(MODEL, "a"), cache.key(MODEL, "b")
+        cache.put(key, np.ones(3))
+        entries_get = cache.entries.get
+        thread = threading.Thread(target=cache.put, args=(other, np.zeros(3)))
+
+        def get_then_evict(lookup_key):
+            entry = entries_get(lookup_key)
+            # A concurrent put of another query waits until the lookup has finished
+            thread.start()
+            thread.join(timeout=0.2)
+            return entry
+
+        cache.entries.get = get_then_evict
+        np.testing.assert_array_equal(cache.get(key), np.ones(3))
+        del cache.entries.get
+        thread.join()
+
+        assert cache.get(other) is not None
+        assert len(cache) == 1
+
+    def test_invalid_size(self):
+        """Test a cache needs room for at least one entry"""
+        with pytest.raises(ValueError):
+            QueryEmbeddingCache(max_size=0)
@@ -0,0 +1,105 @@
+"""Unit tests for SourceManifest and source expansion"""
+import os
+
+from source_manifest import SourceManifest, expand_sources
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return os.path.normpath(str(path))
+
+
+class TestExpandSources:
+    """Test suite for expand_sources"""
+
+    def test_directories_globs_and_files(self, tmp_path):
+        """Test directories are searched recursively and globs are expanded"""
+        a = write(tmp_path / "docs" / "a.md", "A")
+        b = write(tmp_path / "docs" / "nested" / "b.txt", "B")
+        write(tmp_path / "docs" / "image.png", "not text")
+        c = write(tmp_path / "manuals" / "x" / "c.md", "C")
+        d = write(tmp_path / "single.rst", "D")
+
+        sources = expand_sources([
+            str(tmp_path / "docs"),
+            str(tmp_path / "manuals" / "**" / "*.md"),
+            d,
+            a,
+        ])
+
+        assert sources == sorted([a, b, c, d])
+
+
+class TestSourceManifest:
+    """Test suite for SourceManifest"""
+
+    def test_new_files_are_added(self, tmp_path):
+        """Test files missing from the manifest are reported as added"""
+        a = write(tmp_path / "a.md", "A")
+        changes = SourceManifest().diff([a])
+
+        assert changes == {'added': [a], 'changed': [], 'deleted': [], 'unchanged': []}
+
+    def test_detects_changed_and_deleted_files(self, tmp_path):
+        """Test edits and removals are detected after a round trip through disk"""
+        a = write(tmp_path / "a.md", "A")
+        b = write(tmp_path / "b.md", "B")
+        c = write(tmp_path / "c.md", "C")
+        manifest = SourceManifest({'chunk_size': 500})
+        manifest.diff([a, b, c])
+        for path in (a, b, c):
+            manifest.record(path)
+        manifest.save(str(tmp_path / "index" / "manifest.json"))
+
+        write(tmp_path / "b.md", "B, edited")
+        os.remove(c)
+        loaded = SourceManifest.load(str(tmp_path / "index" / "manifest.json"))
+        changes = loaded.diff(expand_sources([str(tmp_path)]))
+
+        assert loaded.settings == {'chunk_size': 500}
+        assert changes == {'added': [], 'changed': [b], 'deleted': [c], 'unchanged': [a]}
+
+    def test_deleted_listed_file_is_reported_deleted(self, tmp_path):
+        """Test a deleted file that is listed explicitly syncs as deleted instead of failing"""
+        a = write(tmp_path / "a.md", "A")
+        b = write(tmp_path / "b.md", "B")
+        manifest = SourceManifest()
+        manifest.diff(expand_sources([a, b]))
+        for path in (a, b):
+            manifest.record(path)
+
+        os.remove(b)
+        assert expand_sources([a, b]) == [a]
+        assert manifest.diff(expand_sources([a, b])) == {'added': [], 'changed': [], 'deleted': [b], 'unchanged': [a]}
+        # A file deleted after the sources were expanded counts as deleted too
+        os.remove(a)
+        assert manifest.diff([a, b]) == {'added': [], 'changed': [], 'deleted': [a, b], 'unchanged': []}
+
+    def test_touched_file_is_unchanged(self, tmp_path):
+        """Test a new modification time with the same content is not a change"""
+        a = write(tmp_path / "a.md", "A")
+        manifest = SourceManifest()
+        manifest.record(a)
+        stat = os.stat(a)
+        os.utime(a, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert manifest.diff([a])['unchanged'] == [a]
+        # The new timestamp is kept, so the next diff does not hash the file again
+        assert manifest.entries[a]['mtime_ns'] == stat.st_mtime_ns + 10**9
+
+    def test_records_content_seen_by_diff(self, tmp_path):
+        """Test an edit made while a file is being indexed is picked up by the next diff"""
+        a = write(tmp_path / "a.md", "A")
+        manifest = SourceManifest()
+        manifest.diff([a])
+        write(tmp_path / "a.md", "A, edited during indexing")
+        manifest.record(a)
+
+        assert manifest.diff([a])['changed'] == [a]
+
+    def test_load_missing_manifest(self, tmp_path):
+        """Test loading a manifest that does not exist gives an empty one"""
+        manifest = SourceManifest.load(str(tmp_path / "manifest.json"))
+        assert manifest.entries == {}
+        assert manifest.settings == {}
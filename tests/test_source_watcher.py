@@ -0,0 +1,167 @@
+"""Unit tests for SourceWatcher"""
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+from source_watcher import SourceWatcher, _ChangeHandler, watch_roots
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def file_event(event_type, path):
+    """A watchdog file event, or a stand-in with the same attributes when watchdog is missing"""
+    try:
+        from watchdog.events import FileModifiedEvent, FileOpenedEvent
+    except ImportError:
+        return SimpleNamespace(event_type=event_type, src_path=path, is_directory=False)
+    return {'opened': FileOpenedEvent, 'modified': FileModifiedEvent}[event_type](path)
+
+
+class TestWatchRoots:
+    """Test suite for watch_roots"""
+
+    def test_directories_globs_and_files(self, tmp_path):
+        """Test each kind of source is observed from the right directory"""
+        (tmp_path / "docs").mkdir()
+        (tmp_path / "manuals").mkdir()
+        single = tmp_path / "single.md"
+        single.write_text("A", encoding="utf-8")
+
+        roots = watch_roots([
+            str(tmp_path / "docs"),
+            str(tmp_path / "manuals" / "**" / "*.md"),
+            str(single),
+            str(tmp_path / "missing")
+        ])
+
+        assert roots == sorted([
+            (str(tmp_path / "docs"), True),
+            (str(tmp_path / "manuals"), True),
+            (str(tmp_path), False)
+        ])
+
+
+class TestSourceWatcher:
+    """Test suite for SourceWatcher in polling mode"""
+
+    def test_burst_of_changes_runs_once(self, tmp_path):
+        """Test several quick changes are applied with a single update"""
+        calls = []
+        watcher = SourceWatcher([str(tmp_path)], lambda: calls.append(time.monotonic()),
+                                debounce_seconds=0.3, poll_interval=0.05, use_events=False)
+        watcher.start()
+        try:
+            assert watcher.mode == "polling"
+            for i in range(5):
+                (tmp_path / f"doc{i}.md").write_text(f"Document {i}", encoding="utf-8")
+                time.sleep(0.06)
+
+            assert wait_until(lambda: calls)
+            time.sleep(0.5)
+            assert len(calls) == 1
+        finally:
+            watcher.stop()
+
+    def test_ignores_other_file_types(self, tmp_path):
+        """Test files that are not documents do not trigger updates"""
+        calls = []
+        watcher = SourceWatcher([str(tmp_path)], lambda: calls.append(1),
+                                debounce_seconds=0.05, poll_interval=0.05, use_events=False)
+        watcher.start()
+        try:
+            (tmp_path / "image.png").write_bytes(b"not text")
+            (tmp_path / "manifest.json").write_text("{}", encoding="utf-8")
+            time.sleep(0.4)
+            assert calls == []
+        finally:
+            watcher.stop()
+
+    def test_reads_do_not_trigger_update(self, tmp_path):
+        """Test only events that can change a document are forwarded"""
+        calls = []
+        watcher = SourceWatcher([str(tmp_path)], lambda: None)
+        watcher.notify = lambda: calls.append(1)
+        handler = _ChangeHandler(watcher)
+        path = str(tmp_path / "doc.md")
+
+        handler.dispatch(file_event('opened', path))
+        assert calls == []
+
+        handler.dispatch(file_event('modified', path))
+        assert calls == [1]
+
+    def test_deleted_files_trigger_update(self, tmp_path):
+        """Test removing a document is reported as a change"""
+        doc = tmp_path / "doc.md"
+        doc.write_text("Document", encoding="utf-8")
+        calls = []
+        watcher = SourceWatcher([str(tmp_path)], lambda: calls.append(1),
+                                debounce_seconds=0.05, poll_interval=0.05, use_events=False)
+        watcher.start()
+        try:
+            os.remove(doc)
+            assert wait_until(lambda: calls)
+        finally:
+            watcher.stop()
+
+    def test_continuous_changes_run_after_max_delay(self, tmp_path):
+        """Test updates are not postponed forever while changes keep arriving"""
+        calls = []
+        watcher = SourceWatcher([str(tmp_path)], lambda: calls.append(1), debounce_seconds=10.0,
+                                max_delay_seconds=0.3, poll_interval=60.0, use_events=False)
+        watcher.start()
+        try:
+            deadline = time.monotonic() + 1.0
+            while time.monotonic() < deadline and not calls:
+                watcher.notify()
+                time.sleep(0.02)
+            assert calls
+        finally:
+            watcher.stop()
+
+    def test_failed_update_keeps_watching(self, tmp_path):
+        """Test an exception in the update callback does not stop the worker"""
+        calls = []
+
+        def on_change():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("index update failed")
+
+        watcher = SourceWatcher([str(tmp_path)], on_change, debounce_seconds=0.05,
+                                poll_interval=60.0, use_events=False)
+        watcher.start()
+        try:
+            watcher.notify()
+            assert wait_until(lambda: len(calls) == 1)
+            watcher.notify()
+            assert wait_until(lambda: len(calls) == 2)
+        finally:
+            watcher.stop()
+
+    def test_stop_waits_for_running_update(self, tmp_path):
+        """Test stop() returns only after an update in progress finished"""
+        started = threading.Event()
+        finished = []
+
+        def on_change():
+            started.set()
+            time.sleep(0.2)
+            finished.append(1)
+
+        watcher = SourceWatcher([str(tmp_path)], on_change, debounce_seconds=0.0,
+                                poll_interval=60.0, use_events=False)
+        watcher.start()
+        watcher.notify()
+        assert started.wait(5.0)
+        watcher.stop()
+
+        assert finished == [1]
@@ -0,0 +1,107 @@
+"""Unit tests for SpeculativeDecoder"""
+import copy
+
+import pytest
+import torch
+from transformers import LlamaConfig, LlamaForCausalLM
+
+from speculative_decoding import SpeculativeDecoder
+
+
+VOCAB_SIZE = 64
+EOS = 1
+
+
+def tiny_model(seed, vocab_size=VOCAB_SIZE, num_hidden_layers=2):
+    """Tiny randomly initialized causal LM"""
+    torch.manual_seed(seed)
+    config = LlamaConfig(
+        vocab_size=vocab_size, hidden_size=32, intermediate_size=64, num_hidden_layers=num_hidden_layers,
+        num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=256
+    )
+    return LlamaForCausalLM(config).eval()
+
+
+@pytest.fixture(scope="module")
+def model():
+    return tiny_model(0)
+
+
+def prompts(count):
+    generator = torch.Generator().manual_seed(1)
+    return [torch.randint(2, VOCAB_SIZE, (20,), generator=generator) for _ in range(count)]
+
+
+def generate(model, input_ids, **kwargs):
+    """Greedy answer tokens from generate()"""
+    with torch.no_grad():
+        outputs = model.generate(
+            input_ids[None], attention_mask=torch.ones(1, len(input_ids), dtype=torch.long),
+            max_new_tokens=20, do_sample=False, eos_token_id=EOS, pad_token_id=EOS, **kwargs
+        )
+    return outputs[0][len(input_ids):]
+
+
+class TestSpeculativeDecoder:
+    """Test draft model configuration and acceptance accounting"""
+
+    @pytest.mark.parametrize("draft_seed", [None, 7])
+    def test_greedy_answers_unchanged(self, model, draft_seed):
+        """Test verified draft tokens give exactly the main model's greedy answer"""
+        draft = copy.deepcopy(model) if draft_seed is None else tiny_model(draft_seed, num_hidden_layers=1)
+        decoder = SpeculativeDecoder(model, draft, num_draft_tokens=4)
+        try:
+            for input_ids in prompts(3):
+                expected = generate(model, input_ids).tolist()
+                tokens = generate(model, input_ids, **decoder.generation_kwargs())
+                decoder.record(len(tokens))
+                assert tokens.tolist() == expected
+        finally:
+            decoder.close()
+
+        assert decoder.stats['draft_tokens'] > 0
+        assert decoder.stats['generated_tokens'] == 60
+
+    def test_acceptance_counting(self, model):
+        """Test an identical draft is fully accepted and an unrelated one is mostly rejected"""
+        identical = SpeculativeDecoder(model, copy.deepcopy(model), num_draft_tokens=4)
+        try:
+            for input_ids in prompts(2):
+                identical.record(len(generate(model, input_ids, **identical.generation_kwargs())))
+        finally:
+            identical.close()
+        assert identical.acceptance_rate() == 1.0
+        # More than one token per main model pass
+        assert identical.stats['generated_tokens'] > identical.stats['verify_steps']
+
+        unrelated = SpeculativeDecoder(model, tiny_model(7, num_hidden_layers=1), num_draft_tokens=4)
+        try:
+            for input_ids in prompts(2):
+                unrelated.record(len(generate(model, input_ids, **unrelated.generation_kwargs())))
+        finally:
+            unrelated.close()
+        assert unrelated.acceptance_rate() < 0.5
+
+    def test_no_acceptance_rate_before_generation(self, model):
+        """Test the acceptance rate is undefined until the draft proposed tokens"""
+        decoder = SpeculativeDecoder(model, copy.deepcopy(model))
+        decoder.close()
+        assert decoder.acceptance_rate() is None
+
+    def test_close_removes_hooks(self, model):
+        """Test close() stops counting forward passes"""
+        draft = copy.deepcopy(model)
+        decoder = SpeculativeDecoder(model, draft)
+        decoder.close()
+        assert not model._forward_hooks
+        assert not draft._forward_hooks
+
+    def test_different_vocabularies_need_tokenizers(self, model):
+        """Test models with differently sized vocabularies require both tokenizers"""
+        with pytest.raises(ValueError):
+            SpeculativeDecoder(model, tiny_model(0, vocab_size=VOCAB_SIZE * 2))
+
+    def test_invalid_num_draft_tokens(self, model):
+        """Test at least one draft token per step is required"""
+        with pytest.raises(ValueError):
+            SpeculativeDecoder(model, copy.deepcopy(model), num_draft_tokens=0)
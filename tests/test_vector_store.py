@@ -144,7 +144,7 @@ class TestVectorStore:
         # Check files exist
         import os
         assert os.path.exists(os.path.join(save_path, "index.faiss"))
-        assert os.path.exists(os.path.join(save_path, "chunks.pkl"))
+        assert os.path.exists(os.path.join(save_path, "chunks", "store.json"))
 
     def test_load_nonexistent_path(self):
         """Test loading from non-existent path raises error"""
@@ -189,3 +189,579 @@ class TestVectorStore:
 
         assert len(results) == 1
         assert results[0][0]['text'] == unicode_chunks[0]['text']
+
+    def test_embedding_cache_reuses_vectors(self, sample_chunks, tmp_path):
+        """Test cached embeddings match freshly encoded ones and skip the model"""
+        store = VectorStore(embedding_cache_dir=str(tmp_path / "cache"))
+        embeddings1 = store.create_embeddings(sample_chunks)
+
+        # A second store over the same cache should not need the model at all
+        cached_store = VectorStore(embedding_cache_dir=str(tmp_path / "cache"))
+        cached_store._encode = None
+        embeddings2 = cached_store.create_embeddings(sample_chunks)
+
+        np.testing.assert_array_almost_equal(embeddings1, embeddings2)
+
+    def test_add_chunks_appends(self, sample_chunks):
+        """Test adding chunks to an existing index"""
+        store = VectorStore()
+        store.build_index(sample_chunks[:2])
+        added = store.add_chunks(sample_chunks[2:])
+
+        assert added == 1
+        assert store.index.ntotal == 3
+        assert store.num_chunks == 3
+
+        top_chunk, _ = store.search("neural networks", top_k=1)[0]
+        assert "neural networks" in top_chunk['text']
+
+    def test_remove_by_source(self, sample_chunks):
+        """Test removed chunks never come back from search"""
+        store = VectorStore(compact_ratio=1.0)
+        for i, chunk in enumerate(sample_chunks):
+            chunk['source'] = f"doc{i % 2}.md"
+        store.build_index(sample_chunks)
+
+        removed = store.remove_by_source("doc0.md")
+
+        assert removed == 2
+        assert store.num_chunks == 1
+        assert len(store.tombstones) == 2
+
+        results = store.search("machine learning", top_k=3)
+        assert len(results) == 1
+        assert results[0][0]['source'] == "doc1.md"
+
+    def test_update_source(self, sample_chunks):
+        """Test replacing the chunks of one source document"""
+        store = VectorStore(compact_ratio=1.0)
+        for chunk in sample_chunks:
+            chunk['source'] = "doc.md"
+        store.build_index(sample_chunks)
+
+        new_chunk = {'id': 0, 'text': 'Updated chunk about radar calibration', 'char_start': 0, 'char_end': 37}
+        removed, added = store.update_source("doc.md", [new_chunk])
+
+        assert (removed, added) == (3, 1)
+        results = store.search("machine learning", top_k=3)
+        assert [chunk['text'] for chunk, _ in results] == [new_chunk['text']]
+
+    def test_replace_sources_adds_before_removing(self, sample_chunks):
+        """Test replaced chunks stay searchable until their replacements are added"""
+        store = VectorStore(compact_ratio=0.0)
+        for i, chunk in enumerate(sample_chunks):
+            chunk['source'] = f"doc{i % 2}.md"
+        store.build_index(sample_chunks)
+
+        sources_during_add = []
+        add_chunks = store.add_chunks
+
+        def recording_add_chunks(chunks, **kwargs):
+            results = store.search("machine learning", top_k=3)
+            sources_during_add.append(sorted({chunk['source'] for chunk, _ in results}))
+            return add_chunks(chunks, **kwargs)
+
+        store.add_chunks = recording_add_chunks
+        new_chunk = {'id': 0, 'text': 'Updated chunk about radar calibration', 'char_start': 0, 'char_end': 37,
+                     'source': "doc0.md"}
+        removed, added = store.replace_sources(["doc0.md"], [new_chunk])
+
+        assert sources_during_add == [["doc0.md", "doc1.md"]]
+        assert (removed, added) == (2, 1)
+        assert not store.tombstones
+        texts = {chunk['text'] for chunk, _ in store.search("machine learning", top_k=3)}
+        assert texts == {sample_chunks[1]['text'], new_chunk['text']}
+
+    def test_replace_source_stream_resumes_with_stale_ids(self, tmp_path):
+        """Test an interrupted streamed replacement still removes exactly the old chunks on resume"""
+        old = [{'id': i, 'text': f'Old chunk {i}', 'char_start': 0, 'char_end': 11, 'source': f'doc{i % 2}.md'}
+               for i in range(6)]
+        new = [{'id': i, 'text': f'New chunk {i}', 'char_start': 0, 'char_end': 11, 'source': 'doc0.md'}
+               for i in range(10)]
+        checkpoint_dir = str(tmp_path / "build")
+        store = VectorStore(compact_ratio=0.0)
+        store.build_index(old)
+
+        def interrupted():
+            yield from new[:7]
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            store.replace_source_stream(["doc0.md"], interrupted(), batch_size=2, checkpoint_dir=checkpoint_dir,
+                                        checkpoint_every=1)
+        # Nothing was removed before the new chunks were complete
+        assert store.num_chunks == 6 + 6
+
+        resumed = VectorStore(compact_ratio=0.0)
+        cursor = resumed.load_checkpoint(checkpoint_dir)
+        assert cursor['stale'] == [0, 2, 4]
+        removed, consumed = resumed.replace_source_stream(
+            ["doc0.md"], iter(new[cursor['chunks_consumed']:]), stale=cursor['stale'],
+            batch_size=2, start=cursor['chunks_consumed']
+        )
+
+        assert (removed, consumed) == (3, 10)
+        texts = sorted(chunk['text'] for chunk in resumed.chunks)
+        assert texts == sorted(chunk['text'] for chunk in old[1::2] + new)
+
+    def test_dedup_records_aliases(self, sample_chunks):
+        """Test near-duplicate chunks are indexed once and listed as aliases"""
+        store = VectorStore(dedup_threshold=0.8)
+        copies = [dict(sample_chunks[0], source=f"doc{i}.md") for i in range(3)]
+        store.build_index(copies + [dict(sample_chunks[1], source="doc0.md")])
+
+        assert store.num_chunks == 2
+        top_chunk, _ = store.search("machine learning", top_k=1)[0]
+        assert top_chunk['source'] == "doc0.md"
+        assert [alias['source'] for alias in top_chunk['aliases']] == ["doc1.md", "doc2.md"]
+        assert store.memory_footprint()['aliased_chunks'] == 2
+
+    def test_dedup_promotes_alias_on_removal(self, sample_chunks):
+        """Test removing a kept chunk's source indexes one of its aliases instead"""
+        store = VectorStore(dedup_threshold=0.8, compact_ratio=0.0)
+        store.build_index([dict(sample_chunks[0], source=f"doc{i}.md") for i in range(3)])
+
+        store.remove_by_source("doc0.md")
+
+        results = store.search("machine learning", top_k=3)
+        assert len(results) == 1
+        assert results[0][0]['source'] == "doc1.md"
+        assert [alias['source'] for alias in results[0][0]['aliases']] == ["doc2.md"]
+
+    def test_dedup_survives_save_and_load(self, sample_chunks, tmp_path):
+        """Test new chunks are deduplicated against a reloaded index"""
+        store = VectorStore(dedup_threshold=0.8)
+        store.build_index([dict(chunk, source="doc0.md") for chunk in sample_chunks])
+        store.save(str(tmp_path))
+
+        loaded = VectorStore()
+        loaded.load(str(tmp_path))
+        added = loaded.add_chunks([dict(sample_chunks[2], source="doc1.md")])
+
+        assert added == 0
+        assert loaded.num_chunks == 3
+        top_chunk, _ = loaded.search("neural networks", top_k=1)[0]
+        assert top_chunk['aliases'][0]['source'] == "doc1.md"
+
+    def test_compact(self, sample_chunks):
+        """Test compaction drops tombstoned vectors and renumbers chunks"""
+        store = VectorStore(compact_ratio=1.0)
+        for i, chunk in enumerate(sample_chunks):
+            chunk['source'] = f"doc{i}.md"
+        store.build_index(sample_chunks)
+        store.remove_by_source("doc0.md")
+
+        store.compact()
+
+        assert store.index.ntotal == 2
+        assert store.chunks == sample_chunks[1:]
+        assert store.tombstones == set()
+        assert store.source_ids == {"doc1.md": [0], "doc2.md": [1]}
+
+        top_chunk, _ = store.search("neural networks", top_k=1)[0]
+        assert "neural networks" in top_chunk['text']
+
+    def test_automatic_compaction(self, sample_chunks):
+        """Test compaction runs once enough chunks are deleted"""
+        store = VectorStore(compact_ratio=0.5)
+        for i, chunk in enumerate(sample_chunks):
+            chunk['source'] = "doc0.md" if i < 2 else "doc1.md"
+        store.build_index(sample_chunks)
+
+        store.remove_by_source("doc0.md")
+
+        assert store.tombstones == set()
+        assert store.index.ntotal == 1
+
+    def test_save_and_load_with_tombstones(self, sample_chunks, tmp_path):
+        """Test deletions survive a save/load round trip"""
+        store = VectorStore(compact_ratio=1.0)
+        for i, chunk in enumerate(sample_chunks):
+            chunk['source'] = f"doc{i}.md"
+        store.build_index(sample_chunks)
+        store.remove_by_source("doc0.md")
+
+        save_path = str(tmp_path / "vector_store")
+        store.save(save_path)
+        new_store = VectorStore()
+        new_store.load(save_path)
+
+        assert new_store.num_chunks == 2
+        assert new_store.tombstones == {0}
+        results = new_store.search("machine learning", top_k=3)
+        assert all(chunk['source'] != "doc0.md" for chunk, _ in results)
+
+    def test_invalid_index_type(self):
+        """Test unknown index types are rejected"""
+        with pytest.raises(ValueError, match="Unknown index type"):
+            VectorStore(index_type="lsh")
+
+    def test_ivf_falls_back_to_flat(self, sample_chunks):
+        """Test IVF falls back to a flat index on tiny corpora"""
+        store = VectorStore(index_type="ivf")
+        store.build_index(sample_chunks)
+
+        assert store.active_index_type == "flat"
+        assert len(store.search("machine learning", top_k=2)) == 2
+
+    def test_ivf_index(self):
+        """Test IVF index is trained and searchable"""
+        chunks = [
+            {'id': i, 'text': f'Chunk {i} about topic {i % 7}', 'char_start': 0, 'char_end': 10, 'source': f'doc{i % 3}.md'}
+            for i in range(100)
+        ]
+        store = VectorStore(index_type="ivf", nlist=2, nprobe=2)
+        store.build_index(chunks)
+
+        assert store.active_index_type == "ivf"
+        assert store.index.is_trained
+        assert len(store.search("topic 3", top_k=5)) == 5
+
+        store.remove_by_source("doc0.md")
+        store.compact()
+        results = store.search("topic 3", top_k=100)
+        assert len(results) == store.num_chunks
+        assert all(chunk['source'] != "doc0.md" for chunk, _ in results)
+
+    def test_hnsw_index(self, sample_chunks):
+        """Test HNSW index search, deletion and compaction"""
+        store = VectorStore(index_type="hnsw", hnsw_m=8, ef_search=16, compact_ratio=1.0)
+        for i, chunk in enumerate(sample_chunks):
+            chunk['source'] = f"doc{i}.md"
+        store.build_index(sample_chunks)
+
+        assert store.active_index_type == "hnsw"
+        top_chunk, _ = store.search("neural networks", top_k=1)[0]
+        assert "neural networks" in top_chunk['text']
+
+        store.remove_by_source("doc2.md")
+        store.compact()
+        assert store.index.ntotal == 2
+        assert all(chunk['source'] != "doc2.md" for chunk, _ in store.search("neural networks", top_k=3))
+
+    def test_index_config_persisted(self, sample_chunks, tmp_path):
+        """Test index type and search parameters survive a save/load round trip"""
+        store = VectorStore(index_type="hnsw", ef_search=48)
+        store.build_index(sample_chunks)
+        store.set_search_params(nprobe=4)
+
+        save_path = str(tmp_path / "vector_store")
+        store.save(save_path)
+        new_store = VectorStore()
+        new_store.load(save_path)
+
+        assert new_store.index_type == "hnsw"
+        assert new_store.active_index_type == "hnsw"
+        assert new_store.ef_search == 48
+        assert new_store.nprobe == 4
+        assert len(new_store.search("machine learning", top_k=2)) == 2
+
+    def test_sq8_index(self, sample_chunks):
+        """Test int8 scalar quantized index"""
+        store = VectorStore(index_type="sq8")
+        store.build_index(sample_chunks)
+
+        assert store.active_index_type == "sq8"
+        top_chunk, _ = store.search("machine learning", top_k=1)[0]
+        assert "machine learning" in top_chunk['text']
+
+        footprint = store.memory_footprint()
+        assert footprint['compression_ratio'] > 1
+
+    def test_ivfpq_falls_back_to_sq8(self, sample_chunks):
+        """Test IVF-PQ falls back to scalar quantization on tiny corpora"""
+        store = VectorStore(index_type="ivfpq")
+        store.build_index(sample_chunks)
+
+        assert store.active_index_type == "sq8"
+
+    def test_ivfpq_index_with_rerank(self):
+        """Test IVF-PQ with exact re-ranking from full-precision vectors"""
+        chunks = [
+            {'id': i, 'text': f'Chunk {i} about topic {i % 11}', 'char_start': 0, 'char_end': 10}
+            for i in range(700)
+        ]
+        store = VectorStore(index_type="ivfpq", nlist=4, nprobe=4, pq_m=8, pq_nbits=4, rerank=True)
+        store.build_index(chunks)
+
+        assert store.active_index_type == "ivfpq"
+        assert len(store.vectors) == 700
+
+        # Re-ranked distances are exact and therefore sorted
+        distances = [dist for _, dist in store.search("topic 3", top_k=5)]
+        assert distances == sorted(distances)
+
+        footprint = store.memory_footprint()
+        assert footprint['index_bytes'] < footprint['flat_bytes']
+        assert footprint['full_precision_disk_bytes'] == footprint['flat_bytes']
+
+        recall = store.measure_recall(["topic 3", "topic 5"], top_k=5)
+        assert 0.0 <= recall['recall'] <= 1.0
+        assert recall['recall_reranked'] >= recall['recall']
+
+    def test_measure_recall_requires_vectors(self, sample_chunks):
+        """Test recall measurement needs full-precision vectors"""
+        store = VectorStore()
+        store.build_index(sample_chunks)
+
+        with pytest.raises(ValueError, match="full-precision"):
+            store.measure_recall(["machine learning"])
+
+    def test_rerank_vectors_persisted(self, sample_chunks, tmp_path):
+        """Test full-precision vectors are saved, compacted and reloaded"""
+        store = VectorStore(index_type="sq8", rerank=True, compact_ratio=1.0)
+        for i, chunk in enumerate(sample_chunks):
+            chunk['source'] = f"doc{i}.md"
+        store.build_index(sample_chunks)
+        store.remove_by_source("doc0.md")
+        store.compact()
+
+        assert len(store.vectors) == 2
+
+        save_path = str(tmp_path / "vector_store")
+        store.save(save_path)
+        new_store = VectorStore()
+        new_store.load(save_path)
+
+        assert new_store.rerank
+        assert new_store.vectors.read_only
+        assert len(new_store.vectors) == 2
+        assert new_store.measure_recall(["neural networks"], top_k=2)['recall_reranked'] == 1.0
+
+        # The saved file must not be modified by later updates
+        new_store.add_chunks([{'id': 0, 'text': 'New chunk', 'char_start': 0, 'char_end': 9, 'source': 'new.md'}])
+        assert len(new_store.vectors) == 3
+        assert not new_store.vectors.read_only
+        import os
+        assert os.path.getsize(os.path.join(save_path, "vectors.f32")) == 2 * new_store.dimension * 4
+
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw", "sq8", "ivf"])
+    def test_mmap_load_matches_full_load(self, index_type, tmp_path):
+        """Test a memory-mapped store returns the same results as a full load"""
+        chunks = [
+            {'id': i, 'text': f'Chunk {i} about topic {i % 7}', 'char_start': 0, 'char_end': 10, 'source': f'doc{i % 3}.md'}
+            for i in range(100)
+        ]
+        store = VectorStore(index_type=index_type, nlist=2, compact_ratio=1.0)
+        store.build_index(chunks)
+        store.remove_by_source("doc0.md")
+
+        save_path = str(tmp_path / "vector_store")
+        store.save(save_path)
+        loaded = VectorStore()
+        loaded.load(save_path)
+        mapped = VectorStore()
+        mapped.load(save_path, mmap=True)
+
+        assert mapped.active_index_type == loaded.active_index_type
+        assert mapped.tombstones == loaded.tombstones
+        assert mapped.num_chunks == loaded.num_chunks
+        expected = loaded.search("topic 3", top_k=5)
+        results = mapped.search("topic 3", top_k=5)
+        assert [chunk for chunk, _ in results] == [chunk for chunk, _ in expected]
+
+    def test_mmap_store_is_copied_on_write(self, sample_chunks, tmp_path):
+        """Test a memory-mapped store can be updated without touching the saved files"""
+        for i, chunk in enumerate(sample_chunks):
+            chunk['source'] = f"doc{i}.md"
+        store = VectorStore()
+        store.build_index(sample_chunks)
+        save_path = str(tmp_path / "vector_store")
+        store.save(save_path)
+
+        mapped = VectorStore()
+        mapped.load(save_path, mmap=True)
+        mapped.update_source("doc1.md", [
+            {'id': 0, 'text': 'Replacement chunk', 'char_start': 0, 'char_end': 17, 'source': 'doc1.md'}
+        ])
+
+        assert not mapped.chunks.mapped
+        assert mapped.num_chunks == 3
+        assert mapped.search("Replacement chunk", top_k=1)[0][0]['text'] == 'Replacement chunk'
+
+        reloaded = VectorStore()
+        reloaded.load(save_path, mmap=True)
+        assert [chunk['text'] for chunk in reloaded.chunks] == [chunk['text'] for chunk in sample_chunks]
+
+    def test_mmap_save_in_place(self, sample_chunks, tmp_path):
+        """Test a memory-mapped store can be saved back to the directory it maps"""
+        store = VectorStore()
+        store.build_index(sample_chunks)
+        save_path = str(tmp_path / "vector_store")
+        store.save(save_path)
+
+        mapped = VectorStore()
+        mapped.load(save_path, mmap=True)
+        mapped.save(save_path)
+
+        assert mapped.search("neural networks", top_k=1) == store.search("neural networks", top_k=1)
+        reloaded = VectorStore()
+        reloaded.load(save_path, mmap=True)
+        assert reloaded.num_chunks == 3
+
+    def test_load_legacy_pickled_chunks(self, sample_chunks, tmp_path):
+        """Test stores saved with a pickled chunk list still load"""
+        import os
+        import pickle
+        store = VectorStore()
+        store.build_index(sample_chunks)
+        save_path = str(tmp_path / "vector_store")
+        store.save(save_path)
+
+        shutil.rmtree(os.path.join(save_path, "chunks"))
+        with open(os.path.join(save_path, "chunks.pkl"), 'wb') as f:
+            pickle.dump([None] + sample_chunks[1:], f)
+
+        new_store = VectorStore()
+        new_store.load(save_path)
+
+        assert new_store.chunks == [None] + sample_chunks[1:]
+        assert new_store.tombstones == {0}
+
+    def test_search_batch_matches_search(self, sample_chunks):
+        """Test batched search returns the same results as single searches"""
+        store = VectorStore()
+        store.build_index(sample_chunks)
+        queries = ["machine learning", "neural networks", "deep learning"]
+
+        ids, distances = store.search_batch(queries, top_k=2)
+
+        assert ids.shape == (3, 2)
+        assert distances.shape == (3, 2)
+        for row, query in enumerate(queries):
+            expected = store.search(query, top_k=2)
+            assert [store.chunks[i] for i in ids[row]] == [chunk for chunk, _ in expected]
+            np.testing.assert_allclose(distances[row], [distance for _, distance in expected], rtol=1e-5)
+
+    def test_search_batch_pads_missing_results(self, sample_chunks):
+        """Test batched search pads with -1 when top_k exceeds the index"""
+        store = VectorStore()
+        store.build_index(sample_chunks)
+
+        ids, _ = store.search_batch(["machine learning"], top_k=5)
+        empty_ids, empty_distances = store.search_batch([], top_k=5)
+
+        assert (ids[0, 3:] == -1).all()
+        assert empty_ids.shape == (0, 5)
+        assert empty_distances.shape == (0, 5)
+
+    def test_invalid_embedding_backend(self):
+        """Test unknown embedding backends are rejected"""
+        with pytest.raises(ValueError, match="Unknown embedding backend"):
+            VectorStore(embedding_backend="tensorrt")
+
+    def test_embedding_parity_same_backend(self):
+        """Test the parity check reports no drift against the same backend"""
+        store = VectorStore()
+        parity = store.embedding_parity(["What is radar calibration?", "antenna alignment"])
+
+        assert parity['num_texts'] == 2
+        assert parity['mean_cosine'] == pytest.approx(1.0, abs=1e-5)
+        assert parity['max_drift'] == pytest.approx(0.0, abs=1e-5)
+
+    @pytest.mark.parametrize("index_type", ["flat", "sq8"])
+    def test_parallel_embedding_matches_serial(self, index_type, tmp_path):
+        """Test worker processes produce the same index as serial embedding"""
+        chunks = [
+            {'id': i, 'text': f'Chunk {i} about topic {i % 7}', 'char_start': 0, 'char_end': 10, 'source': f'doc{i % 3}.md'}
+            for i in range(40)
+        ]
+        serial = VectorStore(index_type=index_type)
+        serial.build_index(chunks)
+
+        # Warm the cache with some chunks so shards mix cached and encoded rows
+        parallel = VectorStore(index_type=index_type, embedding_cache_dir=str(tmp_path / "cache"))
+        parallel.create_embeddings(chunks[::3])
+        parallel.reset()
+        parallel.add_chunks(chunks, num_workers=2, shard_size=8)
+
+        assert parallel.chunks == serial.chunks
+        assert parallel.active_index_type == serial.active_index_type
+        ids, _ = parallel.search_batch(["topic 3", "chunk 12"], top_k=5)
+        expected_ids, _ = serial.search_batch(["topic 3", "chunk 12"], top_k=5)
+        np.testing.assert_array_equal(ids, expected_ids)
+
+    @pytest.mark.parametrize("index_type", ["flat", "sq8"])
+    def test_add_chunk_stream_matches_build_index(self, index_type):
+        """Test a streamed build produces the same index as building from a list"""
+        chunks = [
+            {'id': i, 'text': f'Chunk {i} about topic {i % 7}', 'char_start': 0, 'char_end': 10, 'source': f'doc{i % 3}.md'}
+            for i in range(40)
+        ]
+        built = VectorStore(index_type=index_type)
+        built.build_index(chunks)
+
+        streamed = VectorStore(index_type=index_type)
+        consumed = streamed.add_chunk_stream(iter(chunks), batch_size=7, train_size=20)
+
+        assert consumed == 40
+        assert streamed.chunks == built.chunks
+        assert streamed.active_index_type == built.active_index_type
+        ids, _ = streamed.search_batch(["topic 3", "chunk 12"], top_k=5)
+        expected_ids, _ = built.search_batch(["topic 3", "chunk 12"], top_k=5)
+        if index_type == "flat":
+            np.testing.assert_array_equal(ids, expected_ids)
+        else:
+            # The quantizer is trained on fewer chunks, so only the top hit must agree
+            np.testing.assert_array_equal(ids[:, 0], expected_ids[:, 0])
+
+    def test_stream_checkpoint_resume(self, tmp_path):
+        """Test an interrupted streamed build resumes from its last checkpoint"""
+        chunks = [
+            {'id': i, 'text': f'Chunk {i} about topic {i % 7}', 'char_start': 0, 'char_end': 10, 'source': f'doc{i % 3}.md'}
+            for i in range(30)
+        ]
+        checkpoint_dir = str(tmp_path / "build")
+
+        def interrupted():
+            yield from chunks[:25]
+            raise KeyboardInterrupt
+
+        store = VectorStore()
+        with pytest.raises(KeyboardInterrupt):
+            store.add_chunk_stream(interrupted(), batch_size=4, checkpoint_dir=checkpoint_dir,
+                                   checkpoint_every=2, checkpoint_meta={'run': 'test'})
+
+        resumed = VectorStore()
+        cursor = resumed.load_checkpoint(checkpoint_dir)
+        assert cursor == {'chunks_consumed': 24, 'run': 'test'}
+        assert resumed.num_chunks == 24
+
+        consumed = resumed.add_chunk_stream(iter(chunks[24:]), batch_size=4, start=cursor['chunks_consumed'])
+
+        expected = VectorStore()
+        expected.build_index(chunks)
+        assert consumed == 30
+        assert resumed.chunks == expected.chunks
+        ids, _ = resumed.search_batch(["topic 3"], top_k=5)
+        expected_ids, _ = expected.search_batch(["topic 3"], top_k=5)
+        np.testing.assert_array_equal(ids, expected_ids)
+
+    def test_remove_checkpoint_keeps_other_files(self, tmp_path):
+        """Test removing a finished build's checkpoint leaves unrelated files in its directory"""
+        import os
+        chunks = [
+            {'id': i, 'text': f'Chunk {i} about topic {i % 7}', 'char_start': 0, 'char_end': 10, 'source': 'doc.md'}
+            for i in range(12)
+        ]
+        shared_dir = tmp_path / "shared"
+        shared_dir.mkdir()
+        (shared_dir / "notes.txt").write_text("keep me", encoding="utf-8")
+
+        store = VectorStore()
+        store.add_chunk_stream(iter(chunks), batch_size=4, checkpoint_dir=str(shared_dir), checkpoint_every=1)
+        assert (shared_dir / "checkpoint").exists()
+        VectorStore.remove_checkpoint(str(shared_dir))
+
+        assert sorted(os.listdir(shared_dir)) == ["notes.txt"]
+        assert (shared_dir / "notes.txt").read_text(encoding="utf-8") == "keep me"
+
+        # A directory that only held the checkpoint is removed with it
+        own_dir = tmp_path / "build"
+        store.add_chunk_stream(iter(chunks), batch_size=4, checkpoint_dir=str(own_dir), checkpoint_every=1)
+        VectorStore.remove_checkpoint(str(own_dir))
+        assert not own_dir.exists()
+
+    def test_load_checkpoint_missing(self, tmp_path):
+        """Test loading from a directory without a checkpoint returns None"""
+        assert VectorStore().load_checkpoint(str(tmp_path)) is None
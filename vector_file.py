@@ -0,0 +1,157 @@
+"""
+Vector File Module
+Append-only float32 matrix stored in a memory-mapped file
+"""
+import os
+import shutil
+from typing import Optional
+
+import numpy as np
+
+
+class VectorFile:
+    """Full-precision vectors on disk, addressed by row number"""
+
+    COMPACT_BLOCK_ROWS = 65536
+
+    def __init__(
+        self,
+        path: str,
+        dimension: int,
+        read_only: bool = False,
+        initial_capacity: int = 1024
+    ):
+        """
+        Open (or create) a vector file
+
+        Args:
+            path: Path of the raw float32 file
+            dimension: Vector dimension
+            read_only: Map an existing file without allowing writes
+            initial_capacity: Number of rows allocated when the file is created
+        """
+        self.path = path
+        self.dimension = dimension
+        self.read_only = read_only
+        self.initial_capacity = initial_capacity
+        self.array: Optional[np.memmap] = None
+
+        if os.path.exists(path):
+            rows = os.path.getsize(path) // (4 * dimension)
+            self.size = rows
+            self.capacity = rows
+        else:
+            if read_only:
+                raise FileNotFoundError(path)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            open(path, 'wb').close()
+            self.size = 0
+            self.capacity = 0
+
+        self._map()
+
+    def _map(self):
+        """(Re)map the file with the current capacity"""
+        self.array = None
+        if self.capacity:
+            self.array = np.memmap(
+                self.path, dtype=np.float32, mode='r' if self.read_only else 'r+',
+                shape=(self.capacity, self.dimension)
+            )
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used on disk by live rows"""
+        return self.size * self.dimension * 4
+
+    def __getitem__(self, rows) -> np.ndarray:
+        return np.asarray(self.array[:self.size][rows])
+
+    def append(self, vectors: np.ndarray):
+        """
+        Append vectors at the end of the file
+
+        Args:
+            vectors: Array of shape (n, dimension)
+        """
+        if self.read_only:
+            raise ValueError(f"Vector file {self.path} is read-only")
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        end = self.size + len(vectors)
+        if end > self.capacity:
+            new_capacity = max(self.initial_capacity, self.capacity)
+            while new_capacity < end:
+                new_capacity *= 2
+            self.flush()
+            self.array = None
+            with open(self.path, 'ab') as f:
+                f.truncate(new_capacity * self.dimension * 4)
+            self.capacity = new_capacity
+            self._map()
+
+        self.array[self.size:end] = vectors
+        self.size = end
+
+    def compact(self, keep: np.ndarray):
+        """
+        Keep only the given rows, in order, and trim the file
+
+        Args:
+            keep: Row numbers to keep
+        """
+        if self.read_only:
+            raise ValueError(f"Vector file {self.path} is read-only")
+
+        tmp_path = self.path + ".tmp"
+        compacted = np.memmap(tmp_path, dtype=np.float32, mode='w+', shape=(max(len(keep), 1), self.dimension))
+        for start in range(0, len(keep), self.COMPACT_BLOCK_ROWS):
+            block = keep[start:start + self.COMPACT_BLOCK_ROWS]
+            compacted[start:start + len(block)] = self.array[block]
+        compacted.flush()
+        del compacted
+
+        self.array = None
+        os.replace(tmp_path, self.path)
+        with open(self.path, 'ab') as f:
+            f.truncate(len(keep) * self.dimension * 4)
+        self.size = self.capacity = len(keep)
+        self._map()
+
+    def flush(self):
+        """Write pending changes to disk"""
+        if self.array is not None and not self.read_only:
+            self.array.flush()
+
+    def copy_to(self, path: str, read_only: bool = False) -> 'VectorFile':
+        """
+        Copy the live rows to another file
+
+        Args:
+            path: Destination file path
+            read_only: Open the copy read-only
+
+        Returns:
+            VectorFile for the copy
+        """
+        self.flush()
+        if os.path.abspath(path) == os.path.abspath(self.path):
+            if self.read_only:
+                # A read-only file already holds exactly the live rows
+                return self
+            # Saving in place: trim spare capacity so the file holds exactly the live rows
+            self.array = None
+            with open(self.path, 'ab') as f:
+                f.truncate(self.nbytes)
+            self.capacity = self.size
+            self._map()
+            return self
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        shutil.copyfile(self.path, path)
+        with open(path, 'ab') as f:
+            f.truncate(self.nbytes)
+        return VectorFile(path, self.dimension, read_only=read_only, initial_capacity=self.initial_capacity)
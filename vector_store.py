@@ -5,26 +5,174 @@ Creates embeddings and performs similarity search using FAISS
 import numpy as np
 import faiss
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional, Iterable
 import pickle
+import json
+import functools
+import itertools
 import os
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+
+from chunk_dedup import DEDUP_FILE, SIGNATURES_FILE, ChunkDeduplicator
+from chunk_store import COMPRESSIONS, ChunkStore, has_chunk_store
+from embedding_batching import DEFAULT_TOKEN_BUDGET, encode_in_token_batches
+from embedding_cache import EmbeddingCache
+from model_registry import EMBEDDING_BACKENDS, embedding_models, model_key
+from parallel_embedding import DEFAULT_SHARD_SIZE, ParallelEncoder
+from vector_file import VectorFile
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Supported FAISS index types
+INDEX_TYPES = ("flat", "ivf", "hnsw", "sq8", "ivfpq")
+
+# FAISS needs roughly this many training points per IVF centroid
+IVF_MIN_POINTS_PER_CENTROID = 39
+
+# Index types whose quantizers are trained on the first vectors added
+TRAINED_INDEX_TYPES = ("ivf", "ivfpq", "sq8")
+
+CHECKPOINT_NAME = "checkpoint"
+CURSOR_FILE = "cursor.json"
+
+
+def _synchronized(method):
+    """Run a VectorStore method while holding the store's lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class VectorStore:
     """Vector store for embedding-based retrieval"""
 
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        embedding_cache_dir: Optional[str] = None,
+        compact_ratio: float = 0.2,
+        index_type: str = "flat",
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        hnsw_m: int = 32,
+        ef_search: int = 64,
+        pq_m: Optional[int] = None,
+        pq_nbits: int = 8,
+        rerank: bool = False,
+        rerank_factor: int = 4,
+        vectors_dir: Optional[str] = None,
+        chunk_compression: Optional[str] = None,
+        embedding_backend: str = "torch",
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        dedup_threshold: Optional[float] = None
+    ):
         """
-        Initialize vector store with embedding model
+        Initialize vector store (the embedding model is loaded on first use)
 
         Args:
             model_name: Name of the sentence transformer model
+            embedding_cache_dir: Directory of the persistent embedding cache (disabled if None)
+            compact_ratio: Fraction of deleted chunks that triggers index compaction
+            index_type: FAISS index type ('flat', 'ivf', 'hnsw', 'sq8' or 'ivfpq')
+            nlist: Number of IVF centroids (defaults to 4 * sqrt(number of vectors))
+            nprobe: Number of IVF lists visited per query
+            hnsw_m: Number of neighbours per HNSW node
+            ef_search: HNSW search queue size
+            pq_m: Number of product quantizer sub-vectors (defaults to dimension / 8)
+            pq_nbits: Bits per product quantizer code
+            rerank: Keep full-precision vectors on disk and re-rank candidates exactly
+            rerank_factor: Candidates fetched per requested result when re-ranking
+            vectors_dir: Directory for the full-precision vector file (temporary if None)
+            chunk_compression: Compression of saved chunk texts (None or 'zstd')
+            embedding_backend: 'torch', or 'onnx-int8' for an int8-quantized ONNX Runtime model on CPU
+            token_budget: Maximum padded tokens per embedding batch; texts are batched by length
+            dedup_threshold: Index one chunk per group of near-duplicates whose estimated
+                shingle similarity reaches this value and record the others as its aliases
+                (disabled if None)
         """
-        print(f"Loading embedding model: {model_name}")
-        self.embedding_model = SentenceTransformer(model_name)
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{index_type}'. Expected one of: {', '.join(INDEX_TYPES)}")
+        if chunk_compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown chunk compression '{chunk_compression}'. Expected one of: {COMPRESSIONS}")
+        if embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(
+                f"Unknown embedding backend '{embedding_backend}'. Expected one of: {', '.join(EMBEDDING_BACKENDS)}"
+            )
+
+        self.model_name = model_name
+        self.embedding_backend = embedding_backend
+        # Embeddings of different backends are cached separately
+        self.embedding_key = model_key(model_name, embedding_backend)
+        self.embedding_cache = EmbeddingCache(embedding_cache_dir, self.embedding_key) if embedding_cache_dir else None
+        self.token_budget = token_budget
+        self.last_batching_stats = None
+        self.dedup = ChunkDeduplicator(dedup_threshold) if dedup_threshold is not None else None
+        self.last_dedup_stats = None
+        self.compact_ratio = compact_ratio
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.pq_m = pq_m
+        self.pq_nbits = pq_nbits
+        self.rerank = rerank
+        self.rerank_factor = rerank_factor
+        self.vectors_dir = vectors_dir
+        self.chunk_compression = chunk_compression
+        self.active_index_type = None
         self.index = None
+        self.vectors = None
         self.chunks = None
         self.dimension = None
+        self.tombstones = set()
+        self._search_params = None
+        self._mapped_index_file = None
+        # Held while the index or chunks change and while a search reads them,
+        # so queries can run in other threads during incremental updates
+        self.lock = threading.RLock()
+
+    @property
+    def embedding_model(self) -> SentenceTransformer:
+        """Embedding model, loaded on first use and shared through the process-wide registry"""
+        return embedding_models.get(self.model_name, self.embedding_backend)
+
+    def embedding_parity(self, texts: List[str], reference_backend: str = "torch") -> Dict[str, Any]:
+        """
+        Compare this store's embeddings with those of another backend
+
+        Quantized backends stay compatible with an index built in float as
+        long as the cosine drift is small.
+
+        Args:
+            texts: Sample texts, e.g. typical queries or chunk texts
+            reference_backend: Backend to compare against
+
+        Returns:
+            Dictionary with mean/min cosine similarity and the maximum drift (1 - cosine)
+        """
+        embeddings = self.embedding_model.encode(texts, convert_to_numpy=True).astype('float32')
+        reference = embedding_models.get(self.model_name, reference_backend).encode(
+            texts, convert_to_numpy=True
+        ).astype('float32')
+
+        cosine = (embeddings * reference).sum(axis=1) / (
+            np.linalg.norm(embeddings, axis=1) * np.linalg.norm(reference, axis=1)
+        )
+        return {
+            'backend': self.embedding_backend,
+            'reference_backend': reference_backend,
+            'num_texts': len(texts),
+            'mean_cosine': float(cosine.mean()),
+            'min_cosine': float(cosine.min()),
+            'max_drift': float(1.0 - cosine.min())
+        }
 
     def create_embeddings(self, chunks: List[Dict[str, Any]]) -> np.ndarray:
         """
@@ -39,31 +187,652 @@ class VectorStore:
         texts = [chunk['text'] for chunk in chunks]
         print(f"Creating embeddings for {len(texts)} chunks...")
 
-        embeddings = self.embedding_model.encode(
-            texts,
-            show_progress_bar=True,
-            convert_to_numpy=True
-        )
+        if self.embedding_cache is None:
+            return self._encode(texts)
+
+        # Only texts missing from the cache go through the model
+        embeddings, misses = self.embedding_cache.lookup(texts)
+        print(f"  Embedding cache: {len(texts) - len(misses)} hits, {len(misses)} misses")
+
+        if misses:
+            encoded = self._encode([texts[i] for i in misses]).astype('float32')
+            if embeddings is None:
+                embeddings = np.zeros((len(texts), encoded.shape[1]), dtype=np.float32)
+            embeddings[misses] = encoded
+            self.embedding_cache.put([texts[i] for i in misses], encoded)
+
+        self.embedding_cache.flush()
+
+        if embeddings is None:
+            return self._encode(texts)
 
         return embeddings
 
-    def build_index(self, chunks: List[Dict[str, Any]]):
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts with the embedding model in length-bucketed, token-budgeted batches"""
+        embeddings, stats = encode_in_token_batches(
+            self.embedding_model, texts, self.token_budget, show_progress_bar=True
+        )
+        self.last_batching_stats = stats
+        print(f"  {stats['num_batches']} batches, padding efficiency {stats['padding_efficiency']:.1%} "
+              f"(fixed batches: {stats['fixed_batch_padding_efficiency']:.1%})")
+        return embeddings
+
+    def build_index(self, chunks: List[Dict[str, Any]], num_workers: int = 1):
         """
         Build FAISS index from document chunks
 
         Args:
             chunks: List of document chunks
+            num_workers: Embedding worker processes (1 embeds in this process)
         """
-        self.chunks = chunks
-        embeddings = self.create_embeddings(chunks)
+        self.reset()
+        self.add_chunks(chunks, num_workers=num_workers)
+
+        print(f"Built {self.active_index_type} FAISS index with {self.num_chunks} vectors")
+
+    def reset(self):
+        """Drop the index and all chunks"""
+        self.index = None
+        self.active_index_type = None
+        self.vectors = None
+        self.chunks = ChunkStore()
+        self.dimension = None
+        self.tombstones = set()
+        self._search_params = None
+        self._mapped_index_file = None
+        if self.dedup is not None:
+            self.dedup.clear()
 
-        self.dimension = embeddings.shape[1]
+    @_synchronized
+    def _ensure_writable(self):
+        """Copy a memory-mapped store into memory before it is modified"""
+        if self._mapped_index_file is not None:
+            self.index = faiss.read_index(self._mapped_index_file)
+            self._mapped_index_file = None
+            self._search_params = None
+
+    def _init_index(self, dimension: int, training_vectors: Optional[np.ndarray] = None):
+        """
+        Create an empty FAISS index of the configured type
+
+        Ids stored in the index are positions in self.chunks. IVF indexes keep ids
+        natively; flat and HNSW indexes are wrapped in an IndexIDMap2.
+
+        Args:
+            dimension: Embedding dimension
+            training_vectors: Vectors used to train IVF centroids
+        """
+        self.dimension = dimension
+        index_type = self.index_type
+        num_vectors = 0 if training_vectors is None else len(training_vectors)
+
+        if index_type in ("ivf", "ivfpq"):
+            nlist = self.nlist or max(1, int(4 * np.sqrt(num_vectors)))
+            min_points = nlist * IVF_MIN_POINTS_PER_CENTROID
+            if index_type == "ivfpq":
+                # Every product quantizer codebook needs training points as well
+                min_points = max(min_points, (1 << self.pq_nbits) * IVF_MIN_POINTS_PER_CENTROID)
+            if num_vectors < min_points:
+                fallback = "flat" if index_type == "ivf" else "sq8"
+                print(f"⚠️  {num_vectors} vectors are too few to train {index_type} (need {min_points}), "
+                      f"using a {fallback} index")
+                index_type = fallback
 
         # Create FAISS index (using L2 distance)
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.index.add(embeddings.astype('float32'))
+        if index_type == "ivf":
+            quantizer = faiss.IndexFlatL2(dimension)
+            self.index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_L2)
+            print(f"Training IVF index with {nlist} centroids on {num_vectors} vectors...")
+            self.index.train(training_vectors)
+        elif index_type == "ivfpq":
+            quantizer = faiss.IndexFlatL2(dimension)
+            pq_m = self._pq_subquantizers(dimension)
+            self.index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, self.pq_nbits)
+            print(f"Training IVF-PQ index with {nlist} centroids and {pq_m}x{self.pq_nbits}-bit codes "
+                  f"on {num_vectors} vectors...")
+            self.index.train(training_vectors)
+        elif index_type == "sq8":
+            quantizer = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+            quantizer.train(training_vectors)
+            self.index = faiss.IndexIDMap2(quantizer)
+        elif index_type == "hnsw":
+            self.index = faiss.IndexIDMap2(faiss.IndexHNSWFlat(dimension, self.hnsw_m))
+        else:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+
+        self.active_index_type = index_type
+        self._search_params = None
+
+    def _pq_subquantizers(self, dimension: int) -> int:
+        """Largest divisor of the dimension not above the requested sub-vector count"""
+        pq_m = min(self.pq_m or max(1, dimension // 8), dimension)
+        while dimension % pq_m:
+            pq_m -= 1
+        return pq_m
+
+    def _writable_vectors(self) -> VectorFile:
+        """Full-precision vector file, copied out of a loaded store before the first write"""
+        if self.vectors is None or self.vectors.read_only:
+            if self.vectors_dir is None:
+                self.vectors_dir = tempfile.mkdtemp(prefix="rag-vectors-")
+                weakref.finalize(self, shutil.rmtree, self.vectors_dir, True)
+            path = os.path.join(self.vectors_dir, "vectors.f32")
+            if self.vectors is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                self.vectors = VectorFile(path, self.dimension)
+            else:
+                self.vectors = self.vectors.copy_to(path)
+        return self.vectors
+
+    @property
+    def source_ids(self) -> Dict[Optional[str], List[int]]:
+        """Live chunk ids grouped by source document"""
+        if self.chunks is None:
+            return {}
+        return self.chunks.source_ids()
+
+    @property
+    def num_chunks(self) -> int:
+        """Number of live (non-deleted) chunks in the store"""
+        if self.chunks is None:
+            return 0
+        return len(self.chunks) - len(self.tombstones)
+
+    def add_chunks(
+        self,
+        chunks: List[Dict[str, Any]],
+        num_workers: int = 1,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        deduplicate: bool = True
+    ) -> int:
+        """
+        Embed chunks and append them to the index
+
+        Args:
+            chunks: List of document chunks
+            num_workers: Embedding worker processes (1 embeds in this process)
+            shard_size: Chunks per worker task when num_workers > 1
+            deduplicate: Record near-duplicates as aliases instead of indexing them
+                (when the store was created with a dedup_threshold)
+
+        Returns:
+            Number of chunks added
+        """
+        if self.chunks is None:
+            self.reset()
+
+        if deduplicate and self.dedup is not None and len(chunks):
+            chunks, _ = self._deduplicate(chunks)
+
+        if len(chunks) == 0:
+            return 0
+
+        self._ensure_writable()
+
+        start_time = time.time()
+        if num_workers > 1:
+            self._add_chunks_parallel(chunks, num_workers, shard_size)
+        else:
+            self._add_embeddings(chunks, self.create_embeddings(chunks).astype('float32'))
+
+        elapsed = time.time() - start_time
+        print(f"Embedded and indexed {len(chunks)} chunks in {elapsed:.2f}s "
+              f"({len(chunks) / elapsed if elapsed else float('inf'):.1f} chunks/s)")
+
+        return len(chunks)
+
+    def _add_chunks_parallel(self, chunks: List[Dict[str, Any]], num_workers: int, shard_size: int):
+        """Embed chunks in worker processes and add each shard to the index as it arrives"""
+        texts = [chunk['text'] for chunk in chunks]
+        print(f"Creating embeddings for {len(texts)} chunks with {num_workers} workers...")
+
+        if self.embedding_cache is not None:
+            cached, misses = self.embedding_cache.lookup(texts)
+            print(f"  Embedding cache: {len(texts) - len(misses)} hits, {len(misses)} misses")
+        else:
+            cached, misses = None, range(len(texts))
+        misses = np.asarray(misses, dtype='int64')
+
+        bounds = [(start, min(start + shard_size, len(texts))) for start in range(0, len(texts), shard_size)]
+        shard_misses = [
+            misses[np.searchsorted(misses, start):np.searchsorted(misses, end)] for start, end in bounds
+        ]
+
+        # Index types that need training wait for the whole batch, like the serial path
+        buffer_all = self.index is None and self.index_type in TRAINED_INDEX_TYPES
+        pending = []
+
+        with ParallelEncoder(
+            self.model_name, self.embedding_backend, num_workers, token_budget=self.token_budget
+        ) as encoder:
+            encoded_shards = encoder.imap([[texts[i] for i in shard_miss] for shard_miss in shard_misses])
+            for (start, end), shard_miss, encoded in zip(bounds, shard_misses, encoded_shards):
+                if cached is None:
+                    embeddings = encoded
+                else:
+                    embeddings = np.array(cached[start:end], dtype=np.float32)
+                    embeddings[shard_miss - start] = encoded
+
+                if self.embedding_cache is not None and len(shard_miss):
+                    self.embedding_cache.put([texts[i] for i in shard_miss], encoded)
 
-        print(f"Built FAISS index with {self.index.ntotal} vectors")
+                if buffer_all:
+                    pending.append(embeddings)
+                else:
+                    self._add_embeddings(chunks[start:end], embeddings)
+
+        if buffer_all:
+            self._add_embeddings(chunks, np.vstack(pending))
+
+        if self.embedding_cache is not None:
+            self.embedding_cache.flush()
+
+    @_synchronized
+    def _add_embeddings(self, chunks: List[Dict[str, Any]], embeddings: np.ndarray):
+        """Append chunks with their embeddings, creating the index if needed"""
+        if self.index is None:
+            self._init_index(embeddings.shape[1], training_vectors=embeddings)
+
+        first_id = len(self.chunks)
+        ids = np.arange(first_id, first_id + len(chunks), dtype='int64')
+        self.index.add_with_ids(embeddings, ids)
+
+        if self.rerank:
+            # Full-precision rows must line up with chunk ids
+            if self.vectors is None and first_id:
+                print("⚠️  Full-precision vectors are missing for existing chunks, disabling re-ranking")
+                self.rerank = False
+            else:
+                self._writable_vectors().append(embeddings)
+
+        self.chunks.extend(chunks)
+
+    def _sync_signatures(self):
+        """Give every stored chunk a MinHash signature row, in chunk id order"""
+        # Rows past the store belong to chunks whose add did not complete
+        self.dedup.truncate(len(self.chunks))
+        if self.dedup.count < len(self.chunks):
+            missing = range(self.dedup.count, len(self.chunks))
+            texts = [chunk['text'] if chunk is not None else '' for chunk in (self.chunks[i] for i in missing)]
+            self.dedup.append(self.dedup.compute(texts), register=~self.chunks.deleted[missing.start:missing.stop])
+
+    def _deduplicate(self, chunks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        Drop chunks that nearly duplicate indexed chunks or earlier chunks of the batch
+
+        Args:
+            chunks: New chunks
+
+        Returns:
+            (kept chunks, id of the chunk each new chunk is stored as once the
+            kept chunks are added)
+        """
+        self._sync_signatures()
+
+        kept, targets = [], []
+        for chunk, signature in zip(chunks, self.dedup.compute([chunk['text'] for chunk in chunks])):
+            target = self.dedup.match(signature)
+            if target is None:
+                # Kept chunks are added in order after the current ones
+                target = self.dedup.count
+                self.dedup.append(signature[None])
+                kept.append(chunk)
+            else:
+                self.dedup.add_alias(target, chunk)
+            targets.append(target)
+
+        duplicates = len(chunks) - len(kept)
+        self.last_dedup_stats = {'num_chunks': len(chunks), 'duplicates': duplicates}
+        if duplicates:
+            print(f"  Near-duplicates: {duplicates} of {len(chunks)} chunks recorded as aliases "
+                  f"({duplicates / len(chunks):.1%})")
+        return kept, targets
+
+    def _promote_aliases(self, ids: List[int]):
+        """Index an alias of each chunk being removed, so its other sources keep the content"""
+        self._sync_signatures()
+        self.dedup.unregister(ids)
+
+        promoted, moved = [], []
+        for chunk_id in ids:
+            aliases = self.dedup.aliases.pop(chunk_id, None)
+            if aliases:
+                promoted.append({**aliases[0], 'text': self.chunks[chunk_id]['text']})
+                moved.append(aliases[1:])
+        if not promoted:
+            return
+
+        kept, targets = self._deduplicate(promoted)
+        self.add_chunks(kept, deduplicate=False)
+        for target, aliases in zip(targets, moved):
+            if aliases:
+                self.dedup.aliases.setdefault(target, []).extend(aliases)
+
+    def add_chunk_stream(
+        self,
+        chunks: Iterable[Dict[str, Any]],
+        batch_size: int = 1024,
+        train_size: int = 50_000,
+        num_workers: int = 1,
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_every: int = 10,
+        checkpoint_meta: Optional[Dict[str, Any]] = None,
+        start: int = 0
+    ) -> int:
+        """
+        Embed and add chunks from an iterable in fixed-size batches
+
+        Only one batch of chunks and embeddings is held at a time. Index types
+        that need training (ivf, ivfpq, sq8) are trained on the first
+        train_size chunks when the index does not exist yet.
+
+        Args:
+            chunks: Iterable of document chunks, e.g. a generator over documents
+            batch_size: Chunks embedded and added per batch
+            train_size: Chunks buffered to train a new index
+            num_workers: Embedding worker processes (1 embeds in this process)
+            checkpoint_dir: Directory for periodic checkpoints (disabled if None)
+            checkpoint_every: Batches between checkpoints
+            checkpoint_meta: Extra data stored with each checkpoint cursor
+            start: Number of stream chunks already consumed before this call
+
+        Returns:
+            Number of stream chunks consumed, including start
+        """
+        consumed = start
+        batches = 0
+        iterator = iter(chunks)
+
+        while True:
+            size = batch_size
+            if self.index is None and self.index_type in TRAINED_INDEX_TYPES:
+                size = max(batch_size, train_size)
+            batch = list(itertools.islice(iterator, size))
+            if not batch:
+                break
+
+            self.add_chunks(batch, num_workers=num_workers)
+            consumed += len(batch)
+            batches += 1
+
+            if checkpoint_dir is not None and batches % checkpoint_every == 0:
+                self.save_checkpoint(checkpoint_dir, {'chunks_consumed': consumed, **(checkpoint_meta or {})})
+
+        return consumed
+
+    def remove_by_source(self, source: str) -> int:
+        """
+        Delete all chunks that came from a source document
+
+        Chunks are tombstoned and hidden from search immediately; their vectors
+        are only dropped from the index when the store is compacted.
+
+        Args:
+            source: Source document path
+
+        Returns:
+            Number of chunks removed
+        """
+        with self.lock:
+            ids = self.chunks.ids_for_source(source).tolist()
+        if self.dedup is not None:
+            self.dedup.drop_aliases([source])
+        return self._delete_ids(ids)
+
+    def _delete_ids(self, ids: List[int]) -> int:
+        """Tombstone chunk ids, compacting once enough chunks are deleted"""
+        if self.dedup is not None:
+            self._promote_aliases(ids)
+
+        with self.lock:
+            self._ensure_writable()
+            for chunk_id in ids:
+                self.chunks.delete(chunk_id)
+                self.tombstones.add(chunk_id)
+            self._search_params = None
+
+            if self.tombstones and len(self.tombstones) > self.compact_ratio * len(self.chunks):
+                self.compact()
+
+        return len(ids)
+
+    def update_source(self, source: str, chunks: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Replace all chunks of a source document with a new set of chunks
+
+        Args:
+            source: Source document path
+            chunks: New chunks for the document
+
+        Returns:
+            (removed, added) chunk counts
+        """
+        for chunk in chunks:
+            chunk['source'] = source
+
+        return self.replace_sources([source], chunks)
+
+    def replace_sources(
+        self,
+        sources: List[str],
+        chunks: List[Dict[str, Any]],
+        num_workers: int = 1
+    ) -> Tuple[int, int]:
+        """
+        Replace all chunks of some source documents with a new set of chunks
+
+        The new chunks are added before the old ones are deleted, so a search
+        running meanwhile finds either version of a document but never neither.
+
+        Args:
+            sources: Source document paths being replaced
+            chunks: New chunks of those documents
+            num_workers: Embedding worker processes (1 embeds in this process)
+
+        Returns:
+            (removed, added) chunk counts
+        """
+        stale = self._detach_sources(sources)
+        added = self.add_chunks(chunks, num_workers=num_workers)
+        removed = self._delete_ids(stale)
+        return removed, added
+
+    def replace_source_stream(
+        self,
+        sources: List[str],
+        chunks: Iterable[Dict[str, Any]],
+        stale: Optional[List[int]] = None,
+        checkpoint_meta: Optional[Dict[str, Any]] = None,
+        **stream_options
+    ) -> Tuple[int, int]:
+        """
+        Like replace_sources(), but adds the new chunks with add_chunk_stream()
+
+        The ids of the chunks being replaced are stored with each checkpoint
+        as 'stale', so a resumed build can pass them back in and still delete
+        exactly the old version of the documents.
+
+        Args:
+            sources: Source document paths being replaced
+            chunks: Iterable of the new chunks of those documents
+            stale: Chunk ids to delete at the end (from a checkpoint cursor; looked up if None)
+            checkpoint_meta: Extra data stored with each checkpoint cursor
+            **stream_options: Arguments of add_chunk_stream()
+
+        Returns:
+            (removed chunk count, stream chunks consumed)
+        """
+        if stale is None:
+            stale = self._detach_sources(sources)
+        consumed = self.add_chunk_stream(
+            chunks, checkpoint_meta={**(checkpoint_meta or {}), 'stale': stale}, **stream_options
+        )
+        removed = self._delete_ids(stale)
+        return removed, consumed
+
+    def _detach_sources(self, sources: List[str]) -> List[int]:
+        """Ids of the chunks of some sources, no longer matched as near-duplicates of new chunks"""
+        if self.chunks is None:
+            return []
+
+        # Adding chunks never renumbers existing ids, so these stay valid
+        with self.lock:
+            stale = [chunk_id for source in sources for chunk_id in self.chunks.ids_for_source(source).tolist()]
+
+        if self.dedup is not None:
+            # Old chunks must not absorb the new versions of their own documents
+            self._sync_signatures()
+            self.dedup.unregister(stale)
+            self.dedup.drop_aliases(sources)
+        return stale
+
+    @_synchronized
+    def compact(self):
+        """Drop tombstoned vectors from the index and renumber the remaining chunks"""
+        if not self.tombstones:
+            return
+
+        self._ensure_writable()
+        if self.dedup is not None:
+            self._sync_signatures()
+
+        # Map old chunk ids to their position in the packed chunk list
+        remap = np.full(len(self.chunks), -1, dtype='int64')
+        live = np.flatnonzero(self._live_mask()).astype('int64')
+        remap[live] = np.arange(len(live), dtype='int64')
+        dead = np.fromiter(self.tombstones, dtype='int64', count=len(self.tombstones))
+
+        if self.active_index_type == "hnsw":
+            # HNSW graphs do not support removal, so rebuild from the stored vectors
+            if not len(live):
+                vectors = np.zeros((0, self.dimension), 'float32')
+            elif self.vectors is not None:
+                vectors = self.vectors[live]
+            else:
+                vectors = self.index.reconstruct_batch(live)
+            self.index = faiss.IndexIDMap2(faiss.IndexHNSWFlat(self.dimension, self.hnsw_m))
+            self.index.add_with_ids(vectors, np.arange(len(live), dtype='int64'))
+        elif isinstance(self.index, faiss.IndexIVF):
+            self.index.remove_ids(faiss.IDSelectorBatch(dead))
+            invlists = self.index.invlists
+            for list_no in range(self.index.nlist):
+                list_size = invlists.list_size(list_no)
+                if list_size:
+                    ids = faiss.rev_swig_ptr(invlists.get_ids(list_no), list_size)
+                    ids[:] = remap[ids]
+        else:
+            self.index.remove_ids(faiss.IDSelectorBatch(dead))
+            id_map = faiss.vector_to_array(self.index.id_map)
+            faiss.copy_array_to_vector(remap[id_map], self.index.id_map)
+            self.index.construct_rev_map()
+
+        if self.vectors is not None:
+            self._writable_vectors().compact(live)
+
+        self.chunks = self.chunks.take(live)
+        if self.dedup is not None:
+            self.dedup.compact(live)
+        self.tombstones = set()
+        self._search_params = None
+
+        print(f"Compacted FAISS index to {self.index.ntotal} vectors")
+
+    def _live_mask(self) -> np.ndarray:
+        """Boolean mask of chunk ids that are not deleted"""
+        mask = np.ones(len(self.chunks), dtype=bool)
+        if self.tombstones:
+            mask[list(self.tombstones)] = False
+        return mask
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """
+        Tune approximate search without rebuilding the index
+
+        Args:
+            nprobe: Number of IVF lists visited per query
+            ef_search: HNSW search queue size
+        """
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+        self._search_params = None
+
+    def _get_search_params(self) -> Optional[faiss.SearchParameters]:
+        """Search parameters for the active index type, excluding tombstoned chunks"""
+        if self._search_params is None:
+            selector = None
+            if self.tombstones:
+                dead = np.fromiter(self.tombstones, dtype='int64', count=len(self.tombstones))
+                # Keep the selectors referenced so FAISS never sees freed objects
+                self._selector_batch = faiss.IDSelectorBatch(dead)
+                selector = self._selector = faiss.IDSelectorNot(self._selector_batch)
+
+            if isinstance(self.index, faiss.IndexIVF):
+                self._search_params = faiss.SearchParametersIVF(nprobe=self.nprobe)
+            elif self.active_index_type == "hnsw":
+                self._search_params = faiss.SearchParametersHNSW(efSearch=self.ef_search)
+            else:
+                self._search_params = faiss.SearchParameters()
+
+            if selector is not None:
+                self._search_params.sel = selector
+
+        return self._search_params
+
+    def embed_queries(self, queries: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Embed search queries
+
+        Args:
+            queries: Search queries
+            batch_size: Encoder batch size
+
+        Returns:
+            Float32 array of shape (num_queries, dimension)
+        """
+        return self.embedding_model.encode(queries, batch_size=batch_size, convert_to_numpy=True).astype('float32')
+
+    @_synchronized
+    def _search_embeddings(self, query_embeddings: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search the index with query vectors, re-ranking candidates exactly if enabled
+
+        Args:
+            query_embeddings: Array of shape (num_queries, dimension)
+            top_k: Number of results per query
+
+        Returns:
+            (distances, ids) arrays of shape (num_queries, top_k), padded with -1 ids
+        """
+        use_rerank = self.rerank and self.vectors is not None and self.rerank_factor > 1
+        fetch_k = top_k * self.rerank_factor if use_rerank else top_k
+
+        distances, indices = self.index.search(query_embeddings, fetch_k, params=self._get_search_params())
+
+        if use_rerank:
+            distances, indices = self._rerank(query_embeddings, indices, top_k)
+
+        return distances, indices
+
+    def _rerank(self, query_embeddings: np.ndarray, candidates: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Re-order candidate ids by exact L2 distance to full-precision vectors"""
+        num_queries = len(query_embeddings)
+        distances = np.full((num_queries, top_k), np.finfo(np.float32).max, dtype=np.float32)
+        indices = np.full((num_queries, top_k), -1, dtype='int64')
+
+        for row in range(num_queries):
+            ids = candidates[row][candidates[row] >= 0]
+            if not len(ids):
+                continue
+            exact = ((self.vectors[ids] - query_embeddings[row]) ** 2).sum(axis=1)
+            order = np.argsort(exact, kind='stable')[:top_k]
+            distances[row, :len(order)] = exact[order]
+            indices[row, :len(order)] = ids[order]
+
+        return distances, indices
 
     def search(self, query: str, top_k: int = 3) -> List[Tuple[Dict[str, Any], float]]:
         """
@@ -80,18 +849,187 @@ class VectorStore:
             raise ValueError("Index not built. Call build_index() first.")
 
         # Embed the query
-        query_embedding = self.embedding_model.encode([query], convert_to_numpy=True)
+        query_embedding = self.embed_queries([query])
 
-        # Search the index
-        distances, indices = self.index.search(query_embedding.astype('float32'), top_k)
+        # Search the index and look up chunks before compaction can renumber them
+        with self.lock:
+            distances, indices = self._search_embeddings(query_embedding, top_k)
 
-        # Return chunks with their distances
-        results = []
-        for idx, dist in zip(indices[0], distances[0]):
-            results.append((self.chunks[idx], float(dist)))
+            # Return chunks with their distances (FAISS pads missing results with -1)
+            results = []
+            for idx, dist in zip(indices[0], distances[0]):
+                if idx < 0:
+                    continue
+                results.append((self._chunk_with_aliases(idx), float(dist)))
 
         return results
 
+    def search_batch(self, queries: List[str], top_k: int = 3, batch_size: int = 64) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search for the most relevant chunks of many queries at once
+
+        All queries are embedded in one batched encode call and searched with a
+        single FAISS call over the stacked query matrix.
+
+        Args:
+            queries: Search queries
+            top_k: Number of results per query
+            batch_size: Encoder batch size
+
+        Returns:
+            (ids, distances) arrays of shape (num_queries, top_k); missing results have id -1
+        """
+        if self.index is None:
+            raise ValueError("Index not built. Call build_index() first.")
+
+        if len(queries) == 0:
+            return np.zeros((0, top_k), dtype='int64'), np.zeros((0, top_k), dtype='float32')
+
+        return self.search_embeddings(self.embed_queries(queries, batch_size=batch_size), top_k)
+
+    def search_embeddings(self, query_embeddings: np.ndarray, top_k: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search with already embedded queries
+
+        Args:
+            query_embeddings: Array of shape (num_queries, dimension) from embed_queries()
+            top_k: Number of results per query
+
+        Returns:
+            (ids, distances) arrays of shape (num_queries, top_k); missing results have id -1
+        """
+        if self.index is None:
+            raise ValueError("Index not built. Call build_index() first.")
+
+        distances, indices = self._search_embeddings(np.asarray(query_embeddings, dtype='float32'), top_k)
+        return indices, distances
+
+    def search_chunks(self, query_embeddings: np.ndarray, top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        """
+        Search with already embedded queries and return the matching chunks
+
+        Ids are resolved to chunks under the store's lock, so a concurrent
+        update cannot compact the store between the search and the lookup.
+
+        Args:
+            query_embeddings: Array of shape (num_queries, dimension) from embed_queries()
+            top_k: Number of results per query
+
+        Returns:
+            List of chunks for each query, most relevant first
+        """
+        with self.lock:
+            ids, _ = self.search_embeddings(query_embeddings, top_k)
+            return [[self._chunk_with_aliases(idx) for idx in row if idx >= 0] for row in ids.tolist()]
+
+    def _chunk_with_aliases(self, chunk_id: int) -> Dict[str, Any]:
+        """A stored chunk, listing the near-duplicates it stands for under 'aliases'"""
+        chunk = self.chunks[chunk_id]
+        if self.dedup is not None and chunk_id in self.dedup.aliases:
+            chunk['aliases'] = list(self.dedup.aliases[chunk_id])
+        return chunk
+
+    def memory_footprint(self) -> Dict[str, Any]:
+        """
+        Approximate memory used by the index compared with a flat float32 index
+
+        Returns:
+            Dictionary with byte counts and the compression ratio
+        """
+        if self.index is None:
+            raise ValueError("Index not built. Call build_index() first.")
+
+        num_vectors = self.index.ntotal
+        if isinstance(self.index, faiss.IndexIVF):
+            # Codes plus stored ids, and the coarse centroids
+            index_bytes = num_vectors * (self.index.code_size + 8) + self.index.nlist * self.dimension * 4
+            if isinstance(self.index, faiss.IndexIVFPQ):
+                index_bytes += self.index.pq.centroids.size() * 4
+        else:
+            inner = faiss.downcast_index(self.index.index)
+            if isinstance(inner, faiss.IndexHNSW):
+                storage = faiss.downcast_index(inner.storage)
+                index_bytes = num_vectors * storage.code_size + inner.hnsw.neighbors.size() * 4
+            else:
+                index_bytes = num_vectors * inner.code_size
+            # External id map
+            index_bytes += num_vectors * 8
+
+        flat_bytes = num_vectors * self.dimension * 4
+        return {
+            'index_type': self.active_index_type,
+            'num_vectors': num_vectors,
+            'index_bytes': int(index_bytes),
+            'bytes_per_vector': index_bytes / num_vectors if num_vectors else 0.0,
+            'flat_bytes': flat_bytes,
+            'compression_ratio': flat_bytes / index_bytes if index_bytes else 0.0,
+            'full_precision_disk_bytes': self.vectors.nbytes if self.vectors is not None else 0,
+            'chunk_bytes': self.chunks.nbytes,
+            'aliased_chunks': self.dedup.num_aliases if self.dedup is not None else 0,
+            'dedup_bytes': self.dedup.nbytes if self.dedup is not None else 0
+        }
+
+    def measure_recall(self, queries: List[str], top_k: int = 10) -> Dict[str, Any]:
+        """
+        Measure recall@k of the index against exact flat search
+
+        Ground truth is computed block by block from the full-precision vectors,
+        so the store must have been built with rerank=True.
+
+        Args:
+            queries: Sample queries
+            top_k: Number of results compared per query
+
+        Returns:
+            Dictionary with recall without and with exact re-ranking
+        """
+        if self.index is None:
+            raise ValueError("Index not built. Call build_index() first.")
+        if self.vectors is None:
+            raise ValueError("Recall needs full-precision vectors. Build the store with rerank=True.")
+
+        query_embeddings = self.embed_queries(queries)
+        live_mask = self._live_mask()
+
+        # Exact ground truth over live vectors
+        heap = faiss.ResultHeap(len(queries), top_k)
+        for start in range(0, len(self.vectors), VectorFile.COMPACT_BLOCK_ROWS):
+            rows = np.arange(start, min(start + VectorFile.COMPACT_BLOCK_ROWS, len(self.vectors)))
+            rows = rows[live_mask[rows]]
+            if not len(rows):
+                continue
+            block_distances, block_ids = faiss.knn(query_embeddings, self.vectors[rows], min(top_k, len(rows)))
+            block_ids = np.where(block_ids >= 0, rows[np.maximum(block_ids, 0)], -1)
+            if block_ids.shape[1] < top_k:
+                pad = top_k - block_ids.shape[1]
+                block_distances = np.pad(block_distances, ((0, 0), (0, pad)), constant_values=np.finfo(np.float32).max)
+                block_ids = np.pad(block_ids, ((0, 0), (0, pad)), constant_values=-1)
+            heap.add_result(block_distances, block_ids)
+        heap.finalize()
+
+        def recall(found: np.ndarray) -> float:
+            hits = [
+                len(set(found[row][found[row] >= 0]) & set(heap.I[row][heap.I[row] >= 0]))
+                for row in range(len(queries))
+            ]
+            expected = sum(int((heap.I[row] >= 0).sum()) for row in range(len(queries)))
+            return sum(hits) / expected if expected else 1.0
+
+        _, approx_ids = self.index.search(query_embeddings, top_k, params=self._get_search_params())
+        _, reranked_ids = self._rerank(
+            query_embeddings,
+            self.index.search(query_embeddings, top_k * max(self.rerank_factor, 1), params=self._get_search_params())[1],
+            top_k
+        )
+
+        return {
+            'index_type': self.active_index_type,
+            'top_k': top_k,
+            'num_queries': len(queries),
+            'recall': recall(approx_ids),
+            'recall_reranked': recall(reranked_ids)
+        }
+
     def save(self, path: str):
         """
         Save vector store to disk
@@ -101,32 +1039,201 @@ class VectorStore:
         """
         os.makedirs(path, exist_ok=True)
 
-        # Save FAISS index
-        faiss.write_index(self.index, os.path.join(path, "index.faiss"))
+        # Save FAISS index, renamed into place so a mapped copy stays valid
+        index_file = os.path.join(path, "index.faiss")
+        faiss.write_index(self.index, index_file + ".tmp")
+        os.replace(index_file + ".tmp", index_file)
 
-        # Save chunks
-        with open(os.path.join(path, "chunks.pkl"), 'wb') as f:
-            pickle.dump(self.chunks, f)
+        # Save chunk columns (deleted chunks keep their slot)
+        self.chunks.save(path, compression=self.chunk_compression)
+
+        # Save full-precision vectors used for re-ranking
+        if self.vectors is not None:
+            self.vectors.copy_to(os.path.join(path, "vectors.f32"))
+
+        # Save near-duplicate signatures and aliases
+        if self.dedup is not None:
+            self._sync_signatures()
+            self.dedup.save(path)
+        else:
+            for name in (DEDUP_FILE, SIGNATURES_FILE):
+                if os.path.exists(os.path.join(path, name)):
+                    os.remove(os.path.join(path, name))
+
+        # Save index configuration so search parameters survive a reload
+        with open(os.path.join(path, "config.json"), 'w', encoding='utf-8') as f:
+            json.dump(self._index_config(), f, indent=2)
 
         print(f"Saved vector store to {path}")
 
-    def load(self, path: str):
+    def _index_config(self) -> Dict[str, Any]:
+        """Index configuration persisted next to the index"""
+        return {
+            'model_name': self.model_name,
+            'index_type': self.index_type,
+            'active_index_type': self.active_index_type,
+            'nlist': self.nlist,
+            'nprobe': self.nprobe,
+            'hnsw_m': self.hnsw_m,
+            'ef_search': self.ef_search,
+            'pq_m': self.pq_m,
+            'pq_nbits': self.pq_nbits,
+            'rerank': self.rerank,
+            'rerank_factor': self.rerank_factor,
+            'chunk_compression': self.chunk_compression
+        }
+
+    def load(self, path: str, mmap: bool = False):
         """
         Load vector store from disk
 
+        With mmap=True the index and chunks are memory-mapped read-only
+        and paged in by the OS as searches touch them, so startup time and
+        resident memory no longer grow with the corpus. The store is copied
+        into memory the first time it is modified.
+
         Args:
             path: Directory path to load the index from
+            mmap: Memory-map the index and chunks instead of reading them
         """
+        config_file = os.path.join(path, "config.json")
+        config = {}
+        if os.path.exists(config_file):
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+
         # Load FAISS index
-        self.index = faiss.read_index(os.path.join(path, "index.faiss"))
+        index_file = os.path.join(path, "index.faiss")
+        if mmap:
+            if config.get('active_index_type') in ("ivf", "ivfpq"):
+                # Inverted lists are mapped as on-disk lists
+                flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+            else:
+                flags = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+            index = faiss.read_index(index_file, flags)
+        else:
+            index = faiss.read_index(index_file)
+
+        # Load chunks; stores saved before the columnar format used a pickled list
+        if has_chunk_store(path):
+            chunks = ChunkStore.load(path, mmap=mmap)
+        else:
+            with open(os.path.join(path, "chunks.pkl"), 'rb') as f:
+                chunks = ChunkStore.from_chunks(pickle.load(f))
+
+        self.reset()
+        self.dimension = index.d
+        for key in ('index_type', 'nlist', 'nprobe', 'hnsw_m', 'ef_search', 'pq_m', 'pq_nbits', 'rerank', 'rerank_factor', 'chunk_compression'):
+            if config.get(key) is not None:
+                setattr(self, key, config[key])
+
+        if isinstance(index, faiss.IndexIVF):
+            self.index = index
+            self.active_index_type = "ivfpq" if isinstance(index, faiss.IndexIVFPQ) else "ivf"
+            if mmap:
+                self._mapped_index_file = index_file
+        elif isinstance(index, faiss.IndexIDMap2):
+            self.index = index
+            if mmap:
+                self._mapped_index_file = index_file
+            inner = faiss.downcast_index(index.index)
+            if isinstance(inner, faiss.IndexHNSW):
+                self.active_index_type = "hnsw"
+            elif isinstance(inner, faiss.IndexScalarQuantizer):
+                self.active_index_type = "sq8"
+            else:
+                self.active_index_type = "flat"
+        else:
+            # Stores saved before incremental updates used a plain index with implicit ids
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(index.d))
+            self.active_index_type = "flat"
+            if index.ntotal:
+                self.index.add_with_ids(
+                    index.reconstruct_n(0, index.ntotal), np.arange(index.ntotal, dtype='int64')
+                )
+
+        # Full-precision vectors are mapped read-only and copied before the first write
+        vectors_file = os.path.join(path, "vectors.f32")
+        if os.path.exists(vectors_file):
+            self.vectors = VectorFile(vectors_file, self.dimension, read_only=True)
+            if len(self.vectors) != len(chunks):
+                print("⚠️  Full-precision vectors do not match the chunks, disabling re-ranking")
+                self.vectors = None
+                self.rerank = False
+
+        self.chunks = chunks
+        self.tombstones = set(chunks.deleted_ids().tolist())
+        # A deduplicated index keeps its own settings; otherwise new chunks are signed when added
+        self.dedup = ChunkDeduplicator.load(path) or self.dedup
+
+        print(f"Loaded vector store from {path} ({self.index.ntotal} vectors, {self.active_index_type} index)")
+
+    def save_checkpoint(self, checkpoint_dir: str, cursor: Dict[str, Any]):
+        """
+        Save the store with a cursor describing how far a build has progressed
+
+        The checkpoint is written to a fresh directory and swapped in with
+        renames, so a crash while saving leaves the previous checkpoint usable.
 
-        # Load chunks
-        with open(os.path.join(path, "chunks.pkl"), 'rb') as f:
-            self.chunks = pickle.load(f)
+        Args:
+            checkpoint_dir: Directory holding the checkpoint
+            cursor: JSON-serializable build position
+        """
+        current = os.path.join(checkpoint_dir, CHECKPOINT_NAME)
+        new, old = current + ".new", current + ".old"
+        shutil.rmtree(new, ignore_errors=True)
+
+        self.save(new)
+        with open(os.path.join(new, CURSOR_FILE), 'w', encoding='utf-8') as f:
+            json.dump(cursor, f, indent=2)
+
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(current):
+            os.rename(current, old)
+        os.rename(new, current)
+        shutil.rmtree(old, ignore_errors=True)
+
+        print(f"Checkpoint saved to {checkpoint_dir} ({self.num_chunks} chunks)")
+
+    def load_checkpoint(self, checkpoint_dir: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the latest complete checkpoint
+
+        Args:
+            checkpoint_dir: Directory holding the checkpoint
+
+        Returns:
+            The checkpoint cursor, or None if there is no checkpoint
+        """
+        current = os.path.join(checkpoint_dir, CHECKPOINT_NAME)
+        # A crash between the two renames leaves only the previous checkpoint
+        for path in (current, current + ".old"):
+            cursor_file = os.path.join(path, CURSOR_FILE)
+            if os.path.exists(cursor_file):
+                with open(cursor_file, 'r', encoding='utf-8') as f:
+                    cursor = json.load(f)
+                self.load(path)
+                return cursor
+        return None
 
-        self.dimension = self.index.d
+    @staticmethod
+    def remove_checkpoint(checkpoint_dir: str):
+        """
+        Delete the checkpoint files of a finished build
+
+        Only what save_checkpoint() writes is removed; the directory itself is
+        removed only if nothing else is left in it.
 
-        print(f"Loaded vector store from {path} ({self.index.ntotal} vectors)")
+        Args:
+            checkpoint_dir: Directory holding the checkpoint
+        """
+        current = os.path.join(checkpoint_dir, CHECKPOINT_NAME)
+        for path in (current, current + ".new", current + ".old"):
+            shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.rmdir(checkpoint_dir)
+        except OSError:
+            pass
 
 
 if __name__ == "__main__":